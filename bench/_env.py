@@ -0,0 +1,10 @@
+"""
+Points core at the fake adb (fake_adb.py, fake_adb.cmd on Windows)
+unless KEYBRIDGE_ADB is already set. Import it before anything from
+core: ADB_PATH is read when core.config loads.
+"""
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FAKE_ADB = os.path.join(HERE, "fake_adb.cmd" if os.name == "nt" else "fake_adb.py")
+os.environ.setdefault("KEYBRIDGE_ADB", FAKE_ADB)
@@ -0,0 +1,61 @@
+"""
+adb CLI vs native smart-socket client.
+
+Runs the same mix of `adb devices` and `adb -s <serial> shell echo ok` calls
+through a spawned adb binary (the fake one) and through core.adb_client
+against the fake server, and reports calls per second.
+
+    python -m bench.bench_adb_client [--calls 200]
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from bench._env import FAKE_ADB
+
+from core.adb_client import AdbClient
+from bench.fake_adb_server import FakeAdbServer
+
+
+def bench_subprocess(calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        args = ["devices"] if i % 2 else ["-s", "FAKE0001", "shell", "echo", "ok"]
+        subprocess.run([FAKE_ADB] + args, capture_output=True, text=True)
+    return time.perf_counter() - start
+
+
+def bench_client(calls, port):
+    client = AdbClient(port=port)
+    start = time.perf_counter()
+    for i in range(calls):
+        args = ["devices"] if i % 2 else ["-s", "FAKE0001", "shell", "echo", "ok"]
+        out = client.run(args)
+        assert out, args
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=200)
+    args = ap.parse_args()
+
+    server = FakeAdbServer().start()
+    results = {
+        "subprocess_seconds": round(bench_subprocess(args.calls), 4),
+        "client_seconds": round(bench_client(args.calls, server.port), 4),
+        "calls": args.calls,
+    }
+    server.stop()
+    results["subprocess_calls_per_sec"] = round(args.calls / results["subprocess_seconds"], 1)
+    results["client_calls_per_sec"] = round(args.calls / results["client_seconds"], 1)
+    print(json.dumps(results, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
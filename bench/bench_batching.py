@@ -0,0 +1,102 @@
+"""
+Worker write-coalescing benchmark.
+
+Pushes a burst of `input tap` / `input text` / `input keyevent` commands
+through ADBEngine against the fake adb, once with max_batch=1 (the old
+one-write-per-command behaviour) and once with the configured batch size,
+and reports pipe writes and commands per second. No two neighbours can
+merge in the queue, so both runs send every command to the device.
+
+    python -m bench.bench_batching [--commands 5000] [--cost 0.0]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import bench._env # Before core: KEYBRIDGE_ADB -> the fake adb
+
+from core.engine import ADBEngine
+from core.config import ENGINE_MAX_BATCH, ENGINE_QUEUE_MAX
+
+
+class CountingWriter:
+    """ Wraps the shell's stdin and counts write() calls. """
+    def __init__(self, raw):
+        self.raw = raw
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+    def close(self):
+        self.raw.close()
+
+
+def run(max_batch, n_commands, cost):
+    fd, stats_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    os.environ["FAKE_ADB_STATS"] = stats_path
+    os.environ["FAKE_ADB_CMD_COST"] = str(cost)
+
+    engine = ADBEngine(lambda msg: None, lambda *a: None)
+    engine.max_batch = max_batch
+    if not engine.connect("FAKE0001"):
+        raise SystemExit("fake adb did not start")
+    writer = CountingWriter(engine.process.stdin)
+    engine.process.stdin = writer
+    proc = engine.process
+
+    start = time.perf_counter()
+    for i in range(n_commands):
+        # Stay under the queue bound: a dropped command would skew the counts
+        while engine.queue.qsize() >= ENGINE_QUEUE_MAX // 2: time.sleep(0.001)
+        # Text and keycodes only ever sit next to taps, which never merge
+        if i % 4 == 1: engine.send_text("hello world")
+        elif i % 4 == 3: engine.send_cmd("input keyevent 67")
+        else: engine.send_cmd(f"input tap {i % 1000} 500")
+    engine.auto_reconnect = False # This exit is on purpose
+    engine.send_cmd("exit")
+    proc.wait()
+    elapsed = time.perf_counter() - start
+
+    engine.stop()
+    with open(stats_path) as f:
+        stats = json.load(f)
+    os.remove(stats_path)
+    return {
+        "max_batch": max_batch,
+        "commands": stats["commands"],
+        "writes": writer.writes,
+        "device_reads": stats["reads"],
+        "seconds": round(elapsed, 4),
+        "commands_per_sec": round(stats["commands"] / elapsed, 1),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--commands", type=int, default=5000)
+    ap.add_argument("--cost", type=float, default=0.0, help="simulated device seconds per command")
+    args = ap.parse_args()
+
+    results = [run(1, args.commands, args.cost), run(ENGINE_MAX_BATCH, args.commands, args.cost)]
+    for r in results:
+        print(json.dumps(r, sort_keys=True))
+    base, new = results
+    if base["commands"] != new["commands"]:
+        print(f"[!] runs sent {base['commands']} vs {new['commands']} device commands")
+        return 1
+    print(f"writes: {base['writes']} -> {new['writes']}  "
+          f"cmd/s: {base['commands_per_sec']} -> {new['commands_per_sec']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
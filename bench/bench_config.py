@@ -0,0 +1,139 @@
+"""
+Settings persistence: adding --macros macros and surviving a crash, for
+
+    legacy   - the old ConfigManager: rewrites user_config.json in place
+               (indent=4) on every add_macro
+    store    - core.settings.ConfigManager: debounced, atomic temp + rename
+    import   - ConfigManager.import_macros: the whole batch in one call
+
+Reports wall time, file writes and bytes written. Then, for legacy and
+store, kills a process that keeps saving at a random moment --trials
+times and counts how often the file left behind is unreadable or lost
+macros (the baseline of 500 macros saved before the loop).
+
+    python -m bench.bench_config [--macros 2000] [--trials 20]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+os.environ.setdefault("KEYBRIDGE_CONFIG_DIR", tempfile.mkdtemp(prefix="kb_cfg_"))
+
+from core.settings import ConfigManager
+
+BASELINE = 500
+
+
+class LegacyConfig:
+    """ The old save path, counted. """
+    def __init__(self, path):
+        self.path = path
+        self.macros = {}
+        self.writes = 0
+        self.bytes = 0
+
+    def save(self):
+        with open(self.path, 'w') as f:
+            json.dump({"macros": self.macros}, f, indent=4)
+            self.bytes += f.tell()
+        self.writes += 1
+
+    def add_macro(self, name, text):
+        self.macros[name] = text
+        self.save()
+
+
+class CountingConfig(ConfigManager):
+    bytes = 0
+
+    def _write(self, text):
+        self.bytes += len(text.encode("utf-8"))
+        super()._write(text)
+
+
+def macros(n, start=0):
+    return [(f"Macro {i}", f"Text of macro number {i}, typed on the phone") for i in range(start, start + n)]
+
+
+def timed(mode, n, folder):
+    path = os.path.join(folder, f"{mode}.json")
+    start = time.perf_counter()
+    if mode == "legacy":
+        store = LegacyConfig(path)
+        for name, text in macros(n): store.add_macro(name, text)
+    else:
+        store = CountingConfig(path)
+        if mode == "import":
+            store.import_macros(macros(n))
+        else:
+            for name, text in macros(n): store.add_macro(name, text)
+        store.flush()
+    return {"seconds": round(time.perf_counter() - start, 3), "writes": store.writes,
+            "kb_written": round(store.bytes / 1024, 1)}
+
+
+def child(mode, path):
+    """ Saves the baseline, says so, then keeps adding + saving until killed. """
+    store = LegacyConfig(path) if mode == "legacy" else ConfigManager(path, save_delay=0)
+    if mode != "legacy": store.macros = {}
+    for name, text in macros(BASELINE): store.macros[name] = text
+    store.save()
+    if mode != "legacy": store.flush()
+    print("ready", flush=True)
+    i = BASELINE
+    while True:
+        store.add_macro(*macros(1, i)[0])
+        if mode != "legacy": store.flush()
+        i += 1
+
+
+def crash_trials(mode, trials, folder):
+    bad = 0
+    rnd = random.Random(7)
+    for t in range(trials):
+        path = os.path.join(folder, f"crash_{mode}_{t}.json")
+        proc = subprocess.Popen([sys.executable, "-m", "bench.bench_config", "--child", mode, path],
+                                cwd=ROOT, stdout=subprocess.PIPE, text=True)
+        proc.stdout.readline()
+        time.sleep(rnd.uniform(0.02, 0.3))
+        os.kill(proc.pid, signal.SIGKILL if hasattr(signal, "SIGKILL") else signal.SIGTERM)
+        proc.wait()
+        try:
+            with open(path, encoding="utf-8") as f: kept = len(json.load(f)["macros"])
+        except (OSError, ValueError, KeyError):
+            kept = 0
+        if kept < BASELINE: bad += 1
+    return bad
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--macros", type=int, default=2000)
+    ap.add_argument("--trials", type=int, default=20)
+    ap.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child: return child(*args.child)
+
+    folder = tempfile.mkdtemp(prefix="kb_cfg_bench_")
+    record = {"macros": args.macros}
+    for mode in ("legacy", "store", "import"):
+        record[mode] = timed(mode, args.macros, folder)
+    record["crash_trials"] = args.trials
+    for mode in ("legacy", "store"):
+        record[mode]["crashes_lost_macros"] = crash_trials(mode, args.trials, folder)
+    shutil.rmtree(folder, ignore_errors=True)
+    print(json.dumps(record, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
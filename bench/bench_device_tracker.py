@@ -0,0 +1,96 @@
+"""
+Device discovery: how long until the app sees a phone attach, detach or
+change state, and how many adb server requests that costs, for
+
+    poll     - `adb devices` every --poll seconds (what a rescan loop would do)
+    tracker  - core.device_tracker (one host:track-devices stream)
+
+against a fake adb server whose devices come and go every --every seconds.
+
+    python -m bench.bench_device_tracker [--events 20] [--every 0.7] [--poll 2]
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+from bench.fake_adb_server import FakeAdbServer
+from core.adb_client import client as adb_client
+from core.device_tracker import DeviceTracker
+
+STATES = ("device", "offline", "unauthorized")
+
+
+def churn(server, events, every, changed_at, seed=7):
+    """ Attaches, detaches and flips device states; records when each happened. """
+    rnd = random.Random(seed)
+    for n in range(events):
+        time.sleep(every)
+        serial = f"FAKE{rnd.randint(1, 4):04d}"
+        with server.online:
+            state = server.states.get(serial) if serial in server.serials else None
+        new = rnd.choice([s for s in STATES + (None,) if s != state])
+        changed_at.append(((serial, new), time.perf_counter()))
+        if new is None: server.remove_serial(serial)
+        else: server.add_serial(serial, new)
+
+
+def measure(mode, args):
+    server = FakeAdbServer(serials=()).start()
+    adb_client.close()
+    adb_client.port = server.port
+    changed_at, snapshots = [], []
+
+    def seen(devices):
+        snapshots.append((time.perf_counter(), devices))
+
+    stop = threading.Event()
+    if mode == "tracker":
+        tracker = DeviceTracker()
+        tracker.subscribe(lambda devices, changes: seen(devices))
+        tracker.start()
+    else:
+        def poller():
+            while not stop.wait(args.poll):
+                seen(dict(adb_client.devices()))
+        threading.Thread(target=poller, daemon=True).start()
+
+    time.sleep(0.2)
+    churn(server, args.events, args.every, changed_at)
+    time.sleep(args.poll + 0.5)
+    stop.set()
+    if mode == "tracker": tracker.stop()
+    server.stop()
+
+    # A change counts as seen by the first snapshot showing it before the
+    # same device changed again (a poll can miss short-lived states)
+    delays = []
+    for i, ((serial, state), at) in enumerate(changed_at):
+        until = next((t for (s, _), t in changed_at[i + 1:] if s == serial), float("inf"))
+        hit = next((t for t, devices in snapshots if at <= t < until and devices.get(serial) == state), None)
+        if hit is not None: delays.append(hit - at)
+    return {
+        "mode": mode,
+        "changes": len(changed_at),
+        "seen": len(delays),
+        "mean_delay_ms": round(sum(delays) / len(delays) * 1000, 1) if delays else None,
+        "max_delay_ms": round(max(delays) * 1000, 1) if delays else None,
+        "server_requests": len(server.requests),
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=20)
+    ap.add_argument("--every", type=float, default=0.7, help="seconds between device changes")
+    ap.add_argument("--poll", type=float, default=2.0, help="poll mode interval")
+    args = ap.parse_args()
+    for mode in ("poll", "tracker"):
+        print(json.dumps(measure(mode, args), sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
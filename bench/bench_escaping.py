@@ -0,0 +1,104 @@
+"""
+send_text escaping: correctness + throughput.
+
+1. Round-trips random ASCII strings (all shell metacharacters included,
+   plus literal "%s") through a real `sh`, decodes each argument the way
+   `input text` does (every "%s" is a space) and checks the typed text
+   is the original.
+2. Times the old chained-replace escaper against core.text_escape, on
+   punctuation-heavy fragments and on plain words.
+
+    python -m bench.bench_escaping [--strings 2000] [--skip-verify]
+"""
+import argparse
+import json
+import random
+import shutil
+import string
+import subprocess
+import sys
+import timeit
+
+from core.text_escape import escape_input_text, input_text_commands
+
+ALPHABET = string.ascii_letters + string.digits + string.punctuation + " \t"
+# "%s" next to escapes and spaces: random strings rarely hit these
+PERCENT_CASES = ["100%sure", "50% off", "%%s", "%s%s", "a%", "%", "s%s s", "\\%s", "%\ts"]
+
+
+def legacy_escape(line):
+    """ The pre-translate escaper from ADBEngine.send_text (for comparison). """
+    safe_line = str(line).replace("\\", "\\\\")
+    safe_line = safe_line.replace('"', '\\"').replace("'", "\\'")
+    for char in '()<>|;&*~`$#[]!':
+        safe_line = safe_line.replace(char, f"\\{char}")
+    return safe_line.replace(" ", "%s")
+
+
+def random_strings(n, seed=1234):
+    rnd = random.Random(seed)
+    return ["".join(rnd.choice(ALPHABET) for _ in range(rnd.randint(1, 40))) for _ in range(n)]
+
+
+def input_decode(arg):
+    """ What `input text <arg>` types: every "%s" is a space, there is no escape. """
+    return arg.replace("%s", " ")
+
+
+def verify(samples, chunk=200):
+    """ Returns a list of (text, got) mismatches. """
+    sh = shutil.which("sh")
+    if not sh: raise SystemExit("no `sh` on PATH - run with --skip-verify")
+    failures = []
+    for start in range(0, len(samples), chunk):
+        part = samples[start:start + chunk]
+        # Each `input text <escaped>` becomes a printf of its argument,
+        # NUL-terminated; \1 ends a sample (it may take several commands)
+        script = "\n".join(input_text_commands(s).replace("input text ", "printf '%s\\0' ") + "\nprintf '\\1'"
+                           for s in part)
+        out = subprocess.run([sh, "-c", script], capture_output=True).stdout
+        got = ["".join(input_decode(arg) for arg in sample.split("\0")[:-1])
+               for sample in out.decode("utf-8").split("\1")[:-1]]
+        for text, typed in zip(part, got):
+            if typed != text: failures.append((text, typed))
+        if len(got) != len(part): failures.append(("<count>", f"{len(got)} != {len(part)}"))
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--strings", type=int, default=2000)
+    ap.add_argument("--skip-verify", action="store_true")
+    args = ap.parse_args()
+
+    samples = PERCENT_CASES + random_strings(args.strings)
+    if not args.skip_verify:
+        failures = verify(samples)
+        for text, got in failures[:10]:
+            print(f"MISMATCH {text!r} -> {got!r}")
+        if failures: return 1
+        print(f"round-trip OK ({len(samples)} strings through sh)")
+
+    # Typing is mostly short, repeated fragments (words, macros)
+    rnd = random.Random(7)
+    workloads = {
+        "punctuation": random_strings(300, seed=99),
+        "words": ["".join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(2, 9))) for _ in range(300)],
+    }
+    record = {}
+    for name, fragments in workloads.items():
+        workload = [rnd.choice(fragments) for _ in range(20000)]
+        best = lambda f: len(workload) / min(timeit.repeat(lambda: [f(w) for w in workload], number=1, repeat=5))
+        input_text_commands.cache_clear()
+        record[name] = {
+            "legacy_per_sec": round(best(legacy_escape)),
+            "translate_per_sec": round(best(escape_input_text)),
+            "commands_cached_per_sec": round(best(input_text_commands)),
+        }
+    record["fragments"] = 20000
+    print(json.dumps(record, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Command queue under a flood: many small sends (a runaway macro, a paste
+typed key by key) at a device that needs --cost seconds per command.
+
+    plain    - the old queue: unbounded, one command per send
+    bounded  - core.event_queue.EventQueue: text runs and keycodes merge
+               while they wait, Backspace folds into queued text, and
+               past ENGINE_QUEUE_MAX events new sends are dropped (whole)
+
+Workloads:
+    chars    - single characters with a Backspace every 10 (merge + fold)
+    lines    - "hello world" + Enter (text/keycode alternate: nothing merges,
+               so only the bound helps)
+
+Reports how long the device keeps typing after the last send (drain),
+peak queue depth and Python memory, device commands and the queue's
+merge/fold/drop counters. Also checks that one send longer than the
+bound (a 300-line paste) is queued whole, and that the next one is
+dropped whole; exits 1 if not.
+
+    python -m bench.bench_event_queue [--events 3000] [--cost 0.01]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import bench._env # Before core: KEYBRIDGE_ADB -> the fake adb
+
+from core import engine as engine_mod
+from core.event_queue import EventQueue, Event, TEXT, KEYS
+
+
+class PlainQueue(EventQueue):
+    """ The old behaviour: no merging, no bound. """
+    def __init__(self, maxsize):
+        super().__init__(10 ** 9)
+
+    def _absorb(self, tail, event):
+        return False
+
+
+def flood(engine, workload, events):
+    for i in range(events):
+        if workload == "chars":
+            if i % 10 == 9: engine.send_cmd("input keyevent 67")
+            else: engine.send_text("abcdefghij"[i % 10])
+        else:
+            engine.send_text("hello world\n")
+
+
+def run(mode, workload, events, cost):
+    engine_mod.EventQueue = PlainQueue if mode == "plain" else EventQueue
+    stats_path = os.path.join(tempfile.gettempdir(), f"kb_eq_{mode}_{workload}.json")
+    os.environ.update({"FAKE_ADB_CMD_COST": str(cost), "FAKE_ADB_STATS": stats_path})
+    engine = engine_mod.ADBEngine(lambda *a: None, lambda *a: None)
+    engine.use_helper = False
+    if not engine.connect("FAKE0001"): raise SystemExit("fake adb did not start")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    flood(engine, workload, events)
+    sent = time.perf_counter()
+    peak_depth = engine.queue.peak
+    deadline = sent + 300
+    while (engine.queue.qsize() or engine.in_flight()) and time.perf_counter() < deadline:
+        peak_depth = max(peak_depth, engine.queue.qsize())
+        time.sleep(0.005)
+    drained = time.perf_counter()
+    _, peak_mem = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    process = engine.process
+    engine.auto_reconnect = False # This exit is on purpose
+    engine.send_cmd("exit")
+    try: process.wait(timeout=10)
+    except Exception: process.kill()
+    engine.stop()
+    device = {}
+    try:
+        with open(stats_path) as f: device = json.load(f)
+        os.unlink(stats_path)
+    except (OSError, ValueError): pass
+
+    q = engine.queue_stats()
+    return {
+        "send_s": round(sent - start, 3),
+        "drain_s": round(drained - sent, 3),
+        "peak_depth": peak_depth,
+        "peak_mem_kb": round(peak_mem / 1024, 1),
+        "device_commands": device.get("commands", 0),
+        "merged": q["merged"], "folded": q["folded"], "dropped": q["dropped"],
+    }
+
+
+def check_long_send(lines=300, maxsize=256):
+    """ [queued, dropped] after two sends of `lines` lines each into a full-size queue. """
+    q = EventQueue(maxsize)
+    def send():
+        events = []
+        for i in range(lines):
+            events += [Event(TEXT, f"line {i}"), Event(KEYS, ["66"])]
+        return q.put_all(events)
+    send()
+    send()
+    return [q.qsize(), q.dropped]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--events", type=int, default=3000)
+    ap.add_argument("--cost", type=float, default=0.01, help="device seconds per command")
+    args = ap.parse_args()
+
+    for workload in ("chars", "lines"):
+        record = {"workload": workload, "events": args.events, "cost_s": args.cost}
+        for mode in ("plain", "bounded"):
+            record[mode] = run(mode, workload, args.events, args.cost)
+        print(json.dumps(record, sort_keys=True))
+    queued, dropped = check_long_send()
+    print(json.dumps({"long_send": {"queued": queued, "dropped": dropped}}))
+    return 0 if (queued, dropped) == (600, 600) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Flow control under typing bursts: a fast typist against a device that
+needs ~100 ms per `input` command (no input helper).
+
+    off  - no in-flight limit: every batch is written as soon as the
+           batcher flushes it, and the backlog piles up on the device
+    on   - ENGINE_MAX_IN_FLIGHT (fewer while the device is slower than
+           the link, see BatchingPolicy.pipeline_depth): input waits on
+           the PC while the device is behind and goes out merged
+
+Bursts of growing length show whether key latency stays bounded or
+grows with the burst.
+
+    python -m bench.bench_flow [--bursts 100,200,400,800] [--gap-ms 20] [--profile wifi]
+"""
+import argparse
+import json
+import sys
+
+from bench import harness
+from core import config, engine
+from core.batching import BatchingPolicy
+
+ADAPTIVE_DEPTH = BatchingPolicy.pipeline_depth
+
+
+def run(trace, profile, mode):
+    engine.ENGINE_MAX_IN_FLIGHT = config.ENGINE_MAX_IN_FLIGHT if mode == "on" else 10 ** 9
+    BatchingPolicy.pipeline_depth = ADAPTIVE_DEPTH if mode == "on" else (lambda self, limit: limit)
+    prof = harness.PROFILES[profile]
+    res = harness.run_scenario(trace, profile, prof["cost"], prof["jitter"], timeout=120.0)["results"]
+    total = res["latency_ms"]["total"]
+    return {
+        "commands": res["device_commands"],
+        "completed_keys": res["completed_keys"],
+        "drain_s": res["drain_seconds"],
+        "p50_ms": total["p50"],
+        "p95_ms": total["p95"],
+        "max_ms": total["max"],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--bursts", default="100,200,400,800")
+    ap.add_argument("--gap-ms", type=float, default=20.0)
+    ap.add_argument("--profile", default="wifi", choices=sorted(harness.PROFILES))
+    args = ap.parse_args()
+
+    for keys in [int(x) for x in args.bursts.split(",")]:
+        trace = harness.synthetic_trace(keys, args.gap_ms)
+        record = {"keys": keys, "gap_ms": args.gap_ms, "profile": args.profile}
+        for mode in ("off", "on"):
+            record[mode] = run(trace, args.profile, mode)
+        print(json.dumps(record, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Held-key coalescing on an editing session: typing with long Backspace
+and arrow-key holds (OS auto-repeat: 500 ms delay, then every 33 ms).
+
+Replays the session through bench.harness three times:
+
+    off     - BATCH_COALESCE_KEYS off: one `input keyevent` per repeat
+    on      - repeats coalesced into `input keyevent 67 67 67 ...`
+    old     - coalesced, but the fake device has a pre-4.4 `input`
+              (single keycode): the engine expands the runs back
+
+and reports keyevent commands (the saving), keyevents delivered, all
+device commands (text batches grow when the device lags, so this total
+understates the saving) and drain time.
+
+    python -m bench.bench_keyevents [--trace session.tsv] [--profile usb]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+from bench import harness
+from core import batching, engine
+
+REPEAT_DELAY_MS = 500
+REPEAT_EVERY_MS = 33
+
+
+def editing_session(seed=7, sentences=12):
+    """ Type a sentence, hold Backspace or an arrow over part of it, retype. """
+    rnd = random.Random(seed)
+    trace = []
+    def hold(key, n):
+        trace.append((rnd.uniform(150, 400), key))
+        trace.append((REPEAT_DELAY_MS, key))
+        trace.extend((REPEAT_EVERY_MS, key) for _ in range(n - 2))
+    for _ in range(sentences):
+        words = [rnd.choice(harness.WORDS) for _ in range(rnd.randint(4, 9))]
+        for ch in " ".join(words):
+            trace.append((rnd.lognormvariate(0, 0.4) * 70, ch if ch != " " else "space"))
+        action = rnd.random()
+        if action < 0.5:
+            hold("backspace", rnd.randint(8, 40))
+        elif action < 0.8:
+            hold("left", rnd.randint(6, 25))
+            trace.append((300, "x"))
+            hold("right", rnd.randint(6, 25))
+        for ch in rnd.choice(harness.WORDS):
+            trace.append((rnd.lognormvariate(0, 0.4) * 70, ch))
+        trace.append((400, "enter"))
+    return trace
+
+
+def run(trace, profile, mode):
+    batching.BATCH_COALESCE_KEYS = mode != "off"
+    os.environ["FAKE_ADB_OLD_INPUT"] = "1" if mode == "old" else "0"
+    engine._multi_keyevent.clear() # Probe the fake device afresh
+    prof = harness.PROFILES[profile]
+    res = harness.run_scenario(trace, profile, prof["cost"], prof["jitter"])["results"]
+    return {
+        "commands": res["device_commands"],
+        "keyevent_commands": res["device_keyevent_commands"],
+        "keyevents": res["device_keyevents"],
+        "completed_keys": res["completed_keys"],
+        "drain_s": res["drain_seconds"],
+        "p95_ms": res["latency_ms"]["total"]["p95"],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--trace", help="recorded TSV session (default: built-in editing session)")
+    ap.add_argument("--profile", default="usb", choices=sorted(harness.PROFILES))
+    args = ap.parse_args()
+
+    trace = harness.load_trace(args.trace) if args.trace else editing_session()
+    special = sum(1 for _, key in trace if len(key) > 1 and key != "space")
+    record = {"keys": len(trace), "special_keys": special}
+    for mode in ("off", "on", "old"):
+        record[mode] = run(trace, args.profile, mode)
+    record["keyevent_commands_saved"] = record["off"]["keyevent_commands"] - record["on"]["keyevent_commands"]
+    record["commands_saved"] = record["off"]["commands"] - record["on"]["commands"]
+    print(json.dumps(record, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Log console under spam: a background thread logs --lines messages
+(wizard / notifier / engine chatter) while the Tk loop also runs a 10 ms
+ticker standing in for the UI. Compares
+
+    direct   - the old KeyBridgeWindow.log: one root.after(0) per message,
+               each toggling the Text state, inserting and scrolling
+    console  - ui.log_console.LogConsole: ring buffer, batched redraws at
+               LOG_FLUSH_HZ, widget trimmed to LOG_MAX_LINES
+
+and reports how long until the last line is on screen, the worst ticker
+stall (UI freeze) and lines left in the widget.
+Needs a display.
+
+    python -m bench.bench_log_console [--lines 20000] [--burst 200]
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import tkinter as tk
+
+from ui.log_console import LogConsole
+
+
+def direct_log(root, widget):
+    def write(msg):
+        widget.config(state="normal")
+        widget.insert("end", f"> {msg}\n")
+        widget.see("end")
+        widget.config(state="disabled")
+    return lambda msg: root.after(0, lambda: write(msg))
+
+
+def run(mode, lines, burst):
+    root = tk.Tk()
+    widget = tk.Text(root, height=7, state="disabled")
+    widget.pack()
+    root.update()
+    log = direct_log(root, widget) if mode == "direct" else LogConsole(root, widget).log
+
+    stalls = [0.0]
+    last_tick = [time.perf_counter()]
+    def tick():
+        now = time.perf_counter()
+        stalls[0] = max(stalls[0], now - last_tick[0] - 0.010)
+        last_tick[0] = now
+        root.after(10, tick)
+
+    def spam():
+        for i in range(lines):
+            log(f"[*] message {i} from the background")
+            if i % burst == burst - 1: time.sleep(0.001)
+    done = threading.Event()
+    sent = [0.0]
+    def producer():
+        spam()
+        sent[0] = time.perf_counter()
+        done.set()
+
+    def until_shown():
+        if done.is_set() and f"message {lines - 1} from" in widget.get("end-3l", "end"):
+            root.quit()
+        else:
+            root.after(5, until_shown)
+
+    start = time.perf_counter()
+    threading.Thread(target=producer, daemon=True).start()
+    root.after(10, tick)
+    root.after(5, until_shown)
+    root.mainloop()
+    shown = time.perf_counter()
+    result = {
+        "produce_s": round(sent[0] - start, 3),
+        "shown_s": round(shown - start, 3),
+        "worst_stall_ms": round(stalls[0] * 1000, 1),
+        "widget_lines": int(widget.index("end-1c").split(".")[0]) - 1,
+    }
+    root.destroy()
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=20000)
+    ap.add_argument("--burst", type=int, default=200, help="messages between 1 ms pauses")
+    args = ap.parse_args()
+
+    record = {"lines": args.lines}
+    for mode in ("direct", "console"):
+        record[mode] = run(mode, args.lines, args.burst)
+    print(json.dumps(record, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
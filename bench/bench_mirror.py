@@ -0,0 +1,128 @@
+"""
+Folder mirror at scale: a tree of --files small files mirrored to a fake
+phone (stand-in device directory), then re-synced with no change, then
+after touching/deleting 1% of the files.
+
+Also compares building the remote index with one `find | stat` round
+trip (what core.mirror does) against one sync STAT per file, with
+--rtt-ms of device round trip per request, and checks the index of a
+root that is a symlink (like /sdcard); exits 1 if it comes back empty.
+
+    python -m bench.bench_mirror [--files 20000] [--rtt-ms 1]
+"""
+import argparse
+import json
+import os
+import shlex
+import shutil
+import sys
+import tempfile
+import time
+
+from bench.fake_adb_server import FakeAdbServer
+from core.adb_client import client as adb_client
+from core.mirror import FolderMirror, local_index
+
+
+class MirrorPhone(FakeAdbServer):
+    """ Answers the mirror's `find ... stat` listing and `rm -f` from device_root. """
+    def __init__(self, root, rtt):
+        super().__init__()
+        self.device_root = root
+        self.rtt = rtt
+
+    def shell_output(self, serial, command):
+        time.sleep(self.rtt)
+        args = shlex.split(command)
+        if args[0] == "find":
+            base = args[1]
+            # Like find -P: a symlinked root is only followed when written with a trailing "/"
+            if not base.endswith("/") and os.path.islink(self._device_path(base)): return ""
+            sep = "" if base.endswith("/") else "/"
+            lines = []
+            for rel, (size, mtime) in local_index(self._device_path(base)).items():
+                lines.append(f"{size} {mtime} {base}{sep}{rel}\n")
+            return "".join(lines)
+        if args[:2] == ["rm", "-f"]:
+            for path in args[2:]:
+                try: os.remove(self._device_path(path))
+                except OSError: pass
+            return ""
+        return super().shell_output(serial, command)
+
+    def stat_file(self, serial, path):
+        time.sleep(self.rtt)
+        return super().stat_file(serial, path)
+
+
+def make_tree(root, count):
+    for i in range(count):
+        d = os.path.join(root, f"dir{i // 500:03d}")
+        if i % 500 == 0: os.makedirs(d)
+        with open(os.path.join(d, f"f{i:06d}.txt"), "w") as f: f.write(f"file {i}\n" * 8)
+
+
+def check_symlinked_root(work, count=10):
+    """ Files indexed under /sdcard when it links to /storage/emulated/0 (None if no symlinks here). """
+    root = os.path.join(work, "linked_phone")
+    storage = os.path.join(root, "storage", "emulated", "0")
+    make_tree(os.path.join(storage, "Mirror"), count)
+    try: os.symlink(storage, os.path.join(root, "sdcard"), target_is_directory=True)
+    except (OSError, NotImplementedError): return None
+    phone = MirrorPhone(root, 0).start()
+    adb_client.close()
+    adb_client.port = phone.port
+    try:
+        return len(FolderMirror(lambda *a: None).remote_index("/sdcard"))
+    finally:
+        phone.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=20000)
+    ap.add_argument("--rtt-ms", type=float, default=1.0)
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp(prefix="kb_mirror_")
+    try:
+        local = os.path.join(work, "pc")
+        make_tree(local, args.files)
+        phone = MirrorPhone(os.path.join(work, "phone"), args.rtt_ms / 1000.0).start()
+        adb_client.port = phone.port
+        mirror = FolderMirror(lambda *a: None, delete=True)
+        remote = "/sdcard/Mirror"
+
+        results = {"files": args.files, "rtt_ms": args.rtt_ms}
+        results["initial"] = mirror.run(local, remote)
+        results["no_change"] = mirror.run(local, remote)
+
+        # Touch 1%, delete 1%
+        names = sorted(local_index(local))
+        for rel in names[::100]:
+            with open(os.path.join(local, rel), "a") as f: f.write("changed\n")
+        for rel in names[50::100]:
+            os.remove(os.path.join(local, rel))
+        results["one_percent"] = mirror.run(local, remote)
+
+        # Remote index: one listing vs a STAT per file
+        t = time.perf_counter()
+        mirror.remote_index(remote)
+        results["index_find_s"] = round(time.perf_counter() - t, 3)
+        sample = sorted(local_index(local))[:2000]
+        t = time.perf_counter()
+        with adb_client.sync(None) as session:
+            for rel in sample: session.stat(f"{remote}/{rel}")
+        per_file = (time.perf_counter() - t) / len(sample)
+        results["index_stat_per_file_s"] = round(per_file * len(names), 3)
+        phone.stop()
+
+        results["symlinked_root_files"] = check_symlinked_root(work)
+        print(json.dumps(results, sort_keys=True))
+        return 1 if results["symlinked_root_files"] == 0 else 0
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
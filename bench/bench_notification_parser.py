@@ -0,0 +1,116 @@
+"""
+Notification parser throughput: the old split + per-line re.search parser
+vs core.notifications.NotificationParser, on a large dump.
+
+    python -m bench.bench_notification_parser [--records 200] [--dump captured.txt]
+
+Without --dump a synthetic dump is generated (records + a big archive
+section, like a busy phone). Both the full and the phone-side filtered
+dump are measured. Also checks that a notification still in the shade
+isn't toasted again after a long idle spell (core.notifications.RecentKeys).
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import timeit
+
+from bench.bench_notifications import FakeNotificationPhone
+from core import notifications
+from core.notifications import NotificationParser, NotificationSync, NOTIF_FILTER
+
+
+def legacy_parse(dump_output):
+    """ The old NotificationSync._parse_and_notify (minus the toasts). """
+    found = []
+    current_pkg = "Unknown"
+    for line in dump_output.split('\n'):
+        line = line.strip()
+        if "pkg=" in line:
+            match = re.search(r'pkg=([a-zA-Z0-9.]+)', line)
+            if match: current_pkg = match.group(1)
+        if "tickerText=" in line and "tickerText=null" not in line:
+            found.append((current_pkg, line.split("tickerText=")[1]))
+    return found
+
+
+def stream_parse(lines):
+    found = []
+    parser = NotificationParser(found.append)
+    for line in lines:
+        parser.feed(line)
+    parser.end()
+    return found
+
+
+def synthetic_dump(records):
+    phone = FakeNotificationPhone.__new__(FakeNotificationPhone) # No server needed
+    phone.notifications = [(f"com.app{i % 17}", f"Message number {i}") for i in range(records)]
+    return phone.full_dump()
+
+
+def check_dedupe():
+    """
+    Streams three dumps through NotificationSync with 7 idle hours (past
+    the old 6 h TTL) before the last. Returns the toasts per dump: only
+    the new notification may toast after the idle spell.
+    """
+    phone = FakeNotificationPhone.__new__(FakeNotificationPhone)
+    sync = NotificationSync("adb")
+    toasts = []
+    sync._show_toast = lambda title, message: toasts[-1].append(message)
+
+    def dump(messages):
+        toasts.append([])
+        phone.notifications = [("com.chat", m) for m in messages]
+        for line in phone.full_dump().splitlines(keepends=True): sync.parser.feed(line)
+        sync.parser.end()
+        sync.seen_keys.end_dump() # What the stream loop does at END_MARKER
+
+    real = time.monotonic
+    dump(["hello", "lunch?"])
+    dump(["hello", "lunch?"])
+    notifications.time.monotonic = lambda: real() + 7 * 3600
+    try: dump(["hello", "lunch?", "new one"])
+    finally: notifications.time.monotonic = real
+    return toasts
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--records", type=int, default=200)
+    ap.add_argument("--dump", help="captured `dumpsys notification --noredact` output")
+    args = ap.parse_args()
+
+    if args.dump:
+        with open(args.dump, encoding="utf-8", errors="ignore") as f: dump = f.read()
+    else:
+        dump = synthetic_dump(args.records)
+    pattern = re.compile(NOTIF_FILTER)
+    filtered = "".join(l + "\n" for l in dump.split("\n") if pattern.search(l))
+
+    for name, text in (("full", dump), ("filtered", filtered)):
+        lines = text.splitlines(keepends=True) # What a line-by-line reader yields
+        legacy = min(timeit.repeat(lambda: legacy_parse(text), number=5, repeat=3)) / 5
+        new = min(timeit.repeat(lambda: stream_parse(lines), number=5, repeat=3)) / 5
+        mb = len(text.encode("utf-8")) / 1e6
+        print(json.dumps({
+            "dump": name,
+            "bytes": len(text.encode("utf-8")),
+            "legacy_ms": round(legacy * 1000, 2),
+            "parser_ms": round(new * 1000, 2),
+            "legacy_mb_per_s": round(mb / legacy, 1),
+            "parser_mb_per_s": round(mb / new, 1),
+            "legacy_found": len(legacy_parse(text)),
+            "parser_found": len(stream_parse(lines)),
+        }, sort_keys=True))
+
+    toasts = check_dedupe()
+    ok = toasts == [["hello", "lunch?"], [], ["new one"]]
+    print(json.dumps({"dedupe_toasts": toasts, "dedupe_ok": ok}))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Notification mirroring: bytes and CPU per hour, and toast delay, for
+
+    legacy  - full `dumpsys notification` every 5 s (the old behaviour)
+    poll    - NotificationSync adaptive polling of the filtered dump
+    stream  - NotificationSync event-driven streaming
+
+against a fake adb server whose "phone" posts a notification every few
+seconds and has a realistically large dumpsys.
+
+    python -m bench.bench_notifications [--seconds 30] [--every 10]
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+
+from bench.fake_adb_server import FakeAdbServer
+from core.adb_client import client as adb_client
+from core.notifications import NotificationSync, END_MARKER, NOTIF_FILTER
+
+FILLER_LINES = 3000 # ~150 KB, in the range of a busy phone's dumpsys
+
+
+class FakeNotificationPhone(FakeAdbServer):
+    def __init__(self):
+        super().__init__()
+        self.notifications = []
+        self.posted_at = {}
+        self.changed = threading.Condition()
+
+    def post(self, pkg, text):
+        with self.changed:
+            self.notifications.append((pkg, text))
+            self.posted_at[text] = time.perf_counter()
+            self.changed.notify_all()
+
+    def full_dump(self):
+        lines = ["Current Notification Manager state:", "  Notification List:"]
+        for i, (pkg, text) in enumerate(self.notifications):
+            lines += [
+                f"    NotificationRecord(0x{i:08x}: pkg={pkg} user=UserHandle{{0}} id={i} tag=null importance=3 key=0|{pkg}|{i}|null|10{i:03d}: Notification(channel=msg pri=0 vis=PRIVATE))",
+                f"      uid=10{i:03d} userId=0",
+                f"      key=0|{pkg}|{i}|null|10{i:03d}",
+                "      notification=",
+                f"        tickerText={text}",
+                "        extras={",
+                f"          android.title=String ({pkg})",
+                f"          android.text=String ({text})",
+                "        }",
+            ]
+        lines += [f"    mArchive[{i}]: StatusBarNotification(pkg=android user=UserHandle{{0}} id={i} tag=null key=0|android|{i}|null|1000: Notification(channel=system pri=-2))"
+                  for i in range(FILLER_LINES)]
+        return "\n".join(lines) + "\n"
+
+    def filtered_dump(self):
+        pattern = re.compile(NOTIF_FILTER)
+        return "".join(l + "\n" for l in self.full_dump().split("\n") if pattern.search(l))
+
+    def _stream(self):
+        seen = -1
+        while not self.closed:
+            with self.changed:
+                if len(self.notifications) == seen:
+                    self.changed.wait(timeout=0.5)
+                    continue
+                seen = len(self.notifications)
+            yield self.filtered_dump() + END_MARKER + "\n"
+
+    def shell_output(self, serial, command):
+        if "logcat" in command: return self._stream()
+        if "grep" in command: return self.filtered_dump()
+        if "dumpsys notification" in command: return self.full_dump()
+        return super().shell_output(serial, command)
+
+
+def measure_legacy(seconds, phone):
+    received = 0
+    cpu = time.thread_time()
+    delays = []
+    seen = set()
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        dump = adb_client.shell("FAKE0001", "dumpsys notification --noredact")
+        received += len(dump)
+        for text, posted in list(phone.posted_at.items()):
+            if text not in seen and f"tickerText={text}" in dump:
+                seen.add(text)
+                delays.append(time.perf_counter() - posted)
+        time.sleep(5)
+    return received, time.thread_time() - cpu, delays
+
+
+def measure_sync(mode, seconds, phone):
+    sync = NotificationSync("adb", mode=mode)
+    delays = []
+    def toast(title, message):
+        posted = phone.posted_at.get(message)
+        if posted: delays.append(time.perf_counter() - posted)
+    sync._show_toast = toast
+    sync.start("FAKE0001")
+    time.sleep(seconds)
+    stats = sync.stats()
+    sync.stop()
+    return stats["bytes"], stats["cpu_seconds"], delays, stats["mode"]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seconds", type=float, default=30)
+    ap.add_argument("--every", type=float, default=10, help="seconds between new notifications")
+    args = ap.parse_args()
+
+    results = []
+    for mode in ("legacy", "poll", "stream"):
+        phone = FakeNotificationPhone().start()
+        adb_client.close()
+        adb_client.port = phone.port
+
+        stop = threading.Event()
+        def poster():
+            n = 0
+            # Off-phase with the 5 s legacy poll, so its delay isn't zero by luck
+            if stop.wait(args.every / 2 + 0.3): return
+            while True:
+                n += 1
+                phone.post("com.whatsapp", f"Message {n}")
+                if stop.wait(args.every): return
+        threading.Thread(target=poster, daemon=True).start()
+
+        if mode == "legacy":
+            received, cpu, delays = measure_legacy(args.seconds, phone)
+            active = "legacy"
+        else:
+            received, cpu, delays, active = measure_sync(mode, args.seconds, phone)
+        stop.set()
+        phone.stop()
+
+        per_hour = 3600.0 / args.seconds
+        results.append({
+            "mode": mode,
+            "active_mode": active,
+            "bytes_per_hour": round(received * per_hour),
+            "cpu_seconds_per_hour": round(cpu * per_hour, 3),
+            "toasts": len(delays),
+            "mean_toast_delay_s": round(sum(delays) / len(delays), 3) if delays else None,
+        })
+
+    for r in results:
+        print(json.dumps(r, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Clipboard-tab paste time vs text size, for
+
+    shell  - no helper: one `input text` per line + `input keyevent 66`
+    lines  - input helper, typed line by line (T/K lines)
+    paste  - input helper, one clipboard paste (V line, ENGINE_PASTE_THRESHOLD)
+
+against the fake adb and its fake input helper. Device costs are modeled:
+--cmd-cost per `input` command (JVM start on a real phone), --char-cost
+per character the helper injects, --paste-cost per clipboard paste.
+
+    python -m bench.bench_paste [--lines 1,10,50,200]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import bench._env # Before core: KEYBRIDGE_ADB -> the fake adb
+
+from core import input_helper
+from core.config import ENGINE_ASYNC
+from core.engine import ADBEngine
+from core.async_engine import AsyncADBEngine
+from core.latency import KeyTrace
+
+LINE = "    result = compute(value, other_value)  # comment"  # ~50 chars of code
+
+
+def paste_time(mode, text, timeout=600):
+    engine = (AsyncADBEngine if ENGINE_ASYNC else ADBEngine)(lambda *a: None, lambda *a: None)
+    engine.use_helper = mode != "shell"
+    engine.paste_threshold = 0 if mode == "paste" else float("inf")
+    if not engine.connect("FAKE0001"): raise SystemExit("fake adb did not start")
+    if engine.use_helper:
+        deadline = time.perf_counter() + 10
+        while not engine.helper.alive() and time.perf_counter() < deadline: time.sleep(0.01)
+
+    trace = KeyTrace(time.perf_counter())
+    trace.dequeued = trace.pressed
+    engine.send_text(text, [trace])
+    total = engine.tracer.histograms["total"]
+    deadline = time.perf_counter() + timeout
+    while total.total == 0 and time.perf_counter() < deadline: time.sleep(0.002)
+    elapsed = time.perf_counter() - trace.pressed
+    engine.stop()
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", default="1,10,50,200")
+    ap.add_argument("--cmd-cost", type=float, default=0.1)
+    ap.add_argument("--char-cost", type=float, default=0.0005)
+    ap.add_argument("--paste-cost", type=float, default=0.05)
+    args = ap.parse_args()
+
+    # The helper only starts if its jar exists; the fake adb never reads it
+    jar = tempfile.NamedTemporaryFile(suffix=".jar", delete=False)
+    jar.close()
+    input_helper.HELPER_LOCAL = jar.name
+    os.environ.update({
+        "FAKE_ADB_CMD_COST": str(args.cmd_cost),
+        "FAKE_ADB_HELPER_CHAR_COST": str(args.char_cost),
+        "FAKE_ADB_HELPER_PASTE_COST": str(args.paste_cost),
+    })
+
+    try:
+        for n in [int(x) for x in args.lines.split(",")]:
+            text = "\n".join([LINE] * n)
+            record = {"lines": n, "chars": len(text)}
+            for mode in ("shell", "lines", "paste"):
+                record[f"{mode}_s"] = round(paste_time(mode, text), 3)
+            print(json.dumps(record, sort_keys=True))
+    finally:
+        os.unlink(jar.name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Cold start budget: runs main.py's startup pipeline (minus the instance
+lock, splash and tray) in fresh interpreters against a fake adb server
+and reports the per-phase breakdown (core.startup):
+
+    tk       - Tk root
+    adb      - kicking off adb start-server + the device scan (background)
+    imports  - ui.app_window and everything behind it
+    ui       - building KeyBridgeWindow (needs a display; --no-ui skips it)
+
+plus when the first device list arrived ("adb ready", off the critical
+path). Fails (exit 1) if the median time to a usable window is over
+--budget, or if a module meant to load on first use (plyer, qrcode,
+pystray, ui.support_dialog) was imported during startup.
+
+    python -m bench.bench_startup [--runs 5] [--budget 1.0] [--no-ui]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from bench._env import HERE # Also points KEYBRIDGE_ADB at the fake adb
+
+ROOT = os.path.dirname(HERE)
+
+# Loaded on first use (toast, Support dialog, tray), never at startup
+LAZY = ("plyer", "qrcode", "pystray", "ui.support_dialog")
+
+
+def child(port, with_ui):
+    from core.startup import startup
+    import tkinter as tk
+    root = None
+    if with_ui:
+        root = tk.Tk()
+        root.withdraw()
+    startup.mark("tk")
+
+    from core.adb_client import client as adb_client
+    adb_client.port = port
+    from core.device_tracker import tracker
+    tracker.start()
+    startup.mark("adb")
+
+    from ui.app_window import KeyBridgeWindow
+    startup.mark("imports")
+
+    if root is not None:
+        KeyBridgeWindow(root)
+        root.update()
+        startup.mark("ui")
+
+    if tracker.ready.wait(10): startup.note("adb ready")
+    report = startup.report()
+    report["eager"] = [m for m in LAZY if m in sys.modules]
+    print(json.dumps(report))
+    os._exit(0) # Skip tearing down listeners / Tk
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget", type=float, default=1.0, help="seconds to a usable window (median)")
+    ap.add_argument("--no-ui", action="store_true", help="skip building the window (no display)")
+    ap.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    with_ui = not args.no_ui
+    if args.child: return child(args.child, with_ui)
+
+    from bench.fake_adb_server import FakeAdbServer
+    server = FakeAdbServer(serials=["FAKE0001"]).start()
+    cmd = [sys.executable, "-m", "bench.bench_startup", "--child", str(server.port)] + (["--no-ui"] if args.no_ui else [])
+    runs = []
+    for _ in range(args.runs):
+        out = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True, timeout=60)
+        if out.returncode != 0: raise SystemExit(out.stderr.strip() or "startup run failed")
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    med = lambda values: round(statistics.median(values), 1)
+    total_ms = med([r["total_s"] * 1000 for r in runs])
+    eager = sorted({m for r in runs for m in r["eager"]})
+    record = {
+        "runs": args.runs,
+        "ui": with_ui,
+        "phases_ms": {p: med([r["phases_ms"][p] for r in runs]) for p in runs[0]["phases_ms"]},
+        "adb_ready_ms": med([r["events_ms"].get("adb ready", float("nan")) for r in runs]),
+        "total_ms": total_ms,
+        "budget_ms": args.budget * 1000,
+        "eager_imports": eager,
+    }
+    record["ok"] = total_ms <= args.budget * 1000 and not eager
+    print(json.dumps(record, sort_keys=True))
+    return 0 if record["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
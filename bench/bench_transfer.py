@@ -0,0 +1,92 @@
+"""
+File Beam throughput against a fake adb server that stores pushed files
+in a stand-in device directory, with a simple link model (per-stream and
+total bandwidth, fixed per-file cost on the device).
+
+    legacy    - one push per file, one after another (like the old
+                `adb push` per file, minus the process spawn)
+    beam      - core.transfer.FileBeam (parallel sync sessions)
+    unchanged - the same beam again: the manifest skips everything
+
+    python -m bench.bench_transfer [--parallel 3] [--stream-mbps 20] [--link-mbps 40]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from bench.fake_adb_server import FakeAdbServer
+from core.adb_client import client as adb_client
+from core.transfer import FileBeam, Manifest
+
+WORKLOADS = {
+    "large": (4, 16 * 1024 * 1024),   # 4 x 16 MB
+    "small": (400, 8 * 1024),         # 400 x 8 KB
+}
+
+
+def make_files(root, count, size):
+    os.makedirs(root)
+    paths = []
+    for i in range(count):
+        path = os.path.join(root, f"file{i:04d}.bin")
+        with open(path, "wb") as f: f.write(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def legacy(paths, remote_dir):
+    for path in paths:
+        with adb_client.sync(None) as session, open(path, "rb") as f:
+            session.push(f, f"{remote_dir}/{os.path.basename(path)}", os.path.getmtime(path))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--parallel", type=int, default=3)
+    ap.add_argument("--stream-mbps", type=float, default=20, help="MB/s per sync stream")
+    ap.add_argument("--link-mbps", type=float, default=40, help="MB/s for the whole link")
+    ap.add_argument("--file-ms", type=float, default=5, help="device-side cost per file")
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp(prefix="kb_beam_")
+    try:
+        for name, (count, size) in WORKLOADS.items():
+            paths = make_files(os.path.join(work, name), count, size)
+            record = {"workload": name, "files": count, "mb": round(count * size / 1e6, 1)}
+            for mode in ("legacy", "beam", "unchanged"):
+                if mode != "unchanged":
+                    device = os.path.join(work, f"device_{name}_{mode}")
+                    manifest = Manifest(os.path.join(work, f"manifest_{name}.json"))
+                server = FakeAdbServer()
+                server.device_root = device
+                server.stream_bandwidth = args.stream_mbps * 1e6
+                server.link_bandwidth = args.link_mbps * 1e6
+                server.file_latency = args.file_ms / 1000.0
+                server.start()
+                adb_client.close()
+                adb_client.port = server.port
+
+                start = time.perf_counter()
+                if mode == "legacy":
+                    legacy(paths, "/sdcard/Download")
+                else:
+                    beam = FileBeam(lambda *a: None, parallel=args.parallel, manifest=manifest).push(paths)
+                    beam.wait()
+                    record[f"{mode}_skipped"] = beam.skipped
+                elapsed = time.perf_counter() - start
+                server.stop()
+                record[f"{mode}_s"] = round(elapsed, 3)
+                record[f"{mode}_mbps"] = round(count * size / 1e6 / elapsed, 1)
+            record["speedup"] = round(record["legacy_s"] / record["beam_s"], 2)
+            print(json.dumps(record, sort_keys=True))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Mixed-language typing (accents, CJK, emoji between ASCII):
+
+1. Checks split_ascii_runs keeps every line intact and in order, and that
+   the ADBKeyboard broadcast decodes back to the original run.
+2. Times the split on the send_text hot path.
+3. Types a mixed corpus end to end through the fake adb, with the input
+   helper (ASCII as T lines, the rest as U lines: key map, or a paste that
+   restores the clipboard) and without it (`input text` + ADBKeyboard
+   broadcasts), and counts device commands. Fails if any run went out as a
+   plain clipboard paste (V), which would leave it on the user's clipboard.
+
+    python -m bench.bench_unicode
+"""
+import base64
+import json
+import os
+import sys
+import tempfile
+import timeit
+
+from bench.bench_paste import paste_time
+from core import input_helper
+from core.text_escape import split_ascii_runs, unicode_broadcast
+
+CORPUS = [
+    "Meet at the café at 5?",
+    "naïve façade, jalapeño & crème brûlée",
+    "東京 tomorrow, 会议 at 10:00",
+    "thanks 🙏 see you 👋",
+    "Привет, how are you?",
+    "plain ascii line with nothing special",
+    "ok 👍👍👍",
+    "Größe: 42 cm – Preis: 19,99 €",
+]
+
+
+def verify():
+    bad = []
+    for line in CORPUS:
+        runs = split_ascii_runs(line)
+        if "".join(r for r, _ in runs) != line: bad.append(line)
+        for run, is_ascii in runs:
+            if is_ascii != run.isascii(): bad.append(run)
+            if not is_ascii:
+                b64 = unicode_broadcast(run).rsplit(" ", 1)[1]
+                if base64.b64decode(b64).decode("utf-8") != run: bad.append(run)
+    return bad
+
+
+def main():
+    results = {"mismatches": verify()}
+
+    split_ascii_runs.cache_clear()
+    n = 20000
+    results["split_us_uncached"] = round(timeit.timeit(
+        lambda: [split_ascii_runs.__wrapped__(l) for l in CORPUS], number=n // len(CORPUS)) / n * 1e6, 3)
+    results["split_us_cached"] = round(timeit.timeit(
+        lambda: [split_ascii_runs(l) for l in CORPUS], number=n // len(CORPUS)) / n * 1e6, 3)
+    results["runs"] = sum(len(split_ascii_runs(l)) for l in CORPUS)
+    results["non_ascii_runs"] = sum(1 for l in CORPUS for _, a in split_ascii_runs(l) if not a)
+
+    jar = tempfile.NamedTemporaryFile(suffix=".jar", delete=False)
+    jar.close()
+    input_helper.HELPER_LOCAL = jar.name
+    stats_path = os.path.join(tempfile.gettempdir(), "kb_unicode_helper.json")
+    os.environ.update({
+        "FAKE_ADB_CMD_COST": "0.1",
+        "FAKE_ADB_HELPER_CHAR_COST": "0.0005",
+        "FAKE_ADB_HELPER_PASTE_COST": "0.05",
+        "FAKE_ADB_HELPER_STATS": stats_path,
+    })
+    text = "\n".join(CORPUS)
+    try:
+        results["helper_s"] = round(paste_time("lines", text), 3)
+        with open(stats_path) as f: results["helper_device"] = json.load(f)
+        results["shell_s"] = round(paste_time("shell", text), 3)
+    finally:
+        os.unlink(jar.name)
+    print(json.dumps(results, sort_keys=True))
+    return 1 if results["mismatches"] or results["helper_device"]["pastes"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Disconnect detection: how long after the device shell dies the app
+hears about it, and what it learns, for
+
+    poll     - check_health() every --poll seconds (the old Tk heartbeat)
+    watcher  - core.watcher (blocks on the process exit and its stderr)
+
+Each trial connects to the fake adb with auto-reconnect off, sends one
+command after which the fake link drops ("error: device offline") and
+times from that send to the detection, so the fake's own exit is
+included. Also reports idle wakeups per hour spent on health checks.
+
+    python -m bench.bench_watcher [--trials 10] [--poll 2]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+import bench._env # Before core: KEYBRIDGE_ADB -> the fake adb
+
+from core.engine import ADBEngine
+from core.watcher import watcher
+
+
+def trial(mode, poll):
+    os.environ.update({"FAKE_ADB_DISCONNECT_AFTER": "1", "FAKE_ADB_CMD_COST": "0"})
+    engine = ADBEngine(lambda *a: None, lambda *a: None)
+    engine.use_helper = False
+    engine.auto_reconnect = False
+    if not engine.connect("FAKE0001"): raise SystemExit("fake adb did not start")
+
+    detected = threading.Event()
+    reasons = []
+    def on_link(serial, reason, final):
+        if final and serial == "FAKE0001":
+            reasons.append(reason)
+            detected.set()
+    def heartbeat():
+        while not detected.is_set():
+            time.sleep(poll)
+            if not engine.check_health():
+                reasons.append("")
+                detected.set()
+
+    if mode == "watcher": watcher.subscribe(on_link)
+    else: threading.Thread(target=heartbeat, daemon=True).start()
+    # Let the poll phase land anywhere, as it would in the app
+    time.sleep((time.perf_counter() * 7.31) % poll if mode == "poll" else 0.05)
+    sent = time.perf_counter()
+    engine.send_cmd("input keyevent 0")
+    detected.wait(30)
+    seconds = time.perf_counter() - sent
+    watcher.unsubscribe(on_link)
+    engine.stop()
+    return seconds, reasons[0] if reasons else None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--trials", type=int, default=10)
+    ap.add_argument("--poll", type=float, default=2.0, help="old heartbeat interval (s)")
+    args = ap.parse_args()
+
+    for mode in ("poll", "watcher"):
+        runs = [trial(mode, args.poll) for _ in range(args.trials)]
+        ms = sorted(s * 1000 for s, _ in runs)
+        print(json.dumps({
+            "mode": mode,
+            "trials": args.trials,
+            "detect_ms_p50": round(statistics.median(ms), 1),
+            "detect_ms_max": round(ms[-1], 1),
+            "reason": runs[-1][1],
+            "idle_wakeups_per_hour": round(3600 / args.poll) if mode == "poll" else 0,
+        }, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
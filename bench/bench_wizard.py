@@ -0,0 +1,125 @@
+"""
+USB -> Wi-Fi wizard: time from click to a working engine, per step, for
+
+    legacy  - the old fixed waits (5 s after tcpip, then 1 s per check)
+    probe   - ADBEngine._wireless_sequence (port probing + wait-for-device)
+    retry   - probe, but the phone refuses the first `adb connect` (the
+              port answered from the old adbd, which then restarted)
+
+against a fake adb server whose phone takes --adbd-delay seconds to
+reopen adbd on TCP after `tcpip`, and --online-delay more to come online.
+Exits 1 if probe or retry didn't end with a running engine.
+
+    python -m bench.bench_wizard [--adbd-delay 0.3,1,3] [--online-delay 0.2]
+"""
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+
+import bench._env # Before core: KEYBRIDGE_ADB -> the fake adb
+
+from bench.fake_adb_server import FakeAdbServer
+from core.adb_client import client as adb_client
+from core.config import ENGINE_ASYNC
+from core.engine import ADBEngine
+from core.async_engine import AsyncADBEngine
+
+# Loopback, but not 127.0.0.1 (the wizard skips that as "not Wi-Fi")
+PHONE_IP = "127.0.0.2"
+
+
+class WizardPhone(FakeAdbServer):
+    """ A USB phone that can be switched to TCP mode (adbd on PHONE_IP:<port>). """
+    def __init__(self, adbd_delay, online_delay, connect_failures=0):
+        super().__init__()
+        self.adbd_delay = adbd_delay
+        self.online_delay = online_delay
+        self.connect_failures = connect_failures # First N connects are refused
+        self.listener = None
+
+    def shell_output(self, serial, command):
+        if command == "ip route":
+            return f"192.168.1.0/24 dev wlan0 proto kernel scope link src {PHONE_IP}\n"
+        return super().shell_output(serial, command)
+
+    def tcpip_output(self, serial, port):
+        def _adbd():
+            time.sleep(self.adbd_delay)
+            self.listener = socket.create_server((PHONE_IP, port))
+            while True:
+                try: self.listener.accept()[0].close()
+                except OSError: return
+        threading.Thread(target=_adbd, daemon=True).start()
+        return super().tcpip_output(serial, port)
+
+    def connect_output(self, address):
+        host, port = address.rsplit(":", 1)
+        if self.connect_failures:
+            self.connect_failures -= 1
+            return f"failed to connect to {address}: Connection reset by peer"
+        try: socket.create_connection((host, int(port)), timeout=1).close()
+        except OSError: return f"failed to connect to {address}: Connection refused"
+        threading.Timer(self.online_delay, self.add_serial, args=(address,)).start()
+        return f"connected to {address}"
+
+    def stop(self):
+        if self.listener: self.listener.close()
+        super().stop()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((PHONE_IP, 0))
+        return s.getsockname()[1]
+
+
+def legacy_wizard(engine, port):
+    """ The pre-probing sequence, step for step (fixed sleeps). """
+    start = time.perf_counter()
+    ip = engine.get_device_ip()
+    engine._run_adb_silent(["tcpip", str(port)])
+    time.sleep(5)
+    target = f"{ip}:{port}"
+    engine._run_adb_capture(["connect", target])
+    for _ in range(5):
+        time.sleep(1)
+        if "ok" in engine._run_adb_capture(["-s", target, "shell", "echo", "ok"]): break
+    engine.connect(target)
+    return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--adbd-delay", default="0.3,1,3", help="comma-separated seconds")
+    ap.add_argument("--online-delay", type=float, default=0.2)
+    args = ap.parse_args()
+
+    failed = False
+    for delay in [float(d) for d in args.adbd_delay.split(",")]:
+        record = {"adbd_delay_s": delay, "online_delay_s": args.online_delay}
+        for mode in ("legacy", "probe", "retry"):
+            phone = WizardPhone(delay, args.online_delay, connect_failures=1 if mode == "retry" else 0).start()
+            adb_client.close()
+            adb_client.port = phone.port
+            engine = (AsyncADBEngine if ENGINE_ASYNC else ADBEngine)(lambda *a: None, lambda *a: None)
+            engine.use_helper = False
+            port = free_port()
+            if mode == "legacy":
+                record["legacy_total_s"] = round(legacy_wizard(engine, port), 3)
+            else:
+                steps = engine._wireless_sequence(port)
+                record[f"{mode}_steps_s"] = {s: round(t, 3) for s, t in steps}
+                record[f"{mode}_total_s"] = round(sum(t for _, t in steps), 3)
+                record[f"{mode}_connected"] = engine.running
+                failed = failed or not engine.running
+            engine.stop()
+            phone.stop()
+        print(json.dumps(record, sort_keys=True))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
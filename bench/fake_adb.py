@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the real `adb` binary, so the engine can be exercised
+without a phone. Point KEYBRIDGE_ADB at this file (or fake_adb.cmd on Windows).
+
+Supported:
+    adb devices / start-server / connect <ip:port>
+    adb [-s serial] shell      -> reads commands from stdin until EOF or `exit`
+                                  (`echo X` lines are echoed back on stdout)
+    adb [-s serial] shell input -> `input` usage text
+    adb [-s serial] shell <cmd> -> echo only
+    adb [-s serial] push ...   -> pretends it worked
+    adb [-s serial] shell CLASSPATH=... app_process ...
+                               -> fake input helper (T/K/V/P/Q, see core/input_helper.py)
+
+Knobs (environment):
+    FAKE_ADB_CMD_COST          seconds of simulated device work per command
+                               (`input` spawns a JVM on a real phone; echo is free)
+    FAKE_ADB_JITTER            extra random 0..N seconds per command (link jitter); echoes
+                               come back 0..N seconds late too, in order, without holding
+                               up the commands behind them
+    FAKE_ADB_CONNECT_DELAY     seconds before the shell starts reading
+    FAKE_ADB_DISCONNECT_AFTER  drop the link after N commands ("device offline"): every
+                               shell of that serial that's open at that moment dies with it
+    FAKE_ADB_LINK_DIR          where shells leave the link-drop marker (default: temp dir)
+    FAKE_ADB_SEED              random seed for jitter (default 0)
+    FAKE_ADB_SLOW_SERIALS      comma-separated serials whose cost is multiplied
+    FAKE_ADB_SLOW_FACTOR       ... by this (default 10)
+    FAKE_ADB_OLD_INPUT         1 = `input keyevent` takes one keycode (pre-4.4 usage text)
+    FAKE_ADB_STATS             path; on exit the shell adds its counts to a JSON summary there
+                               ("{serial}" in the path is replaced, for multi-device runs)
+    FAKE_ADB_HELPER_CHAR_COST  helper: seconds per typed character / key event
+    FAKE_ADB_HELPER_PASTE_COST helper: seconds per clipboard paste (V line)
+    FAKE_ADB_HELPER_STATS      path for the helper's JSON summary
+"""
+import base64
+import json
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+def _env_float(name, default=0.0):
+    return float(os.environ.get(name, default) or default)
+
+
+def _link_marker(serial):
+    folder = os.environ.get("FAKE_ADB_LINK_DIR") or tempfile.gettempdir()
+    return os.path.join(folder, "fake_adb_link_" + serial.replace(":", "_"))
+
+
+def _watch_link(marker, started, on_drop):
+    """ Calls on_drop() once another shell of this serial drops the link after we started. """
+    while True:
+        time.sleep(0.005)
+        try:
+            with open(marker) as f: dropped = float(f.read() or 0)
+        except (OSError, ValueError):
+            continue
+        if dropped >= started:
+            on_drop()
+            return
+
+
+def _shell(serial):
+    started = time.time()
+    cost = _env_float("FAKE_ADB_CMD_COST")
+    if serial in os.environ.get("FAKE_ADB_SLOW_SERIALS", "").split(","):
+        cost *= _env_float("FAKE_ADB_SLOW_FACTOR", 10)
+    jitter = _env_float("FAKE_ADB_JITTER")
+    disconnect_after = int(_env_float("FAKE_ADB_DISCONNECT_AFTER"))
+    rnd = random.Random(int(_env_float("FAKE_ADB_SEED")))
+    link_rnd = random.Random(int(_env_float("FAKE_ADB_SEED")) + 1) # Echo delays
+    stats = {"commands": 0, "echoes": 0, "reads": 0, "bytes": 0,
+             "typed_chars": 0, "keyevents": 0, "keyevent_commands": 0, "device_seconds": 0.0}
+
+    finish_lock = threading.Lock()
+    finished = []
+    def finish():
+        with finish_lock:
+            if finished: return
+            finished.append(True)
+            _save_shell_stats(serial, stats)
+
+    marker = _link_marker(serial)
+    if disconnect_after:
+        # A real link loss takes every shell down (the standby shell too)
+        def _dropped():
+            os.write(2, b"error: device offline\n")
+            finish()
+            os._exit(255)
+        threading.Thread(target=_watch_link, args=(marker, started, _dropped), daemon=True).start()
+
+    # Echoes cross the link: late by its jitter, in order, while commands go on
+    echoes = queue.Queue()
+    def _echo_writer():
+        while True:
+            item = echoes.get()
+            if item is None: return
+            due, data = item
+            wait = due - time.perf_counter()
+            if wait > 0: time.sleep(wait)
+            os.write(1, data)
+    echo_thread = threading.Thread(target=_echo_writer, daemon=True)
+    echo_thread.start()
+    last_due = 0.0
+
+    time.sleep(_env_float("FAKE_ADB_CONNECT_DELAY"))
+
+    # Read raw chunks so we can count how many writes the PC side made
+    # (each write on the pipe normally arrives as one read here).
+    fd = sys.stdin.fileno()
+    pending = b""
+    exit_code = 0
+    done = False
+    while not done:
+        chunk = os.read(fd, 65536)
+        if not chunk: break
+        stats["reads"] += 1
+        stats["bytes"] += len(chunk)
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            line = line.strip()
+            if not line: continue
+            if line == b"exit":
+                done = True
+                break
+            if line.startswith(b"echo "):
+                stats["echoes"] += 1
+                last_due = max(last_due, time.perf_counter() + (link_rnd.random() * jitter if jitter else 0.0))
+                echoes.put((last_due, line[5:] + b"\n"))
+                continue
+
+            stats["commands"] += 1
+            if line.startswith(b"input text "):
+                stats["typed_chars"] += len(line) - 11
+            elif line.startswith(b"input keyevent "):
+                stats["keyevents"] += len(line.split()) - 2
+                stats["keyevent_commands"] += 1
+            delay = cost + (rnd.random() * jitter if jitter else 0.0)
+            if delay:
+                time.sleep(delay)
+                stats["device_seconds"] += delay
+
+            if disconnect_after and stats["commands"] >= disconnect_after:
+                with open(marker, "w") as f: f.write(repr(time.time()))
+                os.write(2, b"error: device offline\n")
+                exit_code = 255
+                done = True
+                break
+
+    echoes.put(None)
+    echo_thread.join()
+    finish()
+    return exit_code
+
+
+def _save_shell_stats(serial, stats):
+    path = os.environ.get("FAKE_ADB_STATS")
+    if not path: return
+    # Adds up across shells (a reconnect or standby shell is another process);
+    # shells dropped together finish together, so take turns
+    path = path.replace("{serial}", serial.replace(":", "_"))
+    lock = path + ".lock"
+    for _ in range(2000):
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL))
+            break
+        except FileExistsError:
+            time.sleep(0.001)
+    try:
+        total = dict(stats, shells=1)
+        try:
+            with open(path) as f:
+                for key, value in json.load(f).items(): total[key] = total.get(key, 0) + value
+        except (OSError, ValueError): pass
+        with open(path, "w") as f:
+            json.dump(total, f)
+    finally:
+        try: os.unlink(lock)
+        except OSError: pass
+
+
+def _helper():
+    char_cost = _env_float("FAKE_ADB_HELPER_CHAR_COST")
+    paste_cost = _env_float("FAKE_ADB_HELPER_PASTE_COST")
+    stats = {"lines": 0, "typed_chars": 0, "keyevents": 0, "pastes": 0, "unicode_runs": 0,
+             "pasted_chars": 0, "device_seconds": 0.0}
+    out = sys.stdout
+    out.write("READY\n")
+    out.flush()
+    for raw in sys.stdin.buffer:
+        line = raw.decode("utf-8").rstrip("\n")
+        if not line: continue
+        op, arg = line[0], line[1:]
+        if op == "Q": break
+        if op == "P":
+            # Stats are current at every ping (the PC may kill us right after)
+            _write_helper_stats(stats)
+            out.write(line + "\n")
+            out.flush()
+            continue
+        stats["lines"] += 1
+        delay = 0.0
+        if op == "T":
+            stats["typed_chars"] += len(arg)
+            delay = char_cost * len(arg)
+        elif op == "K":
+            stats["keyevents"] += len(arg.split())
+            delay = char_cost * len(arg.split())
+        elif op in ("V", "U"):
+            # U may go through the key map on a real phone; priced as a paste here
+            stats["pastes" if op == "V" else "unicode_runs"] += 1
+            stats["pasted_chars"] += len(base64.b64decode(arg).decode("utf-8"))
+            delay = paste_cost
+        if delay:
+            time.sleep(delay)
+            stats["device_seconds"] += delay
+
+    _write_helper_stats(stats)
+    return 0
+
+
+def _write_helper_stats(stats):
+    path = os.environ.get("FAKE_ADB_HELPER_STATS")
+    if path:
+        # Rewritten at every ping: readers must never see a half-written file
+        with open(path + ".tmp", "w") as f: json.dump(stats, f)
+        os.replace(path + ".tmp", path)
+
+
+def main(argv):
+    # Drop global options (remembering the serial)
+    serial = "FAKE0001"
+    while argv and argv[0] in ("-s", "-t", "-H", "-P"):
+        if argv[0] == "-s": serial = argv[1]
+        argv = argv[2:]
+    if not argv: return 1
+
+    cmd = argv[0]
+    if cmd == "devices":
+        print("List of devices attached")
+        print("FAKE0001\tdevice")
+    elif cmd == "start-server":
+        pass
+    elif cmd == "connect":
+        print(f"connected to {argv[1]}")
+    elif cmd == "shell" and len(argv) == 1:
+        return _shell(serial)
+    elif cmd == "shell" and "app_process" in argv:
+        return _helper()
+    elif cmd == "push":
+        print("1 file pushed.")
+    elif cmd == "shell" and argv[1].split()[0] == "input":
+        if os.environ.get("FAKE_ADB_OLD_INPUT") == "1":
+            print("usage: input [text|keyevent] ...\n       input keyevent <key code number or name>")
+        else:
+            print("Usage: input [<source>] <command> [<arg>...]\n"
+                  "      keyevent [--longpress|--doubletap] <key code number or name> ...")
+    elif cmd == "shell":
+        print(" ".join(argv[1:]).replace("echo ", "", 1))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
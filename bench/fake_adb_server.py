@@ -0,0 +1,254 @@
+"""
+Stand-in adb server speaking the smart-socket wire format, for exercising
+core.adb_client without a phone or a real adb server.
+
+    python -m bench.fake_adb_server [--port 5037]
+
+Or embed it: server = FakeAdbServer(serials=["FAKE0001"]); server.start()
+"""
+import argparse
+import os
+import socketserver
+import struct
+import threading
+import time
+
+
+def _prefixed(text):
+    data = text.encode("utf-8")
+    return b"%04x" % len(data) + data
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def _read_request(self):
+        header = self._recv_exact(4)
+        if not header: return None
+        return self._recv_exact(int(header, 16)).decode("utf-8")
+
+    def _recv_exact(self, n):
+        data = b""
+        while len(data) < n:
+            chunk = self.request.recv(n - len(data))
+            if not chunk: return b""
+            data += chunk
+        return data
+
+    def _fail(self, msg):
+        self.request.sendall(b"FAIL" + _prefixed(msg))
+
+    def handle(self):
+        server = self.server.owner
+        serial = None
+        while True:
+            service = self._read_request()
+            if service is None: return
+            server.requests.append(service)
+
+            if service == "host:version":
+                self.request.sendall(b"OKAY" + _prefixed("%04x" % 41))
+                return
+            if service == "host:devices":
+                self.request.sendall(b"OKAY" + _prefixed(server.listing()))
+                return
+            if service == "host:track-devices":
+                self.request.sendall(b"OKAY")
+                try:
+                    for listing in server.track():
+                        self.request.sendall(_prefixed(listing))
+                except OSError:
+                    pass # Client hung up
+                return
+            if service.startswith("host:connect:"):
+                self.request.sendall(b"OKAY" + _prefixed(server.connect_output(service[13:])))
+                return
+            if service.startswith("host-serial:") and service.endswith(":wait-for-any-device"):
+                self.request.sendall(b"OKAY")
+                if server.wait_for(service[12:-len(":wait-for-any-device")]):
+                    self.request.sendall(b"OKAY")
+                return
+            if service == "host:transport-any":
+                if len(server.serials) != 1: return self._fail("more than one device/emulator")
+                serial = server.serials[0]
+                self.request.sendall(b"OKAY")
+                continue
+            if service.startswith("host:transport:"):
+                serial = service[15:]
+                if serial not in server.serials: return self._fail(f"device '{serial}' not found")
+                self.request.sendall(b"OKAY")
+                continue
+            if serial and service == "sync:":
+                self.request.sendall(b"OKAY")
+                return self._sync(server, serial)
+            if serial and service.startswith("tcpip:"):
+                self.request.sendall(b"OKAY" + server.tcpip_output(serial, int(service[6:])).encode("utf-8"))
+                return
+            if serial and (service.startswith("shell:") or service.startswith("exec:")):
+                self.request.sendall(b"OKAY")
+                command = service.split(":", 1)[1]
+                output = server.shell_output(serial, command)
+                # A generator streams chunks (long-running commands like logcat)
+                chunks = [output] if isinstance(output, str) else output
+                try:
+                    for chunk in chunks:
+                        self.request.sendall(chunk.encode("utf-8"))
+                except OSError:
+                    pass # Client hung up
+                return
+            return self._fail(f"unknown service {service}")
+
+
+    def _sync_header(self):
+        header = self._recv_exact(8)
+        if not header: return None, 0
+        return header[:4], struct.unpack("<I", header[4:])[0]
+
+    def _sync(self, server, serial):
+        """ adb sync protocol: STAT / SEND (DATA... DONE) / QUIT. """
+        due = 0.0 # When this stream may send its next byte (stream bandwidth)
+        while True:
+            cmd, length = self._sync_header()
+            if cmd in (None, b"QUIT"): return
+            if cmd == b"STAT":
+                st = server.stat_file(serial, self._recv_exact(length).decode("utf-8"))
+                self.request.sendall(b"STAT" + struct.pack("<III", *st))
+                continue
+            if cmd != b"SEND": return self._fail(f"unknown sync command {cmd!r}")
+
+            path = self._recv_exact(length).decode("utf-8").rpartition(",")[0]
+            out = server.open_file(serial, path)
+            try:
+                while True:
+                    cmd, length = self._sync_header()
+                    if cmd is None: return # Client hung up mid-file
+                    if cmd == b"DONE": break
+                    data = self._recv_exact(length)
+                    due = server.pace(len(data), due)
+                    if out: out.write(data)
+            finally:
+                if out: out.close()
+            if out: os.utime(out.name, (length, length)) # DONE carries the mtime
+            time.sleep(server.file_latency)
+            self.request.sendall(b"OKAY" + struct.pack("<I", 0))
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeAdbServer:
+    def __init__(self, serials=("FAKE0001",), host="127.0.0.1", port=0):
+        self.serials = list(serials)
+        self.states = {} # serial -> state, default "device"
+        self.requests = []
+        self.online = threading.Condition()
+        self.closed = False
+        # Stand-in device storage for sync (push/stat); None = discard data
+        self.device_root = None
+        # Link model for sync: bytes/s per stream and for the whole link
+        # (0 = unlimited), plus a fixed per-file cost on the device side
+        self.stream_bandwidth = 0
+        self.link_bandwidth = 0
+        self.file_latency = 0.0
+        self._link_lock = threading.Lock()
+        self._link_free = 0.0
+        self.server = _TCPServer((host, port), _Handler)
+        self.server.owner = self
+        self.port = self.server.server_address[1]
+
+    def shell_output(self, serial, command):
+        """
+        Override for scripted output: return a str, or a generator of str
+        chunks for streaming commands. Default: echo, else nothing.
+        """
+        if command.startswith("echo "): return command[5:] + "\n"
+        return ""
+
+    def connect_output(self, address):
+        """ host:connect - the default fake always gets through. """
+        self.add_serial(address)
+        return f"connected to {address}"
+
+    def tcpip_output(self, serial, port):
+        return f"restarting in TCP mode port: {port}\n"
+
+    def listing(self):
+        return "".join(f"{s}\t{self.states.get(s, 'device')}\n" for s in self.serials)
+
+    def add_serial(self, serial, state="device"):
+        with self.online:
+            if serial not in self.serials: self.serials.append(serial)
+            self.states[serial] = state
+            self.online.notify_all()
+
+    def remove_serial(self, serial):
+        with self.online:
+            if serial in self.serials: self.serials.remove(serial)
+            self.states.pop(serial, None)
+            self.online.notify_all()
+
+    def track(self):
+        """ Yields the device listing now and after every change (track-devices). """
+        last = None
+        while not self.closed:
+            with self.online:
+                listing = self.listing()
+                if listing == last:
+                    self.online.wait(timeout=0.5)
+                    continue
+            last = listing
+            yield listing
+
+    def wait_for(self, serial, timeout=60):
+        with self.online:
+            return self.online.wait_for(lambda: self.states.get(serial, "device") == "device"
+                                        and serial in self.serials, timeout)
+
+    # --- SYNC ---
+    def _device_path(self, path):
+        return os.path.join(self.device_root, path.lstrip("/"))
+
+    def stat_file(self, serial, path):
+        """ (mode, size, mtime) like the sync STAT reply; zeros if missing. """
+        if self.device_root is None: return (0, 0, 0)
+        try: st = os.stat(self._device_path(path))
+        except OSError: return (0, 0, 0)
+        return (st.st_mode & 0xFFFFFFFF, st.st_size & 0xFFFFFFFF, int(st.st_mtime))
+
+    def open_file(self, serial, path):
+        if self.device_root is None: return None
+        local = self._device_path(path)
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        return open(local, "wb")
+
+    def pace(self, n, due):
+        """ Sleeps as long as n bytes take on this stream and the shared link. """
+        now = time.perf_counter()
+        finish = now
+        if self.link_bandwidth:
+            with self._link_lock:
+                start = max(now, self._link_free)
+                self._link_free = finish = start + n / self.link_bandwidth
+        if self.stream_bandwidth:
+            due = max(due, now) + n / self.stream_bandwidth
+            finish = max(finish, due)
+        if finish > now: time.sleep(finish - now)
+        return due
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.closed = True
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--port", type=int, default=5037)
+    args = ap.parse_args()
+    srv = FakeAdbServer(port=args.port)
+    print(f"fake adb server on 127.0.0.1:{srv.port}")
+    srv.server.serve_forever()
@@ -0,0 +1,303 @@
+"""
+End-to-end typing benchmark against the fake adb (no phone needed).
+
+Replays a typing trace through the real InputBatcher + ADBEngine, with the
+fake adb simulating device cost, link jitter and disconnects, and reports
+keystrokes/s, per-stage latency percentiles, CPU time and peak memory.
+
+    python -m bench.harness                         # synthetic trace, usb profile
+    python -m bench.harness --profile all --out results.jsonl
+    python -m bench.harness --trace session.tsv --profile wifi
+    python -m bench.harness --disconnect-after 50    # link drops every 50 commands
+    python -m bench.harness --disconnect-after 50 --no-reconnect
+    python -m bench.harness --devices 10 --slow-devices 1
+    python -m bench.harness --engine thread          # pre-asyncio engine
+
+Trace files are TSV, one key per line: <delay_ms>\t<key>, where key is a
+single character or a pynput Key name (space, enter, backspace, left, ...).
+
+Each run is one JSON object (schema below, keys sorted) so results from
+different versions can be diffed or loaded straight into a spreadsheet.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bench._env import HERE # Also points KEYBRIDGE_ADB at the fake adb
+
+from pynput import keyboard
+from core import config
+from core.engine import ADBEngine
+from core.async_engine import AsyncADBEngine
+from core.engine_pool import EnginePool
+from core.batching import InputBatcher
+
+SCHEMA_VERSION = 1
+
+ENGINES = {"thread": ADBEngine, "async": AsyncADBEngine}
+
+# Simulated links. A real phone spends ~100 ms per `input` command (JVM start);
+# the link adds jitter on top.
+PROFILES = {
+    "usb":      {"cost": 0.100, "jitter": 0.002},
+    "wifi":     {"cost": 0.100, "jitter": 0.020},
+    "bad-wifi": {"cost": 0.100, "jitter": 0.080},
+}
+
+WORDS = ("the quick brown fox jumps over lazy dog hello world keybridge "
+         "android typing latency bench batch phone message send reply").split()
+
+
+# --- TRACES ---
+def synthetic_trace(keys, gap_ms, seed=42):
+    """ Words + spaces, with the odd typo fixed by backspace and an Enter. """
+    rnd = random.Random(seed)
+    trace = []
+    while len(trace) < keys:
+        for ch in rnd.choice(WORDS):
+            trace.append((rnd.lognormvariate(0, 0.4) * gap_ms, ch))
+            if rnd.random() < 0.04:
+                trace.append((gap_ms * 2, "backspace"))
+        trace.append((gap_ms, "enter" if rnd.random() < 0.1 else "space"))
+    return trace[:keys]
+
+
+def load_trace(path):
+    trace = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line or line.startswith("#"): continue
+            delay, key = line.split("\t", 1)
+            trace.append((float(delay), key))
+    return trace
+
+
+def to_pynput(key):
+    if len(key) == 1: return keyboard.KeyCode(char=key)
+    return getattr(keyboard.Key, key)
+
+
+# --- RUN ---
+class _Quiet:
+    """ Collects engine log lines instead of printing them. """
+    def __init__(self):
+        self.lines = []
+
+    def __call__(self, msg, *args):
+        self.lines.append(msg)
+
+
+def _returncode(proc):
+    # subprocess.Popen (thread engine) or asyncio Process (async engine)
+    return proc.poll() if hasattr(proc, "poll") else proc.returncode
+
+
+def run_scenario(trace, profile, cost, jitter, disconnect_after=0, devices=1, slow_devices=0,
+                 engine_kind="async" if config.ENGINE_ASYNC else "thread", timeout=60.0,
+                 reconnect=config.ENGINE_AUTO_RECONNECT, standby=config.ENGINE_STANDBY_SHELL):
+    stats_dir = tempfile.mkdtemp(prefix="kb_bench_")
+    serials = [f"FAKE{i + 1:04d}" for i in range(devices)]
+    os.environ.update({
+        "FAKE_ADB_CMD_COST": str(cost),
+        "FAKE_ADB_JITTER": str(jitter),
+        "FAKE_ADB_DISCONNECT_AFTER": str(disconnect_after),
+        "FAKE_ADB_SLOW_SERIALS": ",".join(serials[len(serials) - slow_devices:] if slow_devices else []),
+        "FAKE_ADB_STATS": os.path.join(stats_dir, "{serial}.json"),
+        "FAKE_ADB_LINK_DIR": stats_dir, # Link-drop markers, private to this run
+    })
+
+    tracemalloc.start()
+    cpu_start = time.process_time()
+    children_start = os.times()
+
+    log = _Quiet()
+    t0 = time.perf_counter()
+    def engine_class(log_callback, status_callback):
+        engine = ENGINES[engine_kind](log_callback, status_callback)
+        engine.auto_reconnect, engine.standby_enabled = reconnect, standby
+        return engine
+    if devices > 1:
+        target = EnginePool(log, lambda *a: None, engine_class)
+        target.connect(serials)
+        engines = dict(target.engines)
+    else:
+        target = engine_class(log, lambda *a: None)
+        engines = {serials[0]: target} if target.connect(serials[0]) else {}
+    if not engines:
+        raise SystemExit(f"fake adb did not start: {log.lines}")
+    connect_seconds = time.perf_counter() - t0
+    procs = {serial: e.process for serial, e in engines.items()}
+    batcher = InputBatcher(target)
+
+    # Replay on an absolute schedule so sleep overshoot doesn't accumulate
+    keys = [(delay / 1000.0, to_pynput(key)) for delay, key in trace]
+    start = time.perf_counter()
+    due = start
+    for delay, key in keys:
+        due += delay
+        pause = due - time.perf_counter()
+        if pause > 0: time.sleep(pause)
+        batcher.put(key)
+    typed_at = time.perf_counter()
+
+    # Wait for every device to confirm every key (or for its link to die for good)
+    expected = len(keys)
+    deadline = typed_at + timeout
+    def pending():
+        return [s for s, e in engines.items()
+                if e.tracer.histograms["total"].total < expected and e.check_health()]
+    while pending() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    finished = time.perf_counter()
+
+    # Let the fake shells exit cleanly so they write their stats
+    shells = {}
+    for serial, engine in engines.items():
+        engine.auto_reconnect = False # This exit is on purpose
+        shells[serial] = engine.process or procs[serial]
+        engine.send_cmd("exit")
+    exit_deadline = time.perf_counter() + 10
+    while any(_returncode(p) is None for p in shells.values()) and time.perf_counter() < exit_deadline:
+        time.sleep(0.01)
+    for proc in shells.values():
+        if _returncode(proc) is None: proc.kill()
+    for engine in engines.values(): engine.stop() # Also ends standby shells
+
+    cpu = time.process_time() - cpu_start
+    children_end = os.times()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_device = {}
+    for serial, engine in engines.items():
+        stats = {}
+        try:
+            with open(os.path.join(stats_dir, f"{serial}.json")) as f: stats = json.load(f)
+        except (OSError, ValueError): pass
+        total = engine.tracer.histograms["total"]
+        per_device[serial] = {
+            "completed_keys": total.total,
+            "p50_ms": round(total.percentile(50) * 1000, 2),
+            "p95_ms": round(total.percentile(95) * 1000, 2),
+            "device_commands": stats.get("commands", 0),
+            "device_keyevents": stats.get("keyevents", 0),
+            "device_keyevent_commands": stats.get("keyevent_commands", 0),
+            "queue": engine.queue_stats(),
+            "device_writes": stats.get("reads", 0),
+            "device_bytes": stats.get("bytes", 0),
+            "disconnected": _returncode(procs[serial]) not in (0, None),
+            "recover_ms": [round(s * 1000, 1) for s in engine.recoveries],
+        }
+    shutil.rmtree(stats_dir, ignore_errors=True)
+
+    first = next(iter(engines.values()))
+    completed = min(d["completed_keys"] for d in per_device.values())
+    elapsed = finished - start
+    return {
+        "scenario": {
+            "profile": profile,
+            "cmd_cost_s": cost,
+            "jitter_s": jitter,
+            "disconnect_after": disconnect_after,
+            "reconnect": "off" if not reconnect else "standby" if standby else "respawn",
+            "devices": devices,
+            "engine": engine_kind,
+            "slow_devices": slow_devices,
+            "keys": expected,
+            "typing_seconds": round(typed_at - start, 3),
+        },
+        "results": {
+            "connect_seconds": round(connect_seconds, 4),
+            "completed_keys": completed,
+            "elapsed_seconds": round(elapsed, 3),
+            "keystrokes_per_sec": round(completed / elapsed, 2) if elapsed else 0.0,
+            "drain_seconds": round(finished - typed_at, 3),
+            "latency_ms": first.tracer.summary(),
+            "cpu_seconds": round(cpu, 4),
+            "adb_cpu_seconds": round((children_end.children_user - children_start.children_user)
+                                     + (children_end.children_system - children_start.children_system), 4),
+            "peak_python_mem_kb": round(peak / 1024, 1),
+            "device_commands": sum(d["device_commands"] for d in per_device.values()),
+            "device_keyevents": sum(d["device_keyevents"] for d in per_device.values()),
+            "device_keyevent_commands": sum(d["device_keyevent_commands"] for d in per_device.values()),
+            "device_writes": sum(d["device_writes"] for d in per_device.values()),
+            "device_bytes": sum(d["device_bytes"] for d in per_device.values()),
+            "disconnected": any(d["disconnected"] for d in per_device.values()),
+            "recoveries": sum(len(d["recover_ms"]) for d in per_device.values()),
+            "recover_ms_max": max((m for d in per_device.values() for m in d["recover_ms"]), default=0.0),
+            "per_device": per_device,
+        },
+    }
+
+
+def environment():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                             text=True, cwd=HERE).stdout.strip() or "unknown"
+    except OSError:
+        rev = "unknown"
+    return {
+        "revision": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": {
+            "max_batch": config.ENGINE_MAX_BATCH,
+            "batch_latency": config.ENGINE_BATCH_LATENCY,
+            "window_min": config.BATCH_WINDOW_MIN,
+            "window_max": config.BATCH_WINDOW_MAX,
+            "coalesce_keys": config.BATCH_COALESCE_KEYS,
+        },
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--profile", default="usb", choices=sorted(PROFILES) + ["all"])
+    ap.add_argument("--trace", help="TSV typing trace (default: synthetic)")
+    ap.add_argument("--keys", type=int, default=300, help="synthetic trace length")
+    ap.add_argument("--gap-ms", type=float, default=60.0, help="synthetic median key gap")
+    ap.add_argument("--cost", type=float, help="override per-command device cost (s)")
+    ap.add_argument("--jitter", type=float, help="override link jitter (s)")
+    ap.add_argument("--disconnect-after", type=int, default=0, help="fake link drops every N commands")
+    ap.add_argument("--no-reconnect", action="store_true", help="engine auto-reconnect off")
+    ap.add_argument("--no-standby", action="store_true", help="reconnect by spawning a new shell")
+    ap.add_argument("--devices", type=int, default=1, help="broadcast to N fake devices (EnginePool)")
+    ap.add_argument("--slow-devices", type=int, default=0, help="how many of them are 10x slower")
+    ap.add_argument("--engine", choices=sorted(ENGINES), default="async" if config.ENGINE_ASYNC else "thread")
+    ap.add_argument("--out", help="append JSON lines here instead of printing")
+    args = ap.parse_args()
+
+    trace = load_trace(args.trace) if args.trace else synthetic_trace(args.keys, args.gap_ms)
+    profiles = sorted(PROFILES) if args.profile == "all" else [args.profile]
+    env = environment()
+
+    for name in profiles:
+        prof = PROFILES[name]
+        cost = prof["cost"] if args.cost is None else args.cost
+        jitter = prof["jitter"] if args.jitter is None else args.jitter
+        record = run_scenario(trace, name, cost, jitter, args.disconnect_after,
+                              args.devices, args.slow_devices, args.engine,
+                              reconnect=not args.no_reconnect, standby=not args.no_standby)
+        record["schema"] = SCHEMA_VERSION
+        record["suite"] = "typing"
+        record["env"] = env
+        line = json.dumps(record, sort_keys=True)
+        if args.out:
+            with open(args.out, "a") as f: f.write(line + "\n")
+        print(line if not args.out else
+              f"{name}: {record['results']['keystrokes_per_sec']} keys/s, "
+              f"p95 {record['results']['latency_ms']['total']['p95']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+import socket
+import struct
+import threading
+import queue
+
+# The adb server every `adb` invocation talks to anyway
+ADB_HOST = "127.0.0.1"
+ADB_PORT = 5037
+
+class AdbError(Exception):
+    """ The adb server answered FAIL (message is the server's reason). """
+
+class SyncSession:
+    """
+    One `sync:` connection (the file transfer protocol behind adb push).
+    Requests are 4-byte ids + little-endian lengths, and one session can
+    push/stat any number of files before QUIT - no new socket per file.
+    """
+    CHUNK = 64 * 1024 # Max DATA payload adb accepts
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _send(self, cmd, payload=b""):
+        self.sock.sendall(cmd + struct.pack("<I", len(payload)) + payload)
+
+    def stat(self, remote):
+        """ (mode, size, mtime) of a device path. mode is 0 if it doesn't exist. """
+        self._send(b"STAT", remote.encode("utf-8"))
+        reply = AdbClient._recv_exact(self.sock, 16)
+        if reply[:4] != b"STAT": raise AdbError(f"unexpected reply {reply[:4]!r}")
+        return struct.unpack("<III", reply[4:])
+
+    def push(self, fileobj, remote, mtime, mode=0o100644, on_chunk=None):
+        """
+        Streams fileobj to `remote`. on_chunk(data) runs after each chunk is
+        sent (progress, hashing - it may raise to abort; the session is
+        unusable after that). Returns the number of bytes sent.
+        """
+        self._send(b"SEND", f"{remote},{mode}".encode("utf-8"))
+        sent = 0
+        while True:
+            data = fileobj.read(self.CHUNK)
+            if not data: break
+            self._send(b"DATA", data)
+            sent += len(data)
+            if on_chunk: on_chunk(data)
+        self.sock.sendall(b"DONE" + struct.pack("<I", int(mtime)))
+        reply = AdbClient._recv_exact(self.sock, 8)
+        status, length = reply[:4], struct.unpack("<I", reply[4:])[0]
+        if status == b"OKAY": return sent
+        message = AdbClient._recv_exact(self.sock, length).decode("utf-8", errors="replace")
+        raise AdbError(message if status == b"FAIL" else f"unexpected reply {status!r}")
+
+    def close(self):
+        try: self._send(b"QUIT")
+        except OSError: pass
+        self.sock.close()
+
+class AdbClient:
+    """
+    Pure-Python client for the adb server's smart-socket protocol.
+    Talks to localhost:5037 directly instead of spawning an `adb` process
+    per call (which would just open the same socket itself).
+
+    Wire format: the client sends a 4-hex-digit length + service name,
+    the server answers OKAY or FAIL (+ 4-hex length + message).
+    The server closes the socket after each service, so the "pool" keeps a
+    few idle, already-connected sockets ready instead of reusing used ones.
+    """
+    def __init__(self, host=ADB_HOST, port=ADB_PORT, pool_size=2, timeout=5.0):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self._refill_wanted = threading.Event()
+        self._refiller = None
+        self._lock = threading.Lock()
+
+    # --- CONNECTION POOL ---
+    def _new_socket(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _acquire(self):
+        """ Returns (socket, pooled). Pooled sockets may have gone stale. """
+        try:
+            sock = self.idle.get_nowait()
+            pooled = True
+        except queue.Empty:
+            sock = self._new_socket()
+            pooled = False
+        self._schedule_refill()
+        return sock, pooled
+
+    def _schedule_refill(self):
+        with self._lock:
+            if self._refiller is None or not self._refiller.is_alive():
+                self._refiller = threading.Thread(target=self._refill_loop, daemon=True)
+                self._refiller.start()
+        self._refill_wanted.set()
+
+    def _refill_loop(self):
+        while True:
+            self._refill_wanted.wait()
+            self._refill_wanted.clear()
+            try:
+                while self.idle.qsize() < self.pool_size:
+                    self.idle.put(self._new_socket())
+            except OSError:
+                pass # Server down. The next request will notice (and fall back).
+
+    def close(self):
+        while True:
+            try: self.idle.get_nowait().close()
+            except queue.Empty: break
+
+    # --- WIRE PROTOCOL ---
+    @staticmethod
+    def _recv_exact(sock, n):
+        data = b""
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            if not chunk: raise ConnectionError("adb server closed the connection")
+            data += chunk
+        return data
+
+    def _read_prefixed(self, sock):
+        length = int(self._recv_exact(sock, 4), 16)
+        return self._recv_exact(sock, length).decode("utf-8", errors="replace")
+
+    def _request(self, sock, service):
+        payload = service.encode("utf-8")
+        sock.sendall(b"%04x" % len(payload) + payload)
+        status = self._recv_exact(sock, 4)
+        if status == b"OKAY": return
+        if status == b"FAIL": raise AdbError(self._read_prefixed(sock))
+        raise AdbError(f"unexpected reply {status!r}")
+
+    def _open(self, service, serial=None, transport=False):
+        """
+        Opens a socket with `service` accepted. With transport=True the
+        socket is first switched to the device (serial, or the only one).
+        A stale pooled socket is simply dropped and the request retried.
+        """
+        while True:
+            sock, pooled = self._acquire()
+            try:
+                if transport:
+                    self._request(sock, f"host:transport:{serial}" if serial else "host:transport-any")
+                self._request(sock, service)
+                return sock
+            except OSError:
+                sock.close()
+                if not pooled: raise
+            except Exception:
+                sock.close()
+                raise
+
+    @staticmethod
+    def _read_all(sock):
+        sock.settimeout(None) # Commands like dumpsys can take a while
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk: break
+            chunks.append(chunk)
+        sock.close()
+        return b"".join(chunks)
+
+    # --- HOST SERVICES ---
+    def version(self):
+        sock = self._open("host:version")
+        try: return int(self._read_prefixed(sock), 16)
+        finally: sock.close()
+
+    def devices(self):
+        """ Returns [(serial, state), ...] like `adb devices`. """
+        sock = self._open("host:devices")
+        try: listing = self._read_prefixed(sock)
+        finally: sock.close()
+        return self._parse_devices(listing)
+
+    @staticmethod
+    def _parse_devices(listing):
+        return [tuple(line.split("\t", 1)) for line in listing.splitlines() if "\t" in line]
+
+    def track_devices(self):
+        """
+        Socket for `host:track-devices`: the server sends the full device
+        list now and again on every change. Read them with next_devices().
+        """
+        sock = self._open("host:track-devices")
+        sock.settimeout(None)
+        return sock
+
+    def next_devices(self, sock):
+        """ Blocks for the next [(serial, state), ...] on a track-devices socket. """
+        return self._parse_devices(self._read_prefixed(sock))
+
+    def connect_device(self, address):
+        sock = self._open(f"host:connect:{address}")
+        try: return self._read_prefixed(sock)
+        finally: sock.close()
+
+    def pair(self, address, code):
+        sock = self._open(f"host:pair:{code}:{address}")
+        try: return self._read_prefixed(sock)
+        finally: sock.close()
+
+    def wait_for_device(self, serial, timeout):
+        """
+        `adb wait-for-device`: the server answers a second OKAY once the
+        device is online. Returns False if that doesn't happen in time.
+        """
+        sock = self._open(f"host-serial:{serial}:wait-for-any-device")
+        try:
+            sock.settimeout(timeout)
+            return self._recv_exact(sock, 4) == b"OKAY"
+        except socket.timeout:
+            return False
+        finally: sock.close()
+
+    # --- DEVICE SERVICES ---
+    def shell(self, serial, command):
+        """ Runs a command via `shell:` and returns its (merged) output. """
+        sock = self._open(f"shell:{command}", serial, transport=True)
+        return self._read_all(sock).decode("utf-8", errors="ignore").replace("\r\n", "\n")
+
+    def exec_out(self, serial, command):
+        """ Raw, binary-safe stdout via `exec:`. """
+        sock = self._open(f"exec:{command}", serial, transport=True)
+        return self._read_all(sock)
+
+    def tcpip(self, serial, port):
+        sock = self._open(f"tcpip:{port}", serial, transport=True)
+        return self._read_all(sock).decode("utf-8", errors="ignore")
+
+    def open_stream(self, serial, service):
+        """ Socket for a long-running service (caller reads + closes it). """
+        sock = self._open(service, serial, transport=True)
+        sock.settimeout(None)
+        return sock
+
+    def sync(self, serial):
+        """ New SyncSession on the device (use as a context manager). """
+        sock = self._open("sync:", serial, transport=True)
+        sock.settimeout(60) # A stalled link shouldn't hang a transfer forever
+        return SyncSession(sock)
+
+    # --- CLI COMPATIBILITY ---
+    def run(self, args):
+        """
+        Runs an `adb` CLI-style argument list over the socket and returns
+        what the CLI would print on stdout. Returns None for commands this
+        client doesn't speak (push, start-server, ...) so callers can fall
+        back to the real binary. Raises OSError if the server isn't up.
+        """
+        serial = None
+        args = list(args)
+        if len(args) >= 2 and args[0] == "-s":
+            serial, args = args[1], args[2:]
+        if not args: return None
+
+        cmd, rest = args[0], args[1:]
+        try:
+            if cmd == "devices" and not rest:
+                lines = ["List of devices attached"] + [f"{s}\t{st}" for s, st in self.devices()]
+                return "\n".join(lines) + "\n"
+            if cmd == "connect" and len(rest) == 1:
+                return self.connect_device(rest[0]) + "\n"
+            if cmd == "pair" and len(rest) == 2:
+                return self.pair(rest[0], rest[1]) + "\n"
+            if cmd == "shell" and rest:
+                return self.shell(serial, " ".join(rest))
+            if cmd == "tcpip" and len(rest) == 1:
+                return self.tcpip(serial, rest[0])
+        except AdbError:
+            return "" # The CLI prints server errors on stderr
+        return None
+
+# Shared instance (one pool for the whole app)
+client = AdbClient()
@@ -0,0 +1,320 @@
+import asyncio
+import queue
+import re
+import subprocess
+import threading
+import time
+from .config import ADB_PATH, ENGINE_CONNECT_TIMEOUT, ENGINE_QUEUE_MAX
+from .engine import ADBEngine, PING_PREFIX, READY_TOKEN, _multi_keyevent
+from .event_queue import EventQueue
+from .watcher import watcher
+
+PING_BYTES = PING_PREFIX.encode()
+
+class LoopThread:
+    """ One asyncio event loop on a daemon thread, shared by every async engine. """
+    def __init__(self):
+        self.loop = None
+        self._lock = threading.Lock()
+
+    def _ensure(self):
+        with self._lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name="adb-asyncio", daemon=True).start()
+        return self.loop
+
+    def submit(self, coro):
+        """ Runs coro on the loop. Returns a concurrent.futures.Future. """
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure())
+
+    def call(self, fn, *args):
+        """ Runs fn(*args) on the loop thread (asyncio objects aren't thread-safe). """
+        self._ensure().call_soon_threadsafe(fn, *args)
+
+loop_thread = LoopThread()
+
+class LoopQueue(EventQueue):
+    """ EventQueue the asyncio worker awaits on (get_async), fed from any thread via put(). """
+    def __init__(self, loop, maxsize):
+        super().__init__(maxsize)
+        self.loop = loop
+        self.event = asyncio.Event() # Created on the loop thread (see _connect)
+
+    def _wake(self):
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    async def get_async(self, timeout=None):
+        """ Like get(), but awaits. Raises queue.Empty on timeout. """
+        deadline = None if timeout is None else self.loop.time() + timeout
+        while True:
+            self.event.clear()
+            try: return self.get_nowait()
+            except queue.Empty: pass
+            remaining = None if deadline is None else deadline - self.loop.time()
+            if remaining is not None and remaining <= 0: raise queue.Empty
+            try: await asyncio.wait_for(self.event.wait(), remaining)
+            except asyncio.TimeoutError: raise queue.Empty
+
+class AsyncADBEngine(ADBEngine):
+    """
+    ADBEngine on asyncio. The shell is an asyncio subprocess driven by a
+    background loop, so connect never blocks the Tk thread: connect_async()
+    returns a future, and readiness is event driven - the session is up as
+    soon as the shell echoes its first sentinel (as in ADBEngine._spawn_shell),
+    and that echo doubles as the first round-trip sample for the batcher.
+
+    Same public API as ADBEngine; connect() still blocks for callers that
+    want it (e.g. the wireless wizard thread). Don't call it on the loop.
+    log/status callbacks run on the loop thread: Tk callers must hop to
+    the UI thread (root.after), as they do for the thread engine.
+    """
+    def __init__(self, log_callback, status_callback):
+        super().__init__(log_callback, status_callback)
+        self.connect_timeout = ENGINE_CONNECT_TIMEOUT
+        self._session = 0 # Bumped by stop(), so a connect still in flight gets dropped
+        self._room = None # asyncio.Event: device caught up (created on the loop)
+
+    # --- CONNECTION MANAGEMENT ---
+    def connect(self, device_id):
+        return self.connect_async(device_id).result()
+
+    def connect_async(self, device_id):
+        """ Starts connecting; the future resolves to True/False. """
+        self.stop()
+        return loop_thread.submit(self._connect(device_id.strip(), self._session))
+
+    async def _connect(self, device_id, session):
+        loop = asyncio.get_running_loop()
+
+        # Handle IP-only input (add port if missing)
+        if re.match(r"^\d+\.\d+\.\d+\.\d+$", device_id):
+            device_id = f"{device_id}:5555"
+            await loop.run_in_executor(None, self._run_adb_silent, ["connect", device_id])
+
+        try:
+            sent = time.perf_counter()
+            process, reason = await self._spawn_async(device_id)
+        except Exception as e:
+            self.log(f"[!] Engine Error: {e}")
+            self.update_status(False)
+            return False
+
+        if process is None or session != self._session:
+            if process: await self._kill_async(process)
+            if session == self._session:
+                self.log(f"[!] Connection died immediately: {reason}")
+                self.update_status(False)
+            return False
+
+        self.policy.observe_latency(time.perf_counter() - sent)
+        self.process = process
+        self._reset_flow()
+        self._room = asyncio.Event()
+        self.running = True
+        # Fresh queue per session (see ADBEngine.connect)
+        self.queue = LoopQueue(loop, ENGINE_QUEUE_MAX)
+        loop.create_task(self._worker_async(self.queue))
+        self.device_id = device_id
+        self._start_reader(process)
+        self.multi_keyevent = _multi_keyevent.get(device_id, False)
+        self.log(f"[+] Connected to {device_id}")
+        self.update_status(True)
+        if self.use_helper: self.helper.start(device_id)
+        loop.run_in_executor(None, self._probe_device, device_id)
+        self._start_standby()
+        return True
+
+    @staticmethod
+    async def _wait_ready(process):
+        async for line in process.stdout:
+            if line.strip() == PING_BYTES + READY_TOKEN.encode(): return True
+        return False # EOF: the shell exited
+
+    # --- CORE WORKER ---
+    async def _worker_async(self, q):
+        """ Same batching as ADBEngine._worker; drain() applies pipe backpressure. """
+        while self.running:
+            await self._wait_for_room_async()
+            batch, stop = await self._drain_batch_async(q)
+            if batch:
+                self._write_batch(batch)
+                process = self.process # May have been swapped (see _swap_shell)
+                try:
+                    if process: await process.stdin.drain()
+                except (ConnectionError, OSError): pass
+            if stop: break
+
+    async def _wait_for_room_async(self):
+        """ ADBEngine._wait_for_room without blocking the loop. """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_hold
+        while self.running and (self.recovering or self.in_flight() >= self.policy.pipeline_depth(self.max_in_flight)):
+            self._room.clear()
+            if self.recovering:
+                await self._room.wait()
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0: break
+            try: await asyncio.wait_for(self._room.wait(), remaining)
+            except asyncio.TimeoutError: break
+
+    def _room_changed(self):
+        # Pongs arrive on the loop (shell) or the helper's reader thread
+        if self._room: loop_thread.call(self._room.set)
+
+    async def _drain_batch_async(self, q):
+        cmd = await q.get_async()
+        if cmd is None: return [], True
+
+        batch = [cmd]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - loop.time()
+            try:
+                if remaining > 0:
+                    cmd = await q.get_async(remaining)
+                else:
+                    cmd = q.get_nowait()
+            except queue.Empty:
+                break
+            if cmd is None: return batch, True
+            batch.append(cmd)
+        return batch, False
+
+    async def _reader_async(self, process):
+        try:
+            async for line in process.stdout:
+                if line.startswith(PING_BYTES): self._on_pong(line.decode().strip()[len(PING_PREFIX):])
+        except Exception: pass
+
+    def _write_shell(self, data):
+        # Runs on the loop thread (from _worker_async): write() only buffers
+        process = self.process
+        if process and process.returncode is None:
+            try: process.stdin.write(data.encode("utf-8"))
+            except Exception: pass
+        elif self.auto_reconnect:
+            self._on_shell_lost(process) # Replayed once a new shell is up
+        else:
+            self.running = False
+            self.update_status(False)
+
+    # --- SHELL PROCESSES ---
+    async def _spawn_async(self, device_id):
+        """
+        Starts `adb -s device_id shell` and waits for it to echo a sentinel.
+        Returns (process, None) once it answers, or (None, reason).
+        """
+        process = await asyncio.create_subprocess_exec(
+            ADB_PATH, '-s', device_id, 'shell',
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,  # Sentinel echoes (see _reader_async)
+            stderr=subprocess.PIPE,  # Capture errors to debug crashes
+            creationflags=self.NO_WINDOW
+        )
+        # EVENT-DRIVEN HEALTH CHECK: ready when the shell runs its first
+        # command, dead if it exits first (common with bad wireless links)
+        process.stdin.write(f"echo {PING_PREFIX}{READY_TOKEN}\n".encode())
+        try:
+            if await asyncio.wait_for(self._wait_ready(process), self.connect_timeout):
+                return process, None
+            reason = (await process.stderr.read()).decode(errors="replace").strip()
+        except (asyncio.TimeoutError, OSError):
+            reason = f"no answer in {self.connect_timeout:.0f}s"
+        await self._kill_async(process)
+        return None, reason
+
+    @staticmethod
+    async def _kill_async(process):
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    def _start_reader(self, process):
+        # Called on the loop thread
+        loop = asyncio.get_running_loop()
+        loop.create_task(self._reader_async(process))
+        loop.create_task(watcher.watch_async(process, self.device_id, self._on_shell_lost))
+
+    def _kill(self, process):
+        if process.returncode is None: loop_thread.call(self._terminate, process)
+
+    # --- LINK RECOVERY (see ADBEngine._on_shell_lost) ---
+    def _start_recovery(self, started):
+        loop_thread.submit(self._recover_async(started, self._session))
+
+    async def _recover_async(self, started, session):
+        process, fresh = self.standby, False
+        self.standby = None
+        if not await self._standby_alive_async(process):
+            if process: await self._kill_async(process)
+            process, fresh = None, True
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.reconnect_timeout
+            delay = 0.1
+            while session == self._session:
+                try: process, _ = await self._spawn_async(self.device_id)
+                except OSError: pass
+                remaining = deadline - loop.time()
+                if process or remaining <= 0: break
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, 1.0)
+        if session != self._session:
+            if process: await self._kill_async(process)
+            return
+        self._swap_shell(process, fresh, started)
+
+    async def _standby_alive_async(self, process):
+        """ ADBEngine._standby_alive on the loop (the standby's reader task sees the echo). """
+        if process is None or process.returncode is not None: return False
+        token = self._probe_token()
+        answered = asyncio.get_running_loop().create_future()
+        self._probes[token] = lambda: answered.done() or answered.set_result(True)
+        try:
+            process.stdin.write(f"echo {PING_PREFIX}{token}\n".encode())
+            # Give up early if it dies meanwhile (it went down with the link)
+            exited = asyncio.ensure_future(process.wait())
+            await asyncio.wait((answered, exited), timeout=self.standby_check,
+                               return_when=asyncio.FIRST_COMPLETED)
+            exited.cancel()
+            return answered.done()
+        except OSError:
+            return False
+        finally:
+            self._probes.pop(token, None)
+
+    def _start_standby(self):
+        if self.standby_enabled and self.auto_reconnect:
+            loop_thread.submit(self._spawn_standby_async(self.device_id, self._session))
+
+    async def _spawn_standby_async(self, device_id, session):
+        try: process, _ = await self._spawn_async(device_id)
+        except OSError: return
+        if process is None: return
+        if session != self._session or self.standby is not None:
+            await self._kill_async(process)
+            return
+        self.standby = process
+        self._start_reader(process)
+
+    def stop(self):
+        self._session += 1
+        self.running = False
+        self.recovering = False
+        self.queue.put(None) # Wake the worker so it exits
+        self._room_changed()
+        self.update_status(False)
+        self.helper.stop()
+        for process in (self.process, self.standby):
+            if process: self._kill(process)
+        self.process = self.standby = None
+
+    @staticmethod
+    def _terminate(process):
+        try: process.terminate()
+        except ProcessLookupError: pass
+
+    def check_health(self):
+        return self.recovering or (self.process is not None and self.process.returncode is None)
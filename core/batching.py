@@ -0,0 +1,169 @@
+import time
+import queue
+import threading
+from pynput import keyboard
+from .config import BATCH_WINDOW_MIN, BATCH_WINDOW_MAX, BATCH_COALESCE_KEYS, SPECIAL_KEYS
+from .latency import KeyTrace
+
+# pynput Key -> Android keycode
+KEYCODES = {getattr(keyboard.Key, name): code for name, code in SPECIAL_KEYS.items()}
+
+class BatchingPolicy:
+    """
+    Decides how long the keystroke batcher waits for more keys before
+    flushing (the "batch window").
+
+    Fed by the engine (link round trip: bare echoes sent while the device
+    is idle, so the time `input` takes to run doesn't count; and that run
+    time per command, separately) and by the batcher (the typist's
+    key-to-key gap):
+      - Fast link (USB): latency is tiny, so flush almost immediately.
+      - Slow link (weak Wi-Fi): every send is expensive, so wait up to
+        about half a round trip to pack more keys into one command.
+      - Slow typist: if the next key usually takes longer than the max
+        window, waiting is pointless - flush right away.
+    """
+    ALPHA = 0.2     # EWMA smoothing
+    IDLE_GAP = 1.0  # Gaps longer than this are pauses, not typing speed
+
+    def __init__(self, min_window=BATCH_WINDOW_MIN, max_window=BATCH_WINDOW_MAX):
+        self.min_window = min_window
+        self.max_window = max_window
+        self.latency = 0.0   # Smoothed link round trip (seconds)
+        self.device_time = None # Smoothed device seconds per command
+        self.key_gap = None  # Smoothed time between keys (seconds)
+        self._last_key = None
+
+    def _ewma(self, old, sample):
+        return sample if old is None else old + self.ALPHA * (sample - old)
+
+    def observe_latency(self, seconds):
+        self.latency = self._ewma(self.latency, seconds)
+
+    def observe_device(self, seconds):
+        self.device_time = self._ewma(self.device_time, seconds)
+
+    def observe_key(self, now=None):
+        now = time.perf_counter() if now is None else now
+        if self._last_key is not None:
+            gap = now - self._last_key
+            if gap < self.IDLE_GAP: self.key_gap = self._ewma(self.key_gap, gap)
+        self._last_key = now
+
+    def window(self):
+        target = self.latency * 0.5
+        if self.key_gap is not None:
+            if self.key_gap > self.max_window: return self.min_window
+            # Waiting much past the usual gap won't catch another key
+            target = min(target, self.key_gap * 1.5)
+        return min(max(target, self.min_window), self.max_window)
+
+    def pipeline_depth(self, limit):
+        """
+        Commands worth having on the device at once (at most limit): enough
+        to cover the link round trip. More would only wait there, where
+        they can no longer merge; held on the PC they still do.
+        """
+        if not self.device_time: return limit
+        return max(1, min(limit, 1 + int(self.latency / self.device_time)))
+
+class InputBatcher:
+    """ 
+    Smart Batcher:
+    Waits a short, adaptive window to see if you type more keys.
+    If yes -> Combines them (Batching).
+    If no -> Sends what it has.
+    The window comes from engine.policy (link latency + typing
+    speed), and a batch is never held longer than its max window.
+    Held special keys (Backspace, arrows) work the same way: the first
+    press goes out at once, auto-repeats within a window are sent as one
+    `input keyevent 67 67 67 ...`.
+
+    Keys are pynput keys; put() is safe to call from the listener thread.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.coalesce = BATCH_COALESCE_KEYS
+        self.input_queue = queue.Queue()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def put(self, key, pressed=None):
+        # Stamped here for latency tracing
+        self.input_queue.put((key, time.perf_counter() if pressed is None else pressed))
+
+    def _send_keys(self, code, traces):
+        # Held key: one multi-keycode command for all its repeats
+        self.engine.send_cmd("input keyevent " + " ".join([str(code)] * len(traces)), traces)
+
+    def _loop(self):
+        buffer = []
+        traces = []
+        repeat = None   # [keycode, traces]: repeats of a held special key
+        repeat_gap = 0.0
+        started = 0.0
+        last_key = (None, 0.0) # (keycode, time) of the last special key
+        
+        while True:
+            policy = self.engine.policy
+            try:
+                if buffer or repeat:
+                    # Wait for the next key, but not past the batch's max hold time.
+                    # A held key repeats at a steady rate: wait for that, not the typing window.
+                    hold_left = started + policy.max_window - time.perf_counter()
+                    wait = repeat_gap * 1.5 if repeat else policy.window()
+                    key, pressed = self.input_queue.get(timeout=max(0.0, min(wait, hold_left)))
+                else:
+                    key, pressed = self.input_queue.get() # Idle: just sleep until a key arrives
+                trace = KeyTrace(pressed)
+                trace.dequeued = time.perf_counter()
+                policy.observe_key(trace.dequeued)
+                
+                # If character (or space), add to buffer
+                char = key.char if hasattr(key, 'char') and key.char else None
+                if key == keyboard.Key.space: char = " "
+                if char:
+                    if repeat:
+                        self._send_keys(*repeat)
+                        repeat = None
+                    if not buffer: started = trace.dequeued
+                    buffer.append(char)
+                    traces.append(trace)
+                    if trace.dequeued - started >= policy.max_window:
+                        self.engine.send_text("".join(buffer), traces)
+                        buffer, traces = [], []
+                elif key in KEYCODES:
+                    # Special key! Flush buffer first
+                    if buffer:
+                        self.engine.send_text("".join(buffer), traces)
+                        buffer, traces = [], []
+
+                    code = KEYCODES[key]
+                    if repeat and repeat[0] == code:
+                        # Still held: collect the repeat
+                        repeat[1].append(trace)
+                        if trace.dequeued - started >= policy.max_window:
+                            self._send_keys(*repeat)
+                            repeat = None
+                    else:
+                        if repeat:
+                            self._send_keys(*repeat)
+                            repeat = None
+                        if self.coalesce and last_key[0] == code and trace.dequeued - last_key[1] < policy.max_window:
+                            # Auto-repeat of a held key: hold it for one window
+                            repeat = [code, [trace]]
+                            repeat_gap = trace.dequeued - last_key[1]
+                            started = trace.dequeued
+                        else:
+                            # Process special key immediately
+                            self._send_keys(code, [trace])
+                    last_key = (code, trace.dequeued)
+                    
+            except queue.Empty:
+                # Window passed with no new key. Flush buffer.
+                if buffer:
+                    self.engine.send_text("".join(buffer), traces)
+                    buffer, traces = [], []
+                if repeat:
+                    self._send_keys(*repeat)
+                    repeat = None
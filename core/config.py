@@ -1,6 +1,4 @@
-import json
 import os
-from pynput import keyboard
 from .utils import resource_path
 
 
@@ -8,32 +6,121 @@ from .utils import resource_path
 # Check if we have a bundled adb.exe, otherwise fall back to system 'adb'
 BUNDLED_ADB = resource_path(os.path.join("assets", "adb.exe"))
 
-if os.path.exists(BUNDLED_ADB):
+if os.environ.get("KEYBRIDGE_ADB"):
+    # Override (used by the benchmark harness to point at a fake adb)
+    ADB_PATH = os.environ["KEYBRIDGE_ADB"]
+elif os.path.exists(BUNDLED_ADB):
     ADB_PATH = BUNDLED_ADB
 else:
     ADB_PATH = "adb"
 
-# Key Mappings (PC -> Android Keycodes)
+def _user_config_dir():
+    """ %APPDATA%\\KeyBridge on Windows, $XDG_CONFIG_HOME (~/.config)/KeyBridge elsewhere. """
+    if os.environ.get("KEYBRIDGE_CONFIG_DIR"):
+        # Override (used by the benchmarks to keep off the real settings)
+        return os.environ["KEYBRIDGE_CONFIG_DIR"]
+    if os.name == "nt":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "KeyBridge")
+
+# Per-user settings folder (created on first save), same whatever the working directory
+CONFIG_DIR = _user_config_dir()
+
+# --- ENGINE TUNING ---
+# The worker drains pending commands into one write. MAX_BATCH caps how many
+# commands go out in one write; BATCH_LATENCY is how long (seconds) it may wait
+# for more commands after the first one. 0 = never hold a keystroke back.
+ENGINE_MAX_BATCH = 64
+ENGINE_BATCH_LATENCY = 0.0
+# Route typing through the persistent on-device helper when it's bundled
+# (assets/kbhelper.jar). Falls back to plain `input` commands otherwise.
+ENGINE_USE_HELPER = True
+
+# Keystroke batcher window bounds (seconds). The actual window adapts between
+# these to the measured device latency and typing speed (core/batching.py).
+BATCH_WINDOW_MIN = 0.005
+BATCH_WINDOW_MAX = 0.12
+# Send auto-repeats of a held key (Backspace, arrows) as one multi-keycode
+# command per window instead of one command each
+BATCH_COALESCE_KEYS = True
+# Flow control: every write ends with a sentinel the device echoes back, so
+# the engine knows how many commands it hasn't run yet. At ENGINE_MAX_IN_FLIGHT
+# unconfirmed commands (fewer when the device is slower than the link, see
+# BatchingPolicy.pipeline_depth), new input waits on the PC (merging into fewer
+# commands) for up to ENGINE_MAX_HOLD seconds.
+ENGINE_MAX_IN_FLIGHT = 3
+ENGINE_MAX_HOLD = 2.0
+# While the device is idle, a bare echo goes out with the next write (at most
+# this often, seconds): its round trip is the link alone, without the time
+# `input` runs, and is what the keystroke batch window adapts to
+ENGINE_LINK_PING_INTERVAL = 0.5
+# Max events waiting for the device (text runs and keycodes merge while they
+# wait, so this is rarely reached); beyond it new input is dropped
+ENGINE_QUEUE_MAX = 256
+# Show "device lagging" once the oldest unconfirmed command is this old (seconds)
+ENGINE_LAG_WARN = 1.0
+# When the shell dies, swap in a new one and replay what the device never
+# confirmed (capture mode stays on). A standby shell is kept pre-spawned so
+# this is usually instant; otherwise a new one is started, retrying for up
+# to ENGINE_RECONNECT_TIMEOUT seconds.
+ENGINE_AUTO_RECONNECT = True
+ENGINE_STANDBY_SHELL = True
+ENGINE_RECONNECT_TIMEOUT = 30.0
+# A link loss usually takes the standby shell down too, and its exit may not
+# have shown yet: it must answer an echo within this many seconds to be used
+ENGINE_STANDBY_CHECK = 0.5
+# Use the asyncio engine (core/async_engine.py): connect doesn't block the UI
+# and returns as soon as the shell answers, up to CONNECT_TIMEOUT seconds.
+ENGINE_ASYNC = True
+ENGINE_CONNECT_TIMEOUT = 5.0
+# Wi-Fi wizard: max seconds to wait for each readiness step (port open,
+# device online). The wizard moves on as soon as the phone answers.
+WIZARD_TIMEOUT = 15.0
+
+# --- LOG CONSOLE ---
+# The window's log keeps the last LOG_MAX_LINES lines and redraws at most
+# LOG_FLUSH_HZ times a second. Lines below LOG_LEVEL (DEBUG, INFO,
+# WARNING, ERROR) are dropped before they cost anything.
+LOG_MAX_LINES = 1000
+LOG_FLUSH_HZ = 10
+LOG_LEVEL = "INFO"
+
+# --- FILE BEAM ---
+# Files pushed at once (each over its own sync connection)
+TRANSFER_PARALLEL = 3
+TRANSFER_REMOTE_DIR = "/sdcard/Download"
+# What was already sent where, so unchanged files are skipped
+TRANSFER_MANIFEST = os.path.join(CONFIG_DIR, "transfer_manifest.json")
+
+# Text at least this long (characters) is pasted through the device clipboard
+# in one go (needs the input helper) instead of typed line by line. The
+# helper puts the user's previous clip back afterwards.
+ENGINE_PASTE_THRESHOLD = 256
+
+# Key Mappings (PC -> Android Keycodes), by pynput Key name (see
+# core/batching.py) so this module loads without a keyboard backend
 SPECIAL_KEYS = {
-    keyboard.Key.enter: 66,      # KEYCODE_ENTER
-    keyboard.Key.backspace: 67,  # KEYCODE_DEL
-    keyboard.Key.tab: 61,        # KEYCODE_TAB
-    keyboard.Key.esc: 111,       # KEYCODE_ESCAPE
-    keyboard.Key.up: 19,         # KEYCODE_DPAD_UP
-    keyboard.Key.down: 20,       # KEYCODE_DPAD_DOWN
-    keyboard.Key.left: 21,       # KEYCODE_DPAD_LEFT
-    keyboard.Key.right: 22,      # KEYCODE_DPAD_RIGHT
-    keyboard.Key.page_up: 92,    # KEYCODE_PAGE_UP
-    keyboard.Key.page_down: 93,  # KEYCODE_PAGE_DOWN
-    keyboard.Key.home: 122,      # KEYCODE_MOVE_HOME
-    keyboard.Key.end: 123,       # KEYCODE_MOVE_END
-    keyboard.Key.delete: 112,    # KEYCODE_FORWARD_DEL
+    "enter": 66,      # KEYCODE_ENTER
+    "backspace": 67,  # KEYCODE_DEL
+    "tab": 61,        # KEYCODE_TAB
+    "esc": 111,       # KEYCODE_ESCAPE
+    "up": 19,         # KEYCODE_DPAD_UP
+    "down": 20,       # KEYCODE_DPAD_DOWN
+    "left": 21,       # KEYCODE_DPAD_LEFT
+    "right": 22,      # KEYCODE_DPAD_RIGHT
+    "page_up": 92,    # KEYCODE_PAGE_UP
+    "page_down": 93,  # KEYCODE_PAGE_DOWN
+    "home": 122,      # KEYCODE_MOVE_HOME
+    "end": 123,       # KEYCODE_MOVE_END
+    "delete": 112,    # KEYCODE_FORWARD_DEL
     
     # Function Keys
-    keyboard.Key.f10: 24,        # Vol UP
-    keyboard.Key.f9: 25,         # Vol DOWN
-    keyboard.Key.f8: 85,         # Play/Pause
-    keyboard.Key.f7: 26          # Power
+    "f10": 24,        # Vol UP
+    "f9": 25,         # Vol DOWN
+    "f8": 85,         # Play/Pause
+    "f7": 26          # Power
 }
 
 APP_SHORTCUTS = {
@@ -42,43 +129,3 @@ APP_SHORTCUTS = {
     "WhatsApp": "com.whatsapp",
     "Settings": "com.android.settings",
 }
-
-# --- CONFIG MANAGER (Settings) ---
-CONFIG_FILE = "user_config.json"
-
-DEFAULT_MACROS = {
-    "My Email": "user@example.com",
-    "Address": "123 Tech Street",
-}
-
-class ConfigManager:
-    def __init__(self):
-        self.macros = DEFAULT_MACROS.copy()
-        self.apps = APP_SHORTCUTS.copy()
-        self.load()
-
-    def load(self):
-        if os.path.exists(CONFIG_FILE):
-            try:
-                with open(CONFIG_FILE, 'r') as f:
-                    data = json.load(f)
-                    self.macros = data.get("macros", self.macros)
-                    # We can add app persistence here later if needed
-            except: pass 
-
-    def save(self):
-        data = {"macros": self.macros}
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(data, f, indent=4)
-
-    def add_macro(self, name, text):
-        self.macros[name] = text
-        self.save()
-
-    def remove_macro(self, name):
-        if name in self.macros:
-            del self.macros[name]
-            self.save()
-
-# Create the global instance
-cfg = ConfigManager()
\ No newline at end of file
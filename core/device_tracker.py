@@ -0,0 +1,109 @@
+import socket
+import subprocess
+import threading
+import time
+from .config import ADB_PATH
+from .adb_client import client as adb_client, AdbError
+
+class DeviceTracker:
+    """
+    Keeps one `host:track-devices` stream open on a background thread and
+    tells subscribers when devices appear, disappear or change state
+    (device / offline / unauthorized ...), so nobody polls `adb devices`.
+
+    Subscribers run on the tracker thread as callback(devices, changes):
+      devices - {serial: state} for everything the adb server knows
+      changes - [(serial, old_state, new_state)], None meaning absent
+    Tk code should hop back to the main thread with root.after.
+    """
+    RETRY_MIN = 0.2
+    RETRY_MAX = 5.0
+
+    def __init__(self):
+        self.devices = {}
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.running = False
+        self.ready = threading.Event() # Set once the first device list came in (adb server up)
+        self._sock = None
+        self.NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+    # --- SUBSCRIPTIONS ---
+    def subscribe(self, callback):
+        """ Adds a subscriber and hands it the current list right away. """
+        with self.lock:
+            self.subscribers.append(callback)
+            devices = dict(self.devices)
+        callback(devices, [(s, None, state) for s, state in devices.items()])
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers: self.subscribers.remove(callback)
+
+    def online(self):
+        """ Serials ready for use (state 'device'). """
+        with self.lock:
+            return [s for s, state in self.devices.items() if state == "device"]
+
+    # --- STREAM ---
+    def start(self):
+        if not self.running:
+            self.running = True
+            threading.Thread(target=self._loop, name="device-tracker", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        sock = self._sock
+        if sock:
+            # shutdown() is what unblocks the reader thread
+            try: sock.shutdown(socket.SHUT_RDWR)
+            except OSError: pass
+            sock.close()
+
+    def _loop(self):
+        delay = self.RETRY_MIN
+        server_started = False
+        while self.running:
+            try:
+                self._sock = adb_client.track_devices()
+                delay, server_started = self.RETRY_MIN, False
+                while self.running:
+                    self._update(dict(adb_client.next_devices(self._sock)))
+                    self.ready.set()
+            except (OSError, AdbError):
+                pass
+            finally:
+                if self._sock: self._sock.close()
+                self._sock = None
+            if not self.running: break
+
+            # Server gone (or not started yet): so are its devices
+            self._update({})
+            if not server_started:
+                server_started = True
+                self._start_server()
+                continue
+            time.sleep(delay)
+            delay = min(delay * 2, self.RETRY_MAX)
+
+    def _start_server(self):
+        try:
+            subprocess.run([ADB_PATH, "start-server"], capture_output=True, timeout=30,
+                           creationflags=self.NO_WINDOW)
+        except Exception: pass
+
+    def _update(self, devices):
+        with self.lock:
+            old = self.devices
+            changes = [(s, old.get(s), devices.get(s)) for s in sorted(set(old) | set(devices))
+                       if old.get(s) != devices.get(s)]
+            if not changes: return
+            self.devices = devices
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try: callback(dict(devices), changes)
+            except Exception: pass
+
+# Shared instance (one stream for the whole app)
+tracker = DeviceTracker()
@@ -2,19 +2,113 @@ import subprocess
 import threading
 import queue
 import shlex
-import os
 import re
 import time
-from .config import ADB_PATH
+import socket
+from .config import (ADB_PATH, ENGINE_MAX_BATCH, ENGINE_BATCH_LATENCY, ENGINE_USE_HELPER,
+                     ENGINE_MAX_IN_FLIGHT, ENGINE_MAX_HOLD, ENGINE_QUEUE_MAX, ENGINE_PASTE_THRESHOLD,
+                     ENGINE_AUTO_RECONNECT, ENGINE_STANDBY_SHELL, ENGINE_RECONNECT_TIMEOUT, ENGINE_STANDBY_CHECK,
+                     ENGINE_LINK_PING_INTERVAL, ENGINE_CONNECT_TIMEOUT, WIZARD_TIMEOUT)
+from .input_helper import InputHelper
+from .batching import BatchingPolicy
+from .latency import LatencyTracer
+from .text_escape import input_text_commands, split_ascii_runs, unicode_broadcast
+from .adb_client import client as adb_client, AdbError
+from .transfer import FileBeam
+from .event_queue import EventQueue, Event, TEXT, KEYS, RAW
+from .watcher import watcher
+
+# "input keyevent 4" / "input keyevent 21 21 21" -> helper-routable
+KEYEVENT_RE = re.compile(r"^input keyevent (\d+(?: \d+)*)$")
+
+# Per-device answer to "does `input keyevent` take several keycodes?"
+# (Android 4.4+). Probed once per serial, kept across reconnects.
+_multi_keyevent = {}
+
+# Sentinel echoed back by the device shell once it has run what came before
+PING_PREFIX = "__KB_PING_"
+# Token a new shell echoes once it's up (see _spawn_shell)
+READY_TOKEN = "ready"
+
+def wait_until(check, timeout, first=0.05, cap=1.0):
+    """
+    Calls check() until it returns true or timeout (seconds) runs out,
+    sleeping first, 2*first, 4*first ... (at most cap) in between.
+    """
+    deadline = time.perf_counter() + timeout
+    delay = first
+    while True:
+        if check(): return True
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0: return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, cap)
+
+def probe_port(host, port, timeout=0.5):
+    """ True if something accepts TCP connections on host:port. """
+    try:
+        socket.create_connection((host, port), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
 
 class ADBEngine:
     def __init__(self, log_callback, status_callback):
         self.process = None
-        self.queue = queue.Queue()
+        self.queue = EventQueue(ENGINE_QUEUE_MAX)
         self.running = False
         self.log = log_callback
         self.update_status = status_callback
-        self.NO_WINDOW = subprocess.CREATE_NO_WINDOW
+        # Only exists on Windows (hides the black console window)
+        self.NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+        # Write coalescing (see _worker)
+        self.max_batch = ENGINE_MAX_BATCH
+        self.batch_latency = ENGINE_BATCH_LATENCY
+
+        # Optional on-device injector. Queued Events are written as a shell
+        # line or a helper line (see _forms) - the worker picks the helper
+        # form while the helper is alive.
+        self.use_helper = ENGINE_USE_HELPER
+        self.helper = InputHelper(log_callback, pong_callback=self._on_pong)
+        self.paste_threshold = ENGINE_PASTE_THRESHOLD
+        self._ime_hint_shown = False
+
+        # Performance counters and flow control. A sentinel echo rides along
+        # after every event. Its echo completes the event's traces and
+        # confirms every command written before it. The keystroke batcher's
+        # adaptive window is fed by link pings instead (see _link_ping): a
+        # sentinel's round trip includes the device running the event.
+        self.policy = BatchingPolicy()
+        self.link_ping_interval = ENGINE_LINK_PING_INTERVAL
+        self._link_token = None
+        self._last_link_ping = 0.0
+        self.tracer = LatencyTracer()
+        self.max_in_flight = ENGINE_MAX_IN_FLIGHT
+        self.max_hold = ENGINE_MAX_HOLD
+        self._sentinels = {}  # token -> (time sent, [KeyTrace] or None, commands written so far)
+        self._sentinel_lock = threading.Lock()
+        self._flow = threading.Condition(self._sentinel_lock) # Signalled when the device catches up
+        self._sentinel_seq = 0
+        self._written = 0     # Device commands written this session
+        self._acked = 0       # ... of which the device has confirmed running
+        self._unconfirmed = [] # [(commands written so far, Event)] not yet confirmed
+        self._write_lock = threading.RLock() # A batch vs. a shell swap (see _swap_shell)
+
+        # Link recovery (see _on_shell_lost)
+        self.auto_reconnect = ENGINE_AUTO_RECONNECT
+        self.standby_enabled = ENGINE_STANDBY_SHELL
+        self.reconnect_timeout = ENGINE_RECONNECT_TIMEOUT
+        self.standby_check = ENGINE_STANDBY_CHECK
+        self._probes = {}        # Echo token -> callback, for liveness checks (see _on_pong)
+        self.standby = None      # Pre-spawned shell, swapped in when the link drops
+        self.recovering = False
+        self.recoveries = []     # Seconds each recovery took
+        self.wizard_timings = [] # [(step, seconds)] of the last Wi-Fi wizard run
+        self.device_id = None    # Serial of the current session
+        self.beam = None         # Last FileBeam (file transfer)
+        self.multi_keyevent = False # Device takes `input keyevent 67 67 67` (see _probe_device)
+        self._drop_warned = 0.0
 
     # --- CONNECTION MANAGEMENT ---
     def connect(self, device_id):
@@ -27,37 +121,28 @@ class ADBEngine:
              device_id = f"{device_id}:5555"
              self._run_adb_silent(["connect", device_id])
 
-        cmd = [ADB_PATH, '-s', device_id, 'shell']
-        
         try:
-            # 1. Start the shell process
-            self.process = subprocess.Popen(
-                cmd, 
-                stdin=subprocess.PIPE, 
-                stdout=subprocess.DEVNULL, 
-                stderr=subprocess.PIPE,  # Capture errors to debug crashes
-                text=True, 
-                bufsize=0, # Unbuffered for speed
-                creationflags=self.NO_WINDOW
-            )
-            
-            # 2. IMMEDIATE HEALTH CHECK
-            # Wait 0.5s to see if it crashes immediately (common with bad wireless links)
-            try:
-                self.process.wait(timeout=0.5)
-                # If we are here, the process exited (Crashed)
-                stderr = self.process.stderr.read()
-                self.log(f"[!] Connection died immediately: {stderr.strip()}")
+            # 1. Start the shell process (and check it survives)
+            self.process, error = self._spawn_shell(device_id)
+            if self.process is None:
+                self.log(f"[!] Connection died immediately: {error}")
                 self.update_status(False)
                 return False
-            except subprocess.TimeoutExpired:
-                # Process is still running! This is good.
-                pass
 
+            self._reset_flow()
             self.running = True
-            threading.Thread(target=self._worker, daemon=True).start()
+            # Fresh queue per session, so a worker left over from the
+            # previous session can never steal (and reorder) new commands.
+            self.queue = EventQueue(ENGINE_QUEUE_MAX)
+            threading.Thread(target=self._worker, args=(self.queue,), daemon=True).start()
+            self.device_id = device_id
+            self._start_reader(self.process)
+            self.multi_keyevent = _multi_keyevent.get(device_id, False)
             self.log(f"[+] Connected to {device_id}")
             self.update_status(True)
+            if self.use_helper: self.helper.start(device_id)
+            threading.Thread(target=self._probe_device, args=(device_id,), daemon=True).start()
+            self._start_standby()
             return True
         except Exception as e:
             self.log(f"[!] Engine Error: {e}")
@@ -71,6 +156,16 @@ class ADBEngine:
         Used for Android 11+ connection without USB.
         """
         self.log(f"[*] Pairing with {ip_port}...")
+        try:
+            output = adb_client.pair(ip_port, code)
+            self.log(f"Pair Result: {output}")
+            return "successfully paired" in output.lower()
+        except AdbError as e:
+            self.log(f"Pair Result: {e}")
+            return False
+        except OSError:
+            pass # adb server not reachable: let the CLI start it
+
         try:
             res = subprocess.run(
                 [ADB_PATH, "pair", ip_port, code],
@@ -85,62 +180,106 @@ class ADBEngine:
             self.log(f"[!] Pairing error: {e}")
             return False
 
-    def setup_wireless_auto(self):
+    def setup_wireless_auto(self, port=5555):
         """ 
         The Smart Wizard: 
-        1. Find IP -> 2. Switch to TCP Mode -> 3. Wait -> 4. Connect -> 5. Verify 
+        1. Find IP -> 2. Switch to TCP Mode -> 3. Wait for port -> 4. Connect -> 5. Verify 
         """
-        def _sequence():
-            self.log("Step 1/4: Finding IP address...")
-            ip = self.get_device_ip()
-            
-            if not ip:
-                self.log("[!] IP not found. Connect phone to Wi-Fi.")
-                return
-            
-            # Warn if it looks like a USB tethering IP (often 192.0.0.x)
-            if ip.startswith("192.0.0"):
-                self.log(f"[⚠] Warning: {ip} looks like a USB Tethering IP.")
-                self.log("    Wireless mode might fail if you unplug USB.")
+        threading.Thread(target=self._wireless_sequence, args=(port,), daemon=True).start()
 
-            self.log(f"Step 2/4: Found IP {ip}. Enabling TCP Mode...")
-            self._run_adb_silent(["tcpip", "5555"])
-            
-            self.log("Step 3/4: Restarting ADB (Waiting 5s)...")
-            time.sleep(5) 
-            
-            target = f"{ip}:5555"
-            self.log(f"Step 4/4: Connecting to {target}...")
-            
-            # Connect
+    def _wireless_sequence(self, port):
+        """
+        Runs the wizard and returns [(step, seconds), ...]. Every wait is
+        event driven: it moves on the moment the phone answers, probing with
+        exponential backoff instead of fixed sleeps (WIZARD_TIMEOUT caps each).
+        """
+        timings = []
+        mark = [time.perf_counter()]
+        def _done(step):
+            now = time.perf_counter()
+            timings.append((step, now - mark[0]))
+            mark[0] = now
+
+        def _report():
+            total = sum(t for _, t in timings)
+            self.log("Wizard timing: " + " | ".join(f"{s} {t:.2f}s" for s, t in timings) + f" | total {total:.2f}s")
+            self.wizard_timings = timings
+            return timings
+
+        self.log("Step 1/5: Finding IP address...")
+        ip = self.get_device_ip()
+        _done("find IP")
+
+        if not ip:
+            self.log("[!] IP not found. Connect phone to Wi-Fi.")
+            return _report()
+
+        # Warn if it looks like a USB tethering IP (often 192.0.0.x)
+        if ip.startswith("192.0.0"):
+            self.log(f"[⚠] Warning: {ip} looks like a USB Tethering IP.")
+            self.log("    Wireless mode might fail if you unplug USB.")
+
+        self.log(f"Step 2/5: Found IP {ip}. Enabling TCP Mode...")
+        self._run_adb_silent(["tcpip", str(port)])
+        _done("tcpip")
+
+        # adbd restarts in TCP mode: go as soon as its port accepts connections
+        self.log(f"Step 3/5: Waiting for port {port}...")
+        # (a refused connect is cheap, so probe often)
+        if not wait_until(lambda: probe_port(ip, port), WIZARD_TIMEOUT, cap=0.25):
+            _done("port open")
+            self.log(f"[!] Phone never opened port {port}. Same Wi-Fi network?")
+            return _report()
+        _done("port open")
+
+        target = f"{ip}:{port}"
+        self.log(f"Step 4/5: Connecting to {target}...")
+
+        # Connect. The open port may still be the old adbd (phone already in
+        # TCP mode) about to restart, so retry until adb says "connected"
+        res = ""
+        def _connect():
+            nonlocal res
             res = self._run_adb_capture(["connect", target])
-            self.log(f"ADB Output: {res}")
-
-            if "connected" in res.lower():
-                # STABILIZATION CHECK
-                self.log(">>> Unplug USB now. Verifying link stability... <<<")
-                
-                # Retry loop to verify connection
-                success = False
-                for i in range(5):
-                    time.sleep(1)
-                    # Try to run a simple command
-                    check = self._run_adb_capture(["-s", target, "shell", "echo", "ok"])
-                    if "ok" in check:
-                        success = True
-                        break
-                    else:
-                        self.log(f"Stabilizing... ({i+1}/5)")
-
-                if success:
-                    self.log(f"SUCCESS: Link Stable. Starting Engine...")
-                    self.connect(target)
-                else:
-                    self.log("[!] Link unstable. Phone might be offline.")
-            else:
-                self.log(f"[!] Connection failed. Try manual mode.")
+            return "connected" in res.lower()
+        connected = wait_until(_connect, WIZARD_TIMEOUT, first=0.1, cap=0.5)
+        self.log(f"ADB Output: {res}")
+        _done("connect")
+
+        if not connected:
+            self.log(f"[!] Connection failed. Try manual mode.")
+            return _report()
+
+        # STABILIZATION CHECK: the server tells us when the device is online,
+        # then one round trip proves the shell works
+        self.log("Step 5/5: >>> Unplug USB now. Verifying link stability... <<<")
+        ok = (self._wait_for_device(target, WIZARD_TIMEOUT)
+              and wait_until(lambda: "ok" in self._run_adb_capture(["-s", target, "shell", "echo", "ok"]),
+                             WIZARD_TIMEOUT))
+        _done("device ready")
 
-        threading.Thread(target=_sequence, daemon=True).start()
+        if ok:
+            self.log(f"SUCCESS: Link Stable. Starting Engine...")
+            self.connect(target)
+            _done("start engine")
+        else:
+            self.log("[!] Link unstable. Phone might be offline.")
+        return _report()
+
+    def _wait_for_device(self, serial, timeout):
+        """ `adb wait-for-device`: blocks until the server sees it online. """
+        try:
+            return adb_client.wait_for_device(serial, timeout)
+        except AdbError:
+            return False
+        except OSError:
+            pass # Server not reachable: use the CLI
+        try:
+            subprocess.run([ADB_PATH, "-s", serial, "wait-for-device"], timeout=timeout,
+                           creationflags=self.NO_WINDOW)
+            return True
+        except Exception:
+            return False
 
     def connect_wireless_ip(self, ip):
         """ Manually connect to a specific IP """
@@ -174,55 +313,270 @@ class ADBEngine:
         return None
 
     # --- TEXT & FILE HANDLING ---
-    def send_text(self, text):
+    def send_text(self, text, traces=None):
         """ 
         Handles multi-line text by splitting into lines, 
         sanitizing characters, and pressing Enter between lines.
         OPTIMIZED: Does not log every keystroke to save CPU.
+        traces: optional [KeyTrace] for the keys that produced this text.
         """
         if not self.running or not text: return
+        items = []
 
         # 1. Split text into separate lines (preserving structure)
         lines = text.split('\n')
 
         for i, line in enumerate(lines):
-            # A. Sanitize specific line
-            # Escape backslashes first!
-            safe_line = str(line).replace("\\", "\\\\")
-            # Escape quotes
-            safe_line = safe_line.replace('"', '\\"').replace("'", "\\'")
-            # Escape shell metacharacters
-            for char in '()<>|;&*~`$#[]!':
-                safe_line = safe_line.replace(char, f"\\{char}")
-            # Replace spaces with %s (ADB magic)
-            safe_line = safe_line.replace(" ", "%s")
-
-            # B. Send the text content
-            if safe_line:
-                self.queue.put(f"input text {safe_line}")
+            for run, is_ascii in split_ascii_runs(line):
+                if is_ascii:
+                    # A. Send the text content (escaped when written, see _forms)
+                    items.append(Event(TEXT, run))
+                else:
+                    # Accents, CJK, emoji: `input text` can't type them. The
+                    # helper types them via its key map or a paste that puts
+                    # the user's clip back; without it, the ADBKeyboard IME
+                    # can. Same batch, same order.
+                    items.append(Event(RAW, shell=unicode_broadcast(run), helper=InputHelper.unicode_line(run)))
             
-            # C. If there are more lines coming, press ENTER to move down
+            # B. If there are more lines coming, press ENTER to move down
             if i < len(lines) - 1:
-                self.queue.put("input keyevent 66") # 66 = ENTER
+                items.append(Event(KEYS, ["66"])) # 66 = ENTER
+
+        # C. Long text: one helper line puts it on the device clipboard and
+        #    presses PASTE. The per-line commands stay as the shell form, in
+        #    case the helper isn't running when this gets written.
+        if len(text) >= self.paste_threshold and items:
+            items = [Event(RAW, shell="\n".join(self._forms(e)[0] for e in items), helper=InputHelper.paste_line(text))]
+
+        if traces and items:
+            self._stamp(traces)
+            items[-1].traces = traces
+        self._put(*items)
+
+    def _put(self, *events):
+        # One send's events go in together (see EventQueue.put_all)
+        if self.queue.put_all(events): return
+        # Queue full: the device is hopelessly behind, so new input is dropped
+        now = time.perf_counter()
+        if now - self._drop_warned > 5.0:
+            self._drop_warned = now
+            self.log(f"[!] Device can't keep up - dropping input ({self.queue.dropped} events so far)")
+
+    def queue_stats(self):
+        """ {depth, peak, merged, folded, dropped} of the command queue. """
+        return self.queue.stats()
+
+    def _stamp(self, traces):
+        now = time.perf_counter()
+        for t in traces: t.enqueued = now
 
     def push_file(self, local_path):
-        filename = os.path.basename(local_path)
-        remote_path = f"/sdcard/Download/{filename}"
-        self.log(f"[*] Sending {filename}...")
-        
-        def _push_thread():
-            self._run_adb_silent(["push", local_path, remote_path])
-            self.log(f"[+] Sent: {filename}")
-            
-        threading.Thread(target=_push_thread, daemon=True).start()
+        return self.push_files([local_path])
+
+    def push_files(self, paths, on_progress=None):
+        """ Sends files to Downloads in the background (see core/transfer.py). """
+        self.beam = FileBeam(self.log, self.device_id, on_progress=on_progress).push(paths)
+        return self.beam
+
+    def list_devices(self):
+        """ Serials of attached devices in the 'device' state. """
+        try:
+            return [serial for serial, state in adb_client.devices() if state == "device"]
+        except (OSError, AdbError):
+            pass
+        res = self._run_adb_capture(["devices"])
+        return [l.split()[0] for l in res.split("\n")[1:] if l.strip().endswith("device")]
+
+    def _spawn_shell(self, device_id):
+        """
+        Starts `adb -s device_id shell` and waits for it to echo READY_TOKEN.
+        Returns (process, None), or (None, error) if it dies first (common with
+        bad wireless links) or doesn't answer within ENGINE_CONNECT_TIMEOUT.
+        """
+        process = subprocess.Popen(
+            [ADB_PATH, '-s', device_id, 'shell'],
+            stdin=subprocess.PIPE, 
+            stdout=subprocess.PIPE,  # Ping echoes (see _reader)
+            stderr=subprocess.PIPE,  # Capture errors to debug crashes
+            text=True, 
+            bufsize=0, # Unbuffered for speed
+            creationflags=self.NO_WINDOW
+        )
+        ready = threading.Event()
+        def _await_ready():
+            # Only reader until it answers; _start_reader takes over after
+            try:
+                for line in process.stdout:
+                    if line.strip() == PING_PREFIX + READY_TOKEN:
+                        ready.set()
+                        return
+            except (OSError, ValueError): pass
+        threading.Thread(target=_await_ready, daemon=True).start()
+        try:
+            process.stdin.write(f"echo {PING_PREFIX}{READY_TOKEN}\n")
+            process.stdin.flush()
+        except OSError: pass
+        deadline = time.perf_counter() + ENGINE_CONNECT_TIMEOUT
+        while not ready.wait(0.01):
+            if process.poll() is not None:
+                return None, process.stderr.read().strip() # Crashed
+            if time.perf_counter() > deadline:
+                self._kill(process)
+                return None, f"no answer in {ENGINE_CONNECT_TIMEOUT:.0f}s"
+        return process, None
+
+    def _start_reader(self, process):
+        """ Reader for the sentinel echoes; the watcher reports the exit (see _on_shell_lost). """
+        threading.Thread(target=self._reader, args=(process,), daemon=True).start()
+        watcher.watch(process, self.device_id, self._on_shell_lost)
+
+    def _kill(self, process):
+        try: process.terminate()
+        except: pass
+
+    # --- LINK RECOVERY ---
+    # The watcher (core/watcher.py) sees the shell exit the moment the link
+    # drops. The worker pauses (input keeps queueing and merging), the standby
+    # shell (if it still answers) - or a fresh one - takes over, and what
+    # the device never confirmed is written again first, so nothing typed
+    # meanwhile is lost and capture mode stays on. Delivery is at-least-once:
+    # events the device ran whose echo the drop swallowed run twice - up to
+    # the in-flight window (ENGINE_MAX_IN_FLIGHT commands, plus the batch
+    # that crossed it).
+    def _on_shell_lost(self, process, reason=""):
+        """
+        A shell exited. Returns True if the session is over, False if it's
+        being recovered, None if it doesn't matter (see ProcessWatcher.watch).
+        """
+        if process is not None and process is self.standby:
+            self.standby = None # Spare died; the next swap spawns a fresh shell
+            return None
+        if process is not self.process or not self.running: return None # Stopped on purpose
+        if not self.auto_reconnect: return True # The UI disconnects
+        with self._sentinel_lock:
+            if self.recovering: return None
+            self.recovering = True
+        self.log(f"[!] Link lost ({reason}) - reconnecting..." if reason else "[!] Link lost - reconnecting...")
+        self._start_recovery(time.perf_counter())
+        return False
+
+    def _start_recovery(self, started):
+        threading.Thread(target=self._recover, args=(started,), daemon=True).start()
+
+    def _recover(self, started):
+        process, fresh = self.standby, False
+        self.standby = None
+        if not self._standby_alive(process):
+            if process: self._kill(process)
+            process, fresh = None, True
+            def _respawn():
+                nonlocal process
+                if not self.running: return True
+                try: process, _ = self._spawn_shell(self.device_id)
+                except OSError: pass
+                return process is not None
+            wait_until(_respawn, self.reconnect_timeout, first=0.1)
+        self._swap_shell(process, fresh, started)
+
+    def _swap_shell(self, process, fresh, started):
+        """
+        Puts process in place of the dead shell and replays what it never
+        confirmed. fresh: just spawned (a standby already has its reader).
+        """
+        if not self.running:
+            if process: self._kill(process)
+            return
+        if process is None:
+            self.recovering = False
+            self._room_changed()
+            self.log(f"[!] Device didn't come back within {self.reconnect_timeout:.0f}s")
+            watcher.notify(self.device_id, f"no shell within {self.reconnect_timeout:.0f}s", True)
+            return
+        with self._write_lock:
+            self.process = process
+            replay = self._take_unconfirmed()
+            self._reset_flow()
+            if fresh: self._start_reader(process)
+            # First, before anything the worker still has queued
+            if replay: self._write_events(replay)
+            self.recovering = False
+        self._room_changed()
+        seconds = time.perf_counter() - started
+        self.recoveries.append(seconds)
+        how = "new shell" if fresh else "standby shell"
+        self.log(f"[+] Reconnected in {seconds:.2f}s ({how}), {len(replay)} unconfirmed event(s) replayed")
+        if self.use_helper and not self.helper.alive(): self.helper.start(self.device_id)
+        self._start_standby()
+
+    def _standby_alive(self, process):
+        """ True if the spare shell is running and echoes back within standby_check. """
+        if process is None or process.poll() is not None: return False
+        token = self._probe_token()
+        answered = threading.Event()
+        self._probes[token] = answered.set
+        try:
+            process.stdin.write(f"echo {PING_PREFIX}{token}\n")
+            process.stdin.flush()
+            # Give up early if it dies meanwhile (it went down with the link)
+            deadline = time.perf_counter() + self.standby_check
+            while not answered.wait(0.01):
+                if process.poll() is not None or time.perf_counter() > deadline: return False
+            return True
+        except (OSError, ValueError):
+            return False
+        finally:
+            self._probes.pop(token, None)
+
+    def _probe_token(self, prefix="S"):
+        with self._sentinel_lock:
+            self._sentinel_seq += 1
+            return f"{prefix}{self._sentinel_seq}"
+
+    def _start_standby(self):
+        """ Pre-spawns the next shell in the background, so recovery is just a swap. """
+        if self.standby_enabled and self.auto_reconnect:
+            threading.Thread(target=self._spawn_standby, args=(self.device_id,), daemon=True).start()
+
+    def _spawn_standby(self, device_id):
+        try: process, _ = self._spawn_shell(device_id)
+        except OSError: return
+        if process is None: return
+        if not self.running or device_id != self.device_id or self.standby is not None:
+            self._kill(process)
+            return
+        self.standby = process
+        self._start_reader(process)
+
+    def _probe_device(self, device_id):
+        """ Checks once per device whether `input keyevent` accepts several keycodes.
+        Only an answer read from the usage text is cached: empty output, "device
+        offline" or "unauthorized" leave the device unprobed, so the next connect
+        asks again and single keycodes are used meanwhile. """
+        if device_id not in _multi_keyevent:
+            usage = self._run_adb_capture(["-s", device_id, "shell", "input 2>&1"])
+            keyevent = re.search(r"keyevent.*<key code[^>]*>.*", usage)
+            if not re.search(r"usage:", usage, re.IGNORECASE) or not keyevent: return
+            # Usage reads "keyevent [--longpress] <key code number or name> ..." when it does
+            _multi_keyevent[device_id] = keyevent.group(0).rstrip().endswith("...")
+        if self.device_id == device_id: self.multi_keyevent = _multi_keyevent[device_id]
 
     # --- CORE UTILS ---
+    # Both try the adb server socket first (no process spawn) and fall back
+    # to the adb binary for commands the client doesn't speak or when the
+    # server isn't running yet (the CLI starts it).
     def _run_adb_silent(self, args):
+        try:
+            if adb_client.run(args) is not None: return
+        except OSError: pass
         try:
             subprocess.run([ADB_PATH] + args, creationflags=self.NO_WINDOW)
         except: pass
 
     def _run_adb_capture(self, args):
+        try:
+            out = adb_client.run(args)
+            if out is not None: return out.strip()
+        except OSError: pass
         try:
             res = subprocess.run(
                 [ADB_PATH] + args, 
@@ -234,28 +588,242 @@ class ADBEngine:
         except: return ""
 
     # --- CORE WORKER ---
-    def _worker(self):
+    def _worker(self, q):
+        """
+        Drains everything pending into one ordered batch and sends it
+        with a single write + flush. A paste or a fast typist costs one
+        pipe write instead of one per command; the shell still runs the
+        lines in order.
+        """
         while self.running:
-            cmd = self.queue.get()
-            if cmd is None: break
+            self._wait_for_room()
+            batch, stop = self._drain_batch(q)
+            if batch: self._write_batch(batch)
+            if stop: break
+
+    # --- FLOW CONTROL ---
+    def in_flight(self):
+        """ Commands written to the device that it hasn't confirmed running yet. """
+        return self._written - self._acked
+
+    def device_lag(self):
+        """ Seconds the oldest unconfirmed batch has been waiting on the device (0 = caught up). """
+        with self._sentinel_lock:
+            if not self._sentinels: return 0.0
+            return time.perf_counter() - min(entry[0] for entry in self._sentinels.values())
+
+    def _reset_flow(self):
+        with self._sentinel_lock:
+            self._sentinels.clear()
+            self._unconfirmed = []
+            self._written = self._acked = 0
+
+    def _take_unconfirmed(self):
+        """
+        Events written but never confirmed by the device, in order. Some may
+        have run already (their echo was lost with the link): see LINK RECOVERY.
+        """
+        with self._sentinel_lock:
+            events = [e for _, e in self._unconfirmed]
+            self._unconfirmed = []
+        return events
+
+    def _wait_for_room(self):
+        """
+        Backpressure: while the device is max_in_flight commands behind (or
+        fewer, see BatchingPolicy.pipeline_depth), hold new input on the PC. It keeps queueing meanwhile and goes out
+        merged (see core/event_queue.py) once the device catches up, so a
+        burst costs a few long commands instead of a growing backlog of
+        short ones. Bounded by max_hold in case a sentinel never comes
+        back - but not while the shell is being replaced.
+        """
+        deadline = time.perf_counter() + self.max_hold
+        with self._flow:
+            while self.running and (self.recovering or self.in_flight() >= self.policy.pipeline_depth(self.max_in_flight)):
+                if self.recovering:
+                    self._flow.wait()
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0: break
+                self._flow.wait(remaining)
+
+    def _room_changed(self):
+        with self._flow: self._flow.notify_all()
+
+    def _forms(self, event):
+        """ (shell_line, helper_line, traces) for a queued Event. """
+        if event.kind == TEXT:
+            return (input_text_commands(event.payload), InputHelper.text_line(event.payload), event.traces)
+        if event.kind == KEYS:
+            codes = event.payload
+            if len(codes) == 1 or self.multi_keyevent:
+                shell = "input keyevent " + " ".join(codes)
+            else:
+                # Old `input`: one command per keycode
+                shell = "\n".join(f"input keyevent {c}" for c in codes)
+            return (shell, InputHelper.key_line(*codes), event.traces)
+        return (event.shell, event.helper, event.traces)
+
+    def _write_batch(self, batch):
+        """
+        Splits the batch into runs by destination (helper or shell) and
+        writes each run in one go, keeping the original order.
+        """
+        with self._write_lock:
+            self._write_events(batch)
+
+    def _write_events(self, events):
+        use_helper = self.helper.alive()
+        now = time.perf_counter()
+        idle = not self.in_flight() # Before this batch counts as in flight
+        ping = self._link_ping(now)
+        if ping: self._write_shell(ping)
+        runs = []
+        for event in events:
+            shell, helper, traces = self._forms(event)
+            to_helper = use_helper and helper is not None
+            # Every event gets its own sentinel: the echo confirms exactly
+            # this event (see _take_unconfirmed) and completes its traces.
+            # On an idle device, the first one also times the device.
+            token = self._next_sentinel(traces, 1 if to_helper else shell.count("\n") + 1, event, timed=idle)
+            idle = False
+            if runs and runs[-1][0] == to_helper: runs[-1][1].append((shell, helper, token))
+            else: runs.append((to_helper, [(shell, helper, token)]))
+            if traces:
+                for t in traces: t.written = now
+
+        for to_helper, items in runs:
+            if to_helper:
+                try:
+                    self.helper.write("".join(f"{h}\nP{token}\n" for _, h, token in items))
+                    continue
+                except Exception:
+                    # Helper died mid-session: send this run the slow way
+                    self.log("[!] Input helper lost. Falling back to shell input.")
+                    self.helper.stop()
+            data = "".join(f"{sh}\necho {PING_PREFIX}{token}\n" for sh, _, token in items)
+            if not self._ime_hint_shown and "ADB_INPUT_B64" in data:
+                self._ime_hint_shown = True
+                self.log("[*] Non-ASCII text without the input helper needs ADBKeyboard as the phone's keyboard.")
+            self._write_shell(data)
+
+    def _next_sentinel(self, traces, commands, event, timed=False):
+        """
+        Registers the sentinel that follows event (`commands` device
+        commands). timed: nothing runs ahead of it, so its round trip less
+        the link's is the device's time for these commands.
+        """
+        now = time.perf_counter()
+        with self._sentinel_lock:
+            # Forget sentinels whose echo got lost (e.g. the helper died);
+            # a later echo still confirms their commands
+            for token, entry in list(self._sentinels.items()):
+                if now - entry[0] > 5.0: del self._sentinels[token]
+            self._sentinel_seq += 1
+            token = str(self._sentinel_seq)
+            self._written += commands
+            self._sentinels[token] = (now, traces or None, self._written, commands if timed else 0)
+            self._unconfirmed.append((self._written, event))
+        return token
+
+    def _link_ping(self, now):
+        """
+        A bare echo for the shell if the device is idle and the last one
+        is link_ping_interval old, else "". Its round trip is the link
+        alone (nothing queued ahead of it on the device) and feeds the
+        batch window.
+        """
+        if self.in_flight() or now - self._last_link_ping < self.link_ping_interval: return ""
+        self._last_link_ping = now
+        if self._link_token: self._probes.pop(self._link_token, None) # Never answered
+        token = self._link_token = self._probe_token("L")
+        self._probes[token] = lambda: self.policy.observe_latency(time.perf_counter() - now)
+        return f"echo {PING_PREFIX}{token}\n"
+
+    def _on_pong(self, token):
+        probe = self._probes.pop(token, None)
+        if probe:
+            probe()
+            return
+        with self._sentinel_lock:
+            entry = self._sentinels.pop(token, None)
+            if entry is not None:
+                self._acked = max(self._acked, entry[2])
+                while self._unconfirmed and self._unconfirmed[0][0] <= self._acked:
+                    self._unconfirmed.pop(0)
+        if entry is None: return
+        self._room_changed()
+        sent, traces, _, timed = entry
+        now = time.perf_counter()
+        if timed: self.policy.observe_device(max(0.0, now - sent - self.policy.latency) / timed)
+        if traces:
+            for t in traces: self.tracer.record(t, now)
+
+    def _reader(self, process):
+        """ Drains the shell's stdout (so it can never fill up) and picks up pings. """
+        try:
+            for line in process.stdout:
+                if line.startswith(PING_PREFIX): self._on_pong(line.strip()[len(PING_PREFIX):])
+        except: pass
+
+    def _write_shell(self, data):
+        try:
+            if self.process and self.process.poll() is None:
+                self.process.stdin.write(data)
+                self.process.stdin.flush()
+            elif self.auto_reconnect:
+                self._on_shell_lost(self.process) # Replayed once a new shell is up
+            else:
+                self.running = False
+                self.update_status(False)
+        except: pass
+
+    def _drain_batch(self, q):
+        """
+        Blocks for the first command, then takes whatever else is pending
+        (up to max_batch), waiting at most batch_latency for stragglers.
+        Returns (batch, stop) - stop is True once the None sentinel is seen.
+        """
+        cmd = q.get()
+        if cmd is None: return [], True
+
+        batch = [cmd]
+        deadline = time.perf_counter() + self.batch_latency
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
             try:
-                if self.process and self.process.poll() is None:
-                    self.process.stdin.write(cmd + "\n")
-                    self.process.stdin.flush()
+                if remaining > 0:
+                    cmd = q.get(timeout=remaining)
                 else:
-                    self.running = False
-                    self.update_status(False)
-            except: pass
+                    cmd = q.get_nowait()
+            except queue.Empty:
+                break
+            if cmd is None: return batch, True
+            batch.append(cmd)
+        return batch, False
 
-    def send_cmd(self, adb_cmd):
-        if self.running: self.queue.put(adb_cmd)
+    def send_cmd(self, adb_cmd, traces=None):
+        if not self.running: return
+        match = KEYEVENT_RE.match(adb_cmd)
+        event = Event(KEYS, match.group(1).split()) if match else Event(RAW, shell=adb_cmd)
+        if traces:
+            self._stamp(traces)
+            event.traces = traces
+        self._put(event)
 
     def stop(self):
         self.running = False
+        self.recovering = False
+        self.queue.put(None) # Wake the worker so it exits
+        self._room_changed()
         self.update_status(False)
+        self.helper.stop()
         if self.process:
             self.process.terminate()
             self.process = None
+        standby, self.standby = self.standby, None
+        if standby: self._kill(standby)
 
     def check_health(self):
-        return self.process is not None and self.process.poll() is None
\ No newline at end of file
+        """ True while the shell is up - or being replaced (see _on_shell_lost). """
+        return self.recovering or (self.process is not None and self.process.poll() is None)
\ No newline at end of file
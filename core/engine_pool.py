@@ -0,0 +1,132 @@
+import json
+import threading
+from .engine import ADBEngine
+from .batching import BatchingPolicy
+from .latency import KeyTrace
+
+class EnginePool:
+    """
+    Broadcast typing: one ADBEngine per device, each with its own queue,
+    worker and shell/helper session, so a slow phone only delays itself.
+    Every batch from the input processor is handed to all of them at once.
+
+    Quacks like ADBEngine for the parts the batcher and UI use
+    (running, policy, tracer, send_text, send_cmd, stop, check_health).
+    """
+    def __init__(self, log_callback, status_callback, engine_class=ADBEngine):
+        self.log = log_callback
+        self.update_status = status_callback
+        self.engine_class = engine_class
+        self.engines = {} # serial -> ADBEngine
+        # The batcher's window follows the slowest link (see _sync_policy)
+        self.policy = BatchingPolicy()
+        self.tracer = PoolTracer(self)
+
+    # --- CONNECTION MANAGEMENT ---
+    def connect(self, device_ids):
+        """ Connects to all devices in parallel. Returns the serials that came up. """
+        self.stop()
+        results = {}
+
+        def _connect(serial):
+            engine = self.engine_class(lambda msg, *level, s=serial: self.log(f"[{s}] {msg}", *level), lambda *a: None)
+            if engine.connect(serial): results[serial] = engine
+
+        threads = [threading.Thread(target=_connect, args=(d.strip(),), daemon=True) for d in device_ids]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+        # Keep the caller's device order
+        self.engines = {d.strip(): results[d.strip()] for d in device_ids if d.strip() in results}
+        self.log(f"[+] Broadcasting to {len(self.engines)}/{len(device_ids)} device(s)")
+        self.update_status(bool(self.engines))
+        return list(self.engines)
+
+    @property
+    def running(self):
+        return any(e.running for e in self.engines.values())
+
+    def check_health(self):
+        """ True while at least one device is still connected. """
+        return any(e.check_health() for e in self.engines.values())
+
+    def stop(self):
+        for engine in self.engines.values(): engine.stop()
+        self.engines = {}
+        self.update_status(False)
+
+    # --- FAN OUT ---
+    def _sync_policy(self):
+        alive = [e.policy.latency for e in self.engines.values() if e.running]
+        if alive: self.policy.latency = max(alive)
+
+    @staticmethod
+    def _copy_traces(traces):
+        # Each device stamps its own write/completion times
+        if not traces: return None
+        copies = []
+        for t in traces:
+            c = KeyTrace(t.pressed)
+            c.dequeued = t.dequeued
+            copies.append(c)
+        return copies
+
+    def send_text(self, text, traces=None):
+        self._sync_policy()
+        for engine in self.engines.values():
+            engine.send_text(text, self._copy_traces(traces))
+
+    def send_cmd(self, adb_cmd, traces=None):
+        self._sync_policy()
+        for engine in self.engines.values():
+            engine.send_cmd(adb_cmd, self._copy_traces(traces))
+
+    # --- HEALTH ---
+    def device_lag(self):
+        """ Worst device's lag (see ADBEngine.device_lag). """
+        return max((e.device_lag() for e in self.engines.values() if e.running), default=0.0)
+
+    @property
+    def recovering(self):
+        """ True while any device's shell is being replaced (see ADBEngine link recovery). """
+        return any(e.recovering for e in self.engines.values())
+
+    def health(self):
+        """ {serial: {alive, recovering, queued, dropped, in_flight, lag_s, rtt_ms, p95_ms}} for every device. """
+        report = {}
+        for serial, engine in self.engines.items():
+            total = engine.tracer.histograms["total"]
+            report[serial] = {
+                "alive": engine.check_health(),
+                "recovering": engine.recovering,
+                "queued": engine.queue.qsize(),
+                "dropped": engine.queue.dropped,
+                "in_flight": engine.in_flight(),
+                "lag_s": round(engine.device_lag(), 2),
+                "rtt_ms": round(engine.policy.latency * 1000, 1),
+                "p95_ms": round(total.percentile(95) * 1000, 1),
+            }
+        return report
+
+class PoolTracer:
+    """ Per-device latency view over the pool's engines (same API as LatencyTracer). """
+    def __init__(self, pool):
+        self.pool = pool
+
+    def summary(self):
+        return {serial: e.tracer.summary() for serial, e in self.pool.engines.items()}
+
+    def status_text(self):
+        health = self.pool.health()
+        if not health: return ""
+        alive = sum(1 for h in health.values() if h["alive"])
+        worst = max(health.items(), key=lambda kv: kv[1]["p95_ms"])
+        return f"{alive}/{len(health)} devices | worst p95 {worst[1]['p95_ms']:.0f}ms ({worst[0]})"
+
+    def to_json(self):
+        return json.dumps({"unit": "ms", "devices": self.summary(), "health": self.pool.health()},
+                          indent=2, sort_keys=True)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json())
@@ -0,0 +1,137 @@
+import collections
+import queue
+import threading
+
+# Event kinds
+TEXT = "text" # payload: the text (ASCII, one line)
+KEYS = "keys" # payload: [keycode, ...] as strings
+RAW = "raw"   # payload: None - shell/helper forms are given as is
+
+# Backspace: folds into still-queued text instead of going to the device
+KEYCODE_DEL = "67"
+
+class Event:
+    """
+    One queued device action. TEXT and KEYS are formatted into shell and
+    helper lines only when written (see ADBEngine._forms), so queued runs
+    can still merge. RAW events carry both forms ready made (helper None
+    = shell only).
+    """
+    __slots__ = ("kind", "payload", "shell", "helper", "traces")
+
+    def __init__(self, kind, payload=None, shell=None, helper=None, traces=None):
+        self.kind = kind
+        self.payload = payload
+        self.shell = shell
+        self.helper = helper
+        self.traces = traces
+
+    def add_traces(self, traces):
+        if traces: self.traces = (self.traces or []) + traces
+
+class EventQueue:
+    """
+    Bounded FIFO of Events between the senders (batcher, UI) and the
+    engine's worker. Anything still waiting is fair game:
+      - adjacent text runs merge into one (up to max_text chars)
+      - adjacent keycodes merge into one run (up to max_keys)
+      - Backspace after queued text deletes from that text instead
+    When the queue is full and the new event can't merge, it's dropped
+    (counted), so a stalled device can't pile up unbounded input. Once
+    dropping, everything new is dropped until the queue is half empty:
+    the lost input is one gap, not scattered keys (e.g. Enters whose
+    text was dropped). put_all() queues one send's events as a unit, so
+    drops fall between sends, never inside a paste or macro.
+
+    get()/get_nowait() raise queue.Empty like queue.Queue. None is the
+    worker's stop signal and is never merged or dropped.
+    """
+    def __init__(self, maxsize, max_text=1000, max_keys=64):
+        self.maxsize = maxsize
+        self.max_text = max_text
+        self.max_keys = max_keys
+        self.items = collections.deque()
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock)
+        # Counters
+        self.merged = 0   # Events merged into a queued one
+        self.folded = 0   # Backspaces applied to queued text
+        self.dropped = 0  # Events dropped because the queue was full
+        self.peak = 0     # Deepest the queue has been
+        self.overflow = False
+
+    # --- PRODUCER ---
+    def put(self, event):
+        """ Queues (or merges) event. Returns False if it was dropped. """
+        return self.put_all([event])
+
+    def put_all(self, events):
+        """
+        Queues (or merges) events in order, all or none: the bound is only
+        checked for the first, so one long send can take the queue past
+        maxsize rather than arrive cut short. Returns False if dropped.
+        """
+        if not events: return True
+        with self.lock:
+            if events[0] is not None:
+                if self.overflow and len(self.items) > self.maxsize // 2:
+                    self.dropped += len(events)
+                    return False
+                self.overflow = False
+            for i, event in enumerate(events):
+                if event is not None and self.items and self._absorb(self.items[-1], event):
+                    continue
+                if i == 0 and event is not None and len(self.items) >= self.maxsize:
+                    self.overflow = True
+                    self.dropped += len(events)
+                    return False
+                self.items.append(event)
+            self.peak = max(self.peak, len(self.items))
+            self.ready.notify()
+        self._wake()
+        return True
+
+    def _absorb(self, tail, event):
+        """ Merges event into the queued tail if it can. Called with the lock held. """
+        if tail is None: return False
+        if tail.kind == TEXT and event.kind == TEXT:
+            if len(tail.payload) + len(event.payload) > self.max_text: return False
+            tail.payload += event.payload
+        elif tail.kind == KEYS and event.kind == KEYS:
+            if len(tail.payload) + len(event.payload) > self.max_keys: return False
+            tail.payload = tail.payload + event.payload
+        elif tail.kind == TEXT and event.kind == KEYS:
+            # Backspaces only, and the text must not vanish (its traces ride on it)
+            if any(c != KEYCODE_DEL for c in event.payload) or len(event.payload) >= len(tail.payload):
+                return False
+            tail.payload = tail.payload[:-len(event.payload)]
+            self.folded += len(event.payload)
+            tail.add_traces(event.traces)
+            return True
+        else:
+            return False
+        tail.add_traces(event.traces)
+        self.merged += 1
+        return True
+
+    def _wake(self):
+        """ Hook for consumers that don't wait on the Condition (see LoopQueue). """
+
+    # --- CONSUMER ---
+    def get(self, timeout=None):
+        with self.ready:
+            if not self.ready.wait_for(lambda: self.items, timeout): raise queue.Empty
+            return self.items.popleft()
+
+    def get_nowait(self):
+        with self.lock:
+            if not self.items: raise queue.Empty
+            return self.items.popleft()
+
+    def qsize(self):
+        return len(self.items)
+
+    def stats(self):
+        with self.lock:
+            return {"depth": len(self.items), "peak": self.peak, "merged": self.merged,
+                    "folded": self.folded, "dropped": self.dropped}
@@ -0,0 +1,124 @@
+import base64
+import subprocess
+import threading
+import os
+from .config import ADB_PATH
+from .utils import resource_path
+
+# Built from helper/KeyBridgeHelper.java (see build notes there)
+HELPER_LOCAL = resource_path(os.path.join("assets", "kbhelper.jar"))
+HELPER_REMOTE = "/data/local/tmp/kbhelper.jar"
+HELPER_CLASS = "com.keybridge.KeyBridgeHelper"
+
+class InputHelper:
+    """
+    One long-lived app_process on the phone that injects text/key events.
+    The stock `input` command starts a fresh JVM for every line (hundreds
+    of ms each); the helper pays that once per session.
+
+    Protocol (one event per line on stdin):
+        T<text>     type text
+        K<codes>    key events, space separated
+        V<base64>   bulk paste: sets the device clipboard, presses PASTE
+        U<base64>   accents/CJK/emoji: typed via the key map if it can, else pasted
+        P<token>    ping, echoed back as P<token> once earlier events are injected
+        Q           quit
+
+    Pastes restore the user's previous clip once PASTE was handled (see
+    helper/KeyBridgeHelper.java for what can still leak).
+    """
+    def __init__(self, log_callback, pong_callback=None):
+        self.log = log_callback
+        self.on_pong = pong_callback
+        self.process = None
+        self.ready = False
+        self.session = 0 # Bumped on stop() so a late launch knows it's stale
+        self.NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+    @staticmethod
+    def available():
+        """ True if the helper jar was bundled with this build. """
+        return os.path.exists(HELPER_LOCAL)
+
+    def start(self, device_id):
+        """ Pushes + launches the helper in the background. Use alive() to check. """
+        self.stop()
+        if not self.available(): return False
+        threading.Thread(target=self._launch, args=(device_id, self.session), daemon=True).start()
+        return True
+
+    def _launch(self, device_id, session):
+        try:
+            subprocess.run(
+                [ADB_PATH, "-s", device_id, "push", HELPER_LOCAL, HELPER_REMOTE],
+                capture_output=True,
+                creationflags=self.NO_WINDOW
+            )
+            if session != self.session: return
+            proc = subprocess.Popen(
+                [ADB_PATH, "-s", device_id, "shell",
+                 f"CLASSPATH={HELPER_REMOTE}", "app_process", "/", HELPER_CLASS],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+                creationflags=self.NO_WINDOW
+            )
+            self.process = proc
+
+            # First line is READY once InputManager is reachable
+            first = proc.stdout.readline().strip()
+            if first != "READY" or session != self.session:
+                if session == self.session:
+                    self.log(f"[!] Input helper failed to start: {first or 'no output'}")
+                proc.terminate()
+                return
+            self.ready = True
+            self.log("[+] Input helper active (fast typing)")
+
+            for line in proc.stdout:
+                if line.startswith("P") and self.on_pong: self.on_pong(line[1:].strip())
+                elif line.startswith("ERR"): self.log(f"[helper] {line.strip()}")
+        except Exception as e:
+            self.log(f"[!] Input helper error: {e}")
+        if session == self.session: self.ready = False
+
+    def alive(self):
+        return self.ready and self.process is not None and self.process.poll() is None
+
+    def write(self, data):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    # --- PROTOCOL ---
+    @staticmethod
+    def text_line(text):
+        # A stray \r would end the line early on the Java side
+        return "T" + text.replace("\r", "")
+
+    @staticmethod
+    def paste_line(text):
+        # Base64 keeps newlines and anything else on one protocol line
+        data = text.replace("\r\n", "\n").encode("utf-8")
+        return "V" + base64.b64encode(data).decode("ascii")
+
+    @staticmethod
+    def unicode_line(text):
+        return "U" + base64.b64encode(text.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def key_line(*codes):
+        return "K" + " ".join(str(c) for c in codes)
+
+    def stop(self):
+        self.ready = False
+        self.session += 1
+        if self.process:
+            try:
+                self.process.stdin.write("Q\n")
+                self.process.stdin.flush()
+            except: pass
+            self.process.terminate()
+            self.process = None
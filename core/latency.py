@@ -0,0 +1,103 @@
+import json
+import math
+import threading
+import time
+
+# Pipeline stages a keystroke goes through (see KeyTrace)
+STAGES = ("capture", "batching", "engine_queue", "device", "total")
+
+class KeyTrace:
+    """
+    Timestamps (time.perf_counter) of one key on its way to the phone:
+      pressed   - pynput callback (_handle_input_press)
+      dequeued  - picked up by the batcher (_input_processor_loop)
+      enqueued  - handed to the engine (send_text / send_cmd)
+      written   - written to the device pipe (_worker)
+    Device completion comes from the sentinel echo that follows the write.
+    """
+    __slots__ = ("pressed", "dequeued", "enqueued", "written")
+
+    def __init__(self, pressed):
+        self.pressed = pressed
+        self.dequeued = self.enqueued = self.written = None
+
+class Histogram:
+    """
+    Log-bucketed latency histogram: constant memory, O(1) record,
+    percentiles accurate to one bucket (~10%).
+    """
+    BASE = 0.0001   # 0.1 ms
+    GROWTH = 1.1
+    BUCKETS = 150   # up to ~0.1ms * 1.1^150 = 160 s
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.total = 0
+        self.max = 0.0
+        self._log_growth = math.log(self.GROWTH)
+
+    def record(self, seconds):
+        if seconds <= self.BASE: i = 0
+        else: i = min(int(math.log(seconds / self.BASE) / self._log_growth) + 1, self.BUCKETS - 1)
+        self.counts[i] += 1
+        self.total += 1
+        if seconds > self.max: self.max = seconds
+
+    def percentile(self, p):
+        """ Upper edge of the bucket holding the p-th percentile (seconds). """
+        if not self.total: return 0.0
+        rank = math.ceil(self.total * p / 100.0)
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank: return min(self.BASE * self.GROWTH ** i, self.max)
+        return self.max
+
+class LatencyTracer:
+    """ Per-stage histograms for KeyTraces completed by the engine. """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {stage: Histogram() for stage in STAGES}
+            self.started = time.time()
+
+    def record(self, trace, done):
+        """ Called once the device has echoed the sentinel after `trace`. """
+        if trace.written is None: return
+        with self.lock:
+            h = self.histograms
+            h["capture"].record(trace.dequeued - trace.pressed)
+            h["batching"].record(trace.enqueued - trace.dequeued)
+            h["engine_queue"].record(trace.written - trace.enqueued)
+            h["device"].record(done - trace.written)
+            h["total"].record(done - trace.pressed)
+
+    def summary(self):
+        """ {stage: {count, p50, p95, p99, max}} with times in milliseconds. """
+        with self.lock:
+            return {
+                stage: {
+                    "count": h.total,
+                    "p50": round(h.percentile(50) * 1000, 2),
+                    "p95": round(h.percentile(95) * 1000, 2),
+                    "p99": round(h.percentile(99) * 1000, 2),
+                    "max": round(h.max * 1000, 2),
+                }
+                for stage, h in self.histograms.items()
+            }
+
+    def status_text(self):
+        total = self.histograms["total"]
+        if not total.total: return ""
+        return f"lag p50 {total.percentile(50) * 1000:.0f}ms / p95 {total.percentile(95) * 1000:.0f}ms"
+
+    def to_json(self):
+        return json.dumps({"since": self.started, "unit": "ms", "stages": self.summary()},
+                          indent=2, sort_keys=True)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_json())
@@ -0,0 +1,164 @@
+"""
+Folder mirror: keeps a phone folder in step with a PC folder, sending
+only what's new or changed (optionally deleting what's gone).
+
+    python -m core.mirror C:\\Photos /sdcard/Pictures/PC [--serial X] [--delete] [--dry-run]
+"""
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from .config import ADB_PATH, TRANSFER_PARALLEL
+from .adb_client import client as adb_client
+from .transfer import FileBeam, Manifest
+
+# Paths per `rm` command when deleting (keeps each command line modest)
+RM_BATCH = 200
+
+def local_index(root):
+    """ {relative/path: (size, mtime)} for every file under root (os.scandir: on Windows the sizes come with the listing). """
+    index = {}
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try: entries = os.scandir(os.path.join(root, rel_dir))
+        except OSError: continue
+        with entries:
+            for e in entries:
+                rel = f"{rel_dir}/{e.name}" if rel_dir else e.name
+                try:
+                    if e.is_dir(follow_symlinks=False): stack.append(rel)
+                    elif e.is_file():
+                        st = e.stat()
+                        index[rel] = (st.st_size, int(st.st_mtime))
+                except OSError: pass
+    return index
+
+def parse_listing(output, remote_root):
+    """ Parses `stat -c '%s %Y %n'` lines into {relative/path: (size, mtime)}. """
+    prefix = remote_root.rstrip("/") + "/"
+    index = {}
+    for line in output.splitlines():
+        parts = line.split(" ", 2)
+        if len(parts) != 3 or not parts[2].startswith(prefix): continue
+        # toybox find prints "root//name" when the root ends in "/"
+        try: index[parts[2][len(prefix):].lstrip("/")] = (int(parts[0]), int(parts[1]))
+        except ValueError: pass
+    return index
+
+def diff(local, remote, delete=False):
+    """ (to_push, to_delete, unchanged_count). Same size + mtime = unchanged. """
+    push = sorted(rel for rel, meta in local.items() if remote.get(rel) != meta)
+    gone = sorted(rel for rel in remote if rel not in local) if delete else []
+    return push, gone, len(local) - len(push)
+
+class FolderMirror:
+    """
+    One mirror pass: index the local tree, list the remote tree in one
+    shell round trip (find + stat), push the delta over FileBeam's
+    parallel sync sessions, then optionally delete what's gone.
+    Pushed files keep their PC mtime on the phone, so the next pass
+    sees them as unchanged.
+    """
+    def __init__(self, log_callback, serial=None, delete=False, parallel=TRANSFER_PARALLEL, on_progress=None):
+        self.log = log_callback
+        self.serial = serial
+        self.delete = delete
+        self.parallel = parallel
+        self.on_progress = on_progress
+        self.beam = None
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+        if self.beam: self.beam.cancel()
+
+    # --- DEVICE SHELL ---
+    def _shell(self, command):
+        try:
+            return adb_client.shell(self.serial, command)
+        except OSError:
+            pass # Server not reachable: let the CLI start it
+        cmd = [ADB_PATH] + (["-s", self.serial] if self.serial else []) + ["shell", command]
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True, errors="replace",
+                                  creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)).stdout
+        except OSError:
+            return ""
+
+    def remote_index(self, remote_root):
+        # Trailing "/" so find descends into a symlinked root (/sdcard is one)
+        q = shlex.quote(remote_root.rstrip("/") + "/")
+        return parse_listing(self._shell(f"find {q} -type f -exec stat -c '%s %Y %n' {{}} + 2>/dev/null"),
+                             remote_root)
+
+    # --- PASS ---
+    def plan(self, local_root, remote_root):
+        t0 = time.perf_counter()
+        local = local_index(local_root)
+        t1 = time.perf_counter()
+        remote = self.remote_index(remote_root)
+        t2 = time.perf_counter()
+        push, gone, unchanged = diff(local, remote, self.delete)
+        self.log(f"[*] Mirror: {len(local)} local / {len(remote)} on phone -> {len(push)} to send, "
+                 f"{len(gone)} to delete, {unchanged} unchanged "
+                 f"(scan {t1 - t0:.2f}s, listing {t2 - t1:.2f}s)")
+        return push, gone, unchanged
+
+    def run(self, local_root, remote_root, dry_run=False):
+        """ Blocking. Returns {sent, deleted, unchanged, failed, seconds}. """
+        start = time.perf_counter()
+        remote_root = remote_root.rstrip("/")
+        push, gone, unchanged = self.plan(local_root, remote_root)
+        result = {"to_send": len(push), "to_delete": len(gone), "unchanged": unchanged,
+                  "sent": 0, "deleted": 0, "failed": 0}
+        if dry_run: return dict(result, seconds=round(time.perf_counter() - start, 3))
+
+        if push and not self.cancelled.is_set():
+            pairs = [(os.path.join(local_root, *rel.split("/")), f"{remote_root}/{rel}") for rel in push]
+            # The diff already decided what changed: no per-file manifest check
+            self.beam = FileBeam(self.log, self.serial, self.parallel, manifest=Manifest(None),
+                                 on_progress=self.on_progress, skip_unchanged=False).push_pairs(pairs)
+            self.beam.wait()
+            stats = self.beam.stats()
+            result["sent"], result["failed"] = stats["sent"], stats["failed"]
+
+        for i in range(0, len(gone), RM_BATCH):
+            if self.cancelled.is_set(): break
+            batch = gone[i:i + RM_BATCH]
+            self._shell("rm -f " + " ".join(shlex.quote(f"{remote_root}/{rel}") for rel in batch))
+            result["deleted"] += len(batch)
+        if gone: self.log(f"[-] Mirror: deleted {result['deleted']} file(s) on the phone")
+
+        result["seconds"] = round(time.perf_counter() - start, 3)
+        return result
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Mirror a PC folder to a phone folder over adb.")
+    ap.add_argument("local")
+    ap.add_argument("remote")
+    ap.add_argument("--serial", help="device serial (default: the only device)")
+    ap.add_argument("--delete", action="store_true", help="delete phone files missing on the PC")
+    ap.add_argument("--dry-run", action="store_true", help="only show what would change")
+    ap.add_argument("--parallel", type=int, default=TRANSFER_PARALLEL)
+    args = ap.parse_args(argv)
+
+    def progress(st):
+        done = st["sent"] + st["failed"]
+        print(f"\r  {done}/{st['files']} files, {st['rate_bps'] / 1e6:.1f} MB/s", end="", flush=True)
+
+    mirror = FolderMirror(print, args.serial, args.delete, args.parallel, on_progress=progress)
+    try:
+        result = mirror.run(args.local, args.remote, args.dry_run)
+    except KeyboardInterrupt:
+        mirror.cancel()
+        return 130
+    print()
+    print(" ".join(f"{k}={v}" for k, v in result.items()))
+    return 1 if result["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
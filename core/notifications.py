@@ -1,84 +1,317 @@
 import threading
 import subprocess
+import hashlib
+import socket
 import time
 import re
-from plyer import notification
+from collections import OrderedDict
+from .adb_client import client as adb_client, AdbError
+from .watcher import watcher
+
+# Only the dumpsys lines the parser needs (filtered on the phone, not here)
+NOTIF_FILTER = "NotificationRecord|tickerText=|android.title=|android.text=|when=|postTime=|mCreationTimeMs="
+END_MARKER = "__KB_NOTIF_END__"
+
+# Streaming mode: sleeps in logcat until the system logs a new notification,
+# then prints one filtered dump followed by END_MARKER. Nothing is sent
+# (or run) while nothing happens.
+STREAM_SCRIPT = (
+    "logcat -b events -v brief -T 1 notification_enqueue:I '*:S' | "
+    f"while read -r _; do dumpsys notification --noredact | grep -E '{NOTIF_FILTER}'; echo {END_MARKER}; done"
+)
+POLL_CMD = f"dumpsys notification --noredact | grep -E '{NOTIF_FILTER}'"
+
+# Adaptive polling (fallback): back off while nothing changes
+POLL_MIN = 1.0
+POLL_MAX = 10.0
+
+# --- PARSER ---
+# "NotificationRecord(0x0abc: pkg=com.whatsapp user=... key=0|com.whatsapp|1|null|10123: Notification(...)"
+RECORD_RE = re.compile(r"NotificationRecord\(.*?pkg=([\w.]+)(?:.*?key=([^\s:]+))?")
+FIELDS = frozenset(("tickerText", "android.title", "android.text", "when", "postTime", "mCreationTimeMs"))
+# Extras are dumped as "String (Hello)" / "SpannableString (Hello)"
+WRAPPED_RE = re.compile(r"^\w*String \((.*)\)$")
+
+class NotificationParser:
+    """
+    Incremental `dumpsys notification` parser: feed() it lines as they
+    arrive, end() after the last one. Calls on_record(record) for every
+    NotificationRecord with something to show. Records are dicts with
+    pkg, key, time, ticker, title, text (missing fields are None).
+    """
+    def __init__(self, on_record):
+        self.on_record = on_record
+        self.record = None
+
+    def feed(self, line):
+        if "NotificationRecord(" in line:
+            self.end()
+            match = RECORD_RE.search(line)
+            if match:
+                self.record = {"pkg": match.group(1), "key": match.group(2), "time": None,
+                               "ticker": None, "title": None, "text": None}
+            return
+        if self.record is None: return
+        field, sep, value = line.strip().partition("=")
+        if not sep or field not in FIELDS or value in ("", "null"): return
+
+        rec = self.record
+        if field == "tickerText": rec["ticker"] = value
+        elif field == "android.title": rec["title"] = self._unwrap(value)
+        elif field == "android.text": rec["text"] = self._unwrap(value)
+        elif rec["time"] is None: rec["time"] = value # First of when/postTime/mCreationTimeMs
+
+    def end(self):
+        rec, self.record = self.record, None
+        if rec and (rec["ticker"] or rec["text"]): self.on_record(rec)
+
+    @staticmethod
+    def _unwrap(value):
+        match = WRAPPED_RE.match(value)
+        return match.group(1) if match else value
+
+class RecentKeys:
+    """
+    Keys of the notifications still in the shade. Each dump marks what it
+    lists (check_and_add) and end_dump() forgets whatever that complete
+    dump didn't list, so a notification that's still showing stays "seen"
+    however long nothing new arrives. An incomplete dump (stream cut off,
+    poll failed) forgets nothing. maxlen caps it regardless.
+    """
+    def __init__(self, maxlen=1000):
+        self.maxlen = maxlen
+        self.items = OrderedDict() # key -> None, oldest first
+        self.listed = set()        # Keys the dump in progress has listed
+
+    def check_and_add(self, key):
+        """ Returns True if key was already present. """
+        items = self.items
+        present = key in items
+        items[key] = None
+        items.move_to_end(key)
+        self.listed.add(key)
+        while len(items) > self.maxlen: items.popitem(last=False)
+        return present
+
+    def end_dump(self):
+        """ A complete dump ended: forget the notifications it no longer lists. """
+        for key in [k for k in self.items if k not in self.listed]: del self.items[key]
+        self.listed = set()
+
+    def abort_dump(self):
+        self.listed = set()
+
+    def __len__(self):
+        return len(self.items)
 
 class NotificationSync:
-    def __init__(self, adb_path):
+    """
+    Mirrors phone notifications as PC toasts.
+
+    mode "auto" streams (see STREAM_SCRIPT) and falls back to adaptive
+    polling if the phone can't stream; "stream" / "poll" force one.
+    stats() reports bytes received and CPU used per hour for the mode in use.
+    """
+    def __init__(self, adb_path, mode="auto"):
         self.adb_path = adb_path
+        self.mode = mode
         self.running = False
-        self.seen_keys = set() # Track seen notifications to avoid duplicates
+        self.seen_keys = RecentKeys() # Track seen notifications to avoid duplicates
+        self.parser = NotificationParser(self._on_record)
         self.device_id = None
+        self.active_mode = None
+        self._last_digest = None
+        self._stream = None # Socket or Popen, closed by stop() to unblock reads
+        self._reset_stats()
         
         # [CRITICAL] Flag to hide black console window
-        self.NO_WINDOW = subprocess.CREATE_NO_WINDOW
+        self.NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
 
     def start(self, device_id):
         self.device_id = device_id
         self.running = True
-        threading.Thread(target=self._poll_loop, daemon=True).start()
+        self._last_digest = None
+        self._reset_stats()
+        watcher.subscribe(self._on_link)
+        threading.Thread(target=self._run, daemon=True).start()
 
     def stop(self):
         self.running = False
+        watcher.unsubscribe(self._on_link)
+        self._close_stream()
+
+    def _on_link(self, serial, reason, final):
+        """ Watcher callback (core/watcher.py): the device's session ended, so stop syncing. """
+        if final and serial == self.device_id: self.stop()
+
+    # --- MEASUREMENTS ---
+    def _reset_stats(self):
+        self.bytes_received = 0
+        self.cpu_seconds = 0.0
+        self.updates = 0
+        self.started_at = time.perf_counter()
+
+    def stats(self):
+        """ Bytes received / CPU seconds (sync thread) so far and per hour. """
+        hours = max(time.perf_counter() - self.started_at, 1e-6) / 3600.0
+        return {
+            "mode": self.active_mode,
+            "bytes": self.bytes_received,
+            "cpu_seconds": round(self.cpu_seconds, 4),
+            "updates": self.updates,
+            "bytes_per_hour": round(self.bytes_received / hours),
+            "cpu_seconds_per_hour": round(self.cpu_seconds / hours, 3),
+        }
 
-    def _poll_loop(self):
+    # --- MAIN LOOP ---
+    def _run(self):
+        cpu_mark = time.thread_time()
+        def account():
+            nonlocal cpu_mark
+            now = time.thread_time()
+            self.cpu_seconds += now - cpu_mark
+            cpu_mark = now
+
+        if self.mode in ("auto", "stream"):
+            self.active_mode = "stream"
+            failures = 0
+            while self.running and failures < 3:
+                worked = self._stream_loop(account)
+                # A stream that never produced a dump isn't supported here
+                if not worked and self.mode == "auto": break
+                failures = 0 if worked else failures + 1
+                if self.running: time.sleep(1)
+            if self.mode == "stream": return
+
+        self.active_mode = "poll"
+        self._poll_loop(account)
+
+    def _stream_loop(self, account):
+        """ Reads filtered dumps from the device until the stream ends. Returns True if any arrived. """
+        reader = self._open_stream()
+        if reader is None: return False
+        worked = False
+        try:
+            for line in reader:
+                if not self.running: break
+                self.bytes_received += len(line)
+                if line.strip() == END_MARKER:
+                    worked = True
+                    self.parser.end()
+                    self.seen_keys.end_dump()
+                    self.updates += 1
+                    account()
+                else:
+                    self.parser.feed(line)
+        except Exception:
+            pass
+        self.seen_keys.abort_dump() # Cut off mid-dump: prune nothing
+        self._close_stream()
+        try: reader.close()
+        except Exception: pass
+        account()
+        return worked
+
+    def _open_stream(self):
+        try:
+            sock = adb_client.open_stream(self.device_id, f"shell:{STREAM_SCRIPT}")
+            self._stream = sock
+            return sock.makefile("r", encoding="utf-8", errors="ignore", newline="")
+        except (OSError, AdbError):
+            pass
+        try:
+            proc = subprocess.Popen(
+                [self.adb_path, '-s', self.device_id, 'shell', STREAM_SCRIPT],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding='utf-8',
+                errors='ignore',
+                creationflags=self.NO_WINDOW
+            )
+            self._stream = proc
+            return proc.stdout
+        except Exception:
+            return None
+
+    def _close_stream(self):
+        stream, self._stream = self._stream, None
+        if stream is None: return
+        try:
+            if isinstance(stream, subprocess.Popen):
+                stream.terminate()
+            else:
+                stream.shutdown(socket.SHUT_RDWR) # Unblocks the reader's makefile()
+                stream.close()
+        except Exception: pass
+
+    def _poll_loop(self, account):
         """
-        Polls 'dumpsys notification' every 5s. 
+        Fallback: polls the filtered dumpsys. Starts every POLL_MIN seconds
+        and doubles the interval (up to POLL_MAX) while nothing changes.
         Note: This is the most compatible way to get text without a custom app.
         """
+        interval = POLL_MIN
         while self.running:
             try:
-                # Get list of visible notifications
-                cmd = [self.adb_path, '-s', self.device_id, 'shell', 'dumpsys', 'notification', '--noredact']
-                
-                # [FIX] Added creationflags to prevent black window flashing
-                res = subprocess.run(
-                    cmd, 
-                    capture_output=True, 
-                    text=True, 
-                    encoding='utf-8', 
-                    errors='ignore',
-                    creationflags=self.NO_WINDOW
-                )
-                
-                self._parse_and_notify(res.stdout)
-                
+                changed = self._poll_once()
+                interval = POLL_MIN if changed else min(interval * 2, POLL_MAX)
             except Exception as e:
                 # Silently ignore errors to keep thread alive
-                pass
-            
-            time.sleep(5) # Poll interval
-
-    def _parse_and_notify(self, dump_output):
-        # Regex to find Notification Records
-        # Looks for: "pkg=com.whatsapp" ... "tickerText=Message from Mom"
-        current_pkg = "Unknown"
-        
-        for line in dump_output.split('\n'):
-            line = line.strip()
-            
-            if "pkg=" in line:
-                # Extract package name
-                match = re.search(r'pkg=([a-zA-Z0-9.]+)', line)
-                if match: current_pkg = match.group(1)
-            
-            if "tickerText=" in line and "tickerText=null" not in line:
-                try:
-                    text = line.split("tickerText=")[1]
-                    key = f"{current_pkg}:{text}"
-                    
-                    if key not in self.seen_keys:
-                        self.seen_keys.add(key)
-                        self._show_toast(current_pkg, text)
-                        
-                        # Cleanup cache if too big to save memory
-                        if len(self.seen_keys) > 50: self.seen_keys.clear()
-                except:
-                    pass
+                self.seen_keys.abort_dump()
+            account()
+            time.sleep(interval)
+
+    def _poll_once(self):
+        """ Streams one filtered dump through the parser. Returns True if it changed. """
+        digest = hashlib.md5()
+        for line in self._dump_lines():
+            self.bytes_received += len(line)
+            digest.update(line.encode("utf-8", errors="ignore"))
+            self.parser.feed(line)
+        self.parser.end()
+        self.seen_keys.end_dump()
+        digest = digest.digest()
+        if digest == self._last_digest: return False
+        self._last_digest = digest
+        self.updates += 1
+        return True
+
+    def _dump_lines(self):
+        """ Filtered dumpsys, line by line, over the adb server socket (or the adb binary). """
+        try:
+            sock = adb_client.open_stream(self.device_id, f"shell:{POLL_CMD}")
+        except (OSError, AdbError):
+            sock = None
+
+        if sock is not None:
+            with sock, sock.makefile("r", encoding="utf-8", errors="ignore", newline="") as f:
+                yield from f
+            return
+
+        # [FIX] Added creationflags to prevent black window flashing
+        proc = subprocess.Popen(
+            [self.adb_path, '-s', self.device_id, 'shell', POLL_CMD],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True, 
+            encoding='utf-8', 
+            errors='ignore',
+            creationflags=self.NO_WINDOW
+        )
+        with proc:
+            yield from proc.stdout
+
+    def _on_record(self, rec):
+        message = rec["ticker"] or rec["text"]
+        # Same notification (key + post time) only toasts once
+        key = (rec["key"], rec["time"]) if rec["key"] else (rec["pkg"], message)
+        if not self.seen_keys.check_and_add(key):
+            self._show_toast(rec["title"] or rec["pkg"], message)
 
     def _show_toast(self, title, message):
         try:
+            from plyer import notification # Slow import: deferred to the first toast (see main.py)
             notification.notify(
                 title=f"📱 {title}",
                 message=message,
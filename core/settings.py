@@ -0,0 +1,216 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from .config import (CONFIG_DIR, APP_SHORTCUTS, ENGINE_MAX_BATCH, ENGINE_BATCH_LATENCY, ENGINE_USE_HELPER,
+                     ENGINE_PASTE_THRESHOLD, ENGINE_MAX_IN_FLIGHT, ENGINE_MAX_HOLD,
+                     ENGINE_AUTO_RECONNECT, ENGINE_STANDBY_SHELL, ENGINE_RECONNECT_TIMEOUT)
+
+# --- CONFIG MANAGER (Settings) ---
+CONFIG_FILE = os.path.join(CONFIG_DIR, "user_config.json")
+# Older versions kept it in the working directory; picked up once if found
+LEGACY_CONFIG_FILE = "user_config.json"
+CONFIG_VERSION = 1
+# Changes are written this many seconds after the last one (and at exit),
+# so a burst of edits or a bulk import is a single write
+CONFIG_SAVE_DELAY = 1.0
+
+DEFAULT_MACROS = {
+    "My Email": "user@example.com",
+    "Address": "123 Tech Street",
+}
+
+# Engine settings the user can override: key -> (type, default).
+# Keys are ADBEngine attributes (see ConfigManager.apply_engine).
+ENGINE_SCHEMA = {
+    "max_batch": (int, ENGINE_MAX_BATCH),
+    "batch_latency": (float, ENGINE_BATCH_LATENCY),
+    "use_helper": (bool, ENGINE_USE_HELPER),
+    "paste_threshold": (int, ENGINE_PASTE_THRESHOLD),
+    "max_in_flight": (int, ENGINE_MAX_IN_FLIGHT),
+    "max_hold": (float, ENGINE_MAX_HOLD),
+    "auto_reconnect": (bool, ENGINE_AUTO_RECONNECT),
+    "standby_enabled": (bool, ENGINE_STANDBY_SHELL),
+    "reconnect_timeout": (float, ENGINE_RECONNECT_TIMEOUT),
+}
+
+def _typed(value, kind):
+    """ value as kind, or None if it isn't one (bool is not a number here). """
+    if kind is bool: return value if isinstance(value, bool) else None
+    if isinstance(value, bool) or not isinstance(value, (int, float)): return None
+    if kind is int: return value if isinstance(value, int) else None
+    return float(value)
+
+def _str_map(value):
+    """ Only the str -> str entries of a JSON object ({} if it isn't one). """
+    if not isinstance(value, dict): return {}
+    return {k: v for k, v in value.items() if isinstance(k, str) and isinstance(v, str)}
+
+class ConfigManager:
+    """
+    User settings: macros, app shortcuts and engine overrides, stored as
+    JSON in CONFIG_DIR. Every change marks the store dirty and (re)arms a
+    CONFIG_SAVE_DELAY timer; the write goes to a temp file that replaces
+    the old one in one step, so a crash mid-write leaves the previous
+    settings intact. flush() writes now (also run at exit).
+
+    Whatever doesn't match the schema when loading (wrong types, unknown
+    engine keys) is ignored rather than breaking startup.
+    """
+    def __init__(self, path=CONFIG_FILE, save_delay=CONFIG_SAVE_DELAY):
+        self.path = path
+        self.save_delay = save_delay
+        self.macros = DEFAULT_MACROS.copy()
+        self.apps = APP_SHORTCUTS.copy()
+        self.engine = {} # Overrides only: key -> value (see ENGINE_SCHEMA)
+        self.lock = threading.RLock()
+        self._timer = None
+        self._due = 0.0
+        self._dirty = False
+        self.writes = 0
+        self.load()
+        atexit.register(self.flush)
+
+    def load(self):
+        path = self.path
+        migrate = not os.path.exists(path) and os.path.exists(LEGACY_CONFIG_FILE)
+        if migrate: path = LEGACY_CONFIG_FILE
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict): return
+        with self.lock:
+            if "macros" in data: self.macros = _str_map(data["macros"])
+            if "apps" in data: self.apps = _str_map(data["apps"])
+            engine = data.get("engine")
+            if isinstance(engine, dict):
+                for key, (kind, _) in ENGINE_SCHEMA.items():
+                    value = _typed(engine.get(key), kind)
+                    if value is not None: self.engine[key] = value
+        if migrate: self.save()
+
+    # --- PERSISTENCE ---
+    def save(self):
+        """ Schedules a write CONFIG_SAVE_DELAY seconds from now (later changes push it back). """
+        with self.lock:
+            self._dirty = True
+            self._due = time.monotonic() + self.save_delay
+            if self._timer is None: self._arm(self.save_delay)
+
+    def _arm(self, delay):
+        # One timer per burst: it re-arms itself until the edits stop
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self.lock:
+            self._timer = None
+            left = self._due - time.monotonic()
+            if left > 0:
+                self._arm(left)
+                return
+        self.flush()
+
+    def flush(self):
+        """ Writes pending changes now. """
+        with self.lock:
+            if self._timer: self._timer.cancel()
+            self._timer = None
+            if not self._dirty: return
+            self._dirty = False
+            text = json.dumps({"version": CONFIG_VERSION, "macros": self.macros,
+                               "apps": self.apps, "engine": self.engine},
+                              ensure_ascii=False, separators=(",", ":"))
+            try: self._write(text)
+            except OSError: self._dirty = True # Try again with the next change
+
+    def _write(self, text):
+        folder = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix=".user_config.", suffix=".tmp", dir=folder)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except OSError:
+            try: os.unlink(tmp)
+            except OSError: pass
+            raise
+        self.writes += 1
+
+    # --- MACROS ---
+    def add_macro(self, name, text):
+        with self.lock:
+            self.macros[name] = text
+        self.save()
+
+    def remove_macro(self, name):
+        with self.lock:
+            if name not in self.macros: return
+            del self.macros[name]
+        self.save()
+
+    def import_macros(self, macros, replace=False):
+        """
+        Adds many macros with one write: a {name: text} dict or (name, text)
+        pairs. replace=True drops the existing ones first. Returns how many
+        were imported (non-text entries are skipped).
+        """
+        items = macros.items() if isinstance(macros, dict) else macros
+        new = {k: v for k, v in items if isinstance(k, str) and isinstance(v, str)}
+        with self.lock:
+            if replace: self.macros = new
+            else: self.macros.update(new)
+        self.save()
+        return len(new)
+
+    def import_macros_file(self, path, replace=False):
+        """ Imports a JSON file: {name: text}, or a saved config ({"macros": {...}}). """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get("macros"), dict): data = data["macros"]
+        if not isinstance(data, dict): raise ValueError("expected a JSON object of name: text")
+        return self.import_macros(data, replace)
+
+    # --- APPS ---
+    def add_app(self, name, package):
+        with self.lock:
+            self.apps[name] = package
+        self.save()
+
+    def remove_app(self, name):
+        with self.lock:
+            if name not in self.apps: return
+            del self.apps[name]
+        self.save()
+
+    # --- ENGINE TUNING ---
+    def set_engine(self, key, value):
+        """ Overrides one ENGINE_SCHEMA setting (None goes back to the default). """
+        if key not in ENGINE_SCHEMA: raise KeyError(key)
+        with self.lock:
+            if value is None:
+                self.engine.pop(key, None)
+            else:
+                typed = _typed(value, ENGINE_SCHEMA[key][0])
+                if typed is None: raise TypeError(f"{key} must be {ENGINE_SCHEMA[key][0].__name__}")
+                self.engine[key] = typed
+        self.save()
+
+    def engine_setting(self, key):
+        return self.engine.get(key, ENGINE_SCHEMA[key][1])
+
+    def apply_engine(self, engine):
+        """ Applies the overrides to a new ADBEngine. """
+        for key, value in self.engine.items(): setattr(engine, key, value)
+        return engine
+
+# Create the global instance
+cfg = ConfigManager()
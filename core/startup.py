@@ -0,0 +1,39 @@
+import time
+
+class StartupTimer:
+    """
+    Cold start breakdown. The clock starts when this module is first
+    imported (main.py imports it before anything else); mark(phase) closes
+    the phase that just ran, note(event) records when something running in
+    the background (adb warm-up) was done, both in seconds.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.phases = [] # [(phase, seconds)] in order
+        self.events = [] # [(event, seconds since start)]
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def note(self, event):
+        self.events.append((event, time.perf_counter() - self.started))
+
+    def total(self):
+        """ Seconds from the first import to the last mark. """
+        return self.last - self.started
+
+    def summary(self):
+        phases = ", ".join(f"{name} {s * 1000:.0f}ms" for name, s in self.phases)
+        events = "".join(f", {name} at {s:.2f}s" for name, s in self.events)
+        return f"[*] Started in {self.total():.2f}s ({phases}){events}"
+
+    def report(self):
+        return {"total_s": round(self.total(), 3),
+                "phases_ms": {name: round(s * 1000, 1) for name, s in self.phases},
+                "events_ms": {name: round(s * 1000, 1) for name, s in self.events}}
+
+# Shared instance (one startup per process)
+startup = StartupTimer()
@@ -0,0 +1,52 @@
+import base64
+import functools
+import re
+
+# Everything `sh` would otherwise interpret (quotes, globs, expansions,
+# separators, comments, brace/glob chars, whitespace). Each gets a backslash.
+SHELL_SPECIAL = "\\\"'()<>|;&*~`$#[]!{}?%\t"
+
+# Spaces become %s, which `input text` turns back into a space
+_TABLE = str.maketrans({**{c: "\\" + c for c in SHELL_SPECIAL}, " ": "%s"})
+
+# `input text` turns every "%s" into a space, backslash or not: a literal
+# "%" followed by "s" ends one command and the "s" starts the next
+_PERCENT_S_RE = re.compile(r"(?<=%)(?=s)")
+
+def escape_input_text(line):
+    """
+    Escapes one line (no newlines, no "%s") for `input text <line>` in a
+    device shell. Single pass via str.translate.
+    """
+    # Plain words (most typing) need nothing
+    if line.isalnum(): return line
+    return line.translate(_TABLE)
+
+@functools.lru_cache(maxsize=4096)
+def input_text_commands(line):
+    """
+    Shell command(s) that type one line (no newlines) with `input text`,
+    newline separated: one, or one per "%s" split. Cached because macros
+    and common words repeat a lot.
+    """
+    if "%s" not in line: return "input text " + escape_input_text(line)
+    return "\n".join("input text " + escape_input_text(part) for part in _PERCENT_S_RE.split(line))
+
+# ASCII runs keep the `input text` fast path; everything else can't be typed by it
+_RUNS_RE = re.compile(r"[\x00-\x7f]+|[^\x00-\x7f]+")
+
+@functools.lru_cache(maxsize=4096)
+def split_ascii_runs(line):
+    """
+    Splits a line into ((run, is_ascii), ...) in order, e.g.
+    "café au lait ☕" -> (("caf", True), ("é", False), (" au lait ", True), ("☕", False)).
+    """
+    if line.isascii(): return ((line, True),) if line else ()
+    return tuple((m.group(), m.group().isascii()) for m in _RUNS_RE.finditer(line))
+
+def unicode_broadcast(text):
+    """
+    Shell command that types `text` through the ADBKeyboard IME (it must be
+    the active keyboard). Base64 needs no shell escaping.
+    """
+    return "am broadcast -a ADB_INPUT_B64 --es msg " + base64.b64encode(text.encode("utf-8")).decode("ascii")
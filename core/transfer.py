@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from .config import ADB_PATH, TRANSFER_PARALLEL, TRANSFER_REMOTE_DIR, TRANSFER_MANIFEST
+from .adb_client import client as adb_client, AdbError
+
+class TransferCancelled(Exception):
+    """ Raised inside a push when FileBeam.cancel() was called. """
+
+def file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""): h.update(chunk)
+    return h.hexdigest()
+
+class Manifest:
+    """
+    What we've already pushed: {serial: {remote_path: {size, mtime, sha1}}},
+    kept in a JSON file so unchanged files are skipped across sessions.
+    path=None keeps it in memory only.
+    """
+    def __init__(self, path=TRANSFER_MANIFEST):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {}
+        if not path: return
+        try:
+            with open(path) as f: self.data = json.load(f)
+        except (OSError, ValueError): pass
+
+    def get(self, serial, remote):
+        with self.lock:
+            return self.data.get(serial, {}).get(remote)
+
+    def put(self, serial, remote, entry):
+        with self.lock:
+            self.data.setdefault(serial, {})[remote] = entry
+
+    def save(self):
+        if not self.path: return
+        # Under the lock: beams sharing this manifest save through one temp file
+        with self.lock:
+            text = json.dumps(self.data, indent=1, sort_keys=True)
+            tmp = self.path + ".tmp"
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(tmp, "w") as f: f.write(text)
+                os.replace(tmp, self.path)
+            except OSError: pass
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared_manifest():
+    """
+    The TRANSFER_MANIFEST file, loaded once. Every beam that isn't given
+    a manifest uses this one: separate copies would each save their own
+    view and drop entries written by beams running at the same time.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None: _shared = Manifest()
+        return _shared
+
+class FileBeam:
+    """
+    Pushes a batch of files over up to `parallel` sync sessions at once
+    (each session sends many files on one socket), with a live progress
+    report (bytes/s, ETA) and cancel().
+
+    A file is skipped when the manifest says we pushed the same content
+    to the same path before and the device still has a file of that size.
+    Size + mtime is checked first; the hash is only computed when the
+    mtime moved (and is otherwise recorded for free while sending).
+    """
+    PROGRESS_EVERY = 0.25 # seconds between on_progress calls
+
+    def __init__(self, log_callback, serial=None, parallel=TRANSFER_PARALLEL,
+                 manifest=None, on_progress=None, skip_unchanged=True):
+        self.log = log_callback
+        self.serial = serial
+        self.key = serial or "default" # Manifest key
+        self.parallel = max(1, parallel)
+        self.manifest = manifest if manifest is not None else shared_manifest()
+        self.on_progress = on_progress
+        self.skip_unchanged = skip_unchanged # Off when the caller already knows what changed
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.jobs = queue.Queue()
+        self.files = self.sent = self.skipped = self.failed = 0
+        self.bytes_total = self.bytes_done = 0
+        self.started = None
+        self._last_report = 0.0
+
+    # --- PUBLIC ---
+    def push(self, paths, remote_dir=TRANSFER_REMOTE_DIR):
+        """ Starts sending `paths` into remote_dir in the background. Returns self. """
+        remote_dir = remote_dir.rstrip("/")
+        return self.push_pairs([(p, f"{remote_dir}/{os.path.basename(p)}") for p in paths])
+
+    def push_pairs(self, pairs):
+        """ Same, for explicit [(local_path, remote_path), ...]. Returns self. """
+        for path, remote in pairs:
+            try: size = os.path.getsize(path)
+            except OSError:
+                self.log(f"[!] Can't read {path}")
+                continue
+            self.jobs.put((path, remote, size))
+            self.files += 1
+            self.bytes_total += size
+        self.started = time.perf_counter()
+        self.log(f"[*] Sending {self.files} file(s), {self.bytes_total / 1e6:.1f} MB...")
+
+        workers = [threading.Thread(target=self._worker, daemon=True)
+                   for _ in range(min(self.parallel, self.files) or 1)]
+        for w in workers: w.start()
+        def _finish():
+            for w in workers: w.join()
+            self._finish()
+        threading.Thread(target=_finish, daemon=True).start()
+        return self
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def stats(self):
+        with self.lock:
+            elapsed = time.perf_counter() - self.started if self.started else 0.0
+            rate = self.bytes_done / elapsed if elapsed > 0 else 0.0
+            remaining = self.bytes_total - self.bytes_done
+            return {
+                "files": self.files, "sent": self.sent, "skipped": self.skipped, "failed": self.failed,
+                "bytes_total": self.bytes_total, "bytes_done": self.bytes_done,
+                "elapsed_s": round(elapsed, 3),
+                "rate_bps": round(rate),
+                "eta_s": round(remaining / rate, 1) if rate > 0 else None,
+                "cancelled": self.cancelled.is_set(),
+            }
+
+    # --- WORKERS ---
+    def _worker(self):
+        session = None
+        try:
+            while not self.cancelled.is_set():
+                try: local, remote, size = self.jobs.get_nowait()
+                except queue.Empty: break
+                try:
+                    if session is None: session = adb_client.sync(self.serial)
+                    self._send(session, local, remote, size)
+                except TransferCancelled:
+                    break
+                except (OSError, AdbError) as e:
+                    # Session is broken either way; retry this file with the CLI
+                    if session: session.close()
+                    session = None
+                    if not self._send_cli(local, remote, size):
+                        self.log(f"[!] Failed: {os.path.basename(local)} ({e})")
+                        self._count(failed=1, size=size)
+        finally:
+            if session: session.close()
+
+    def _send(self, session, local, remote, size):
+        st = os.stat(local)
+        if self.skip_unchanged and self._unchanged(session, local, remote, st):
+            self._count(skipped=1, size=size)
+            return
+
+        h = hashlib.sha1()
+        pushed = [0]
+        def _on_chunk(data):
+            h.update(data)
+            pushed[0] += len(data)
+            self._progress(len(data))
+            if self.cancelled.is_set(): raise TransferCancelled()
+        try:
+            with open(local, "rb") as f:
+                session.push(f, remote, st.st_mtime, on_chunk=_on_chunk)
+        except (OSError, AdbError):
+            # The CLI fallback resends the whole file: don't count this part twice
+            self._progress(-pushed[0])
+            raise
+        self.manifest.put(self.key, remote, {"size": st.st_size, "mtime": int(st.st_mtime),
+                                             "sha1": h.hexdigest()})
+        self._count(sent=1)
+
+    def _unchanged(self, session, local, remote, st):
+        entry = self.manifest.get(self.key, remote)
+        if not entry or entry["size"] != st.st_size: return False
+        if entry["mtime"] != int(st.st_mtime):
+            # Touched but maybe not changed: the hash decides
+            if entry["sha1"] != file_sha1(local): return False
+            entry = dict(entry, mtime=int(st.st_mtime))
+            self.manifest.put(self.key, remote, entry)
+        # Still there? (deleted on the phone -> send again)
+        mode, remote_size, _ = session.stat(remote)
+        return mode != 0 and remote_size == st.st_size
+
+    def _send_cli(self, local, remote, size):
+        """ `adb push` fallback (server unreachable): no per-chunk progress. """
+        if self.cancelled.is_set(): return True
+        cmd = [ADB_PATH] + (["-s", self.serial] if self.serial else []) + ["push", local, remote]
+        try:
+            res = subprocess.run(cmd, capture_output=True, creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+        except OSError:
+            return False
+        if res.returncode != 0: return False
+        self._progress(size)
+        self._count(sent=1)
+        return True
+
+    # --- PROGRESS ---
+    def _count(self, sent=0, skipped=0, failed=0, size=0):
+        with self.lock:
+            self.sent += sent
+            self.skipped += skipped
+            self.failed += failed
+            # Skipped/failed bytes won't be sent: take them out of the ETA
+            self.bytes_total -= size
+        self._progress(0)
+
+    def _progress(self, n):
+        with self.lock:
+            self.bytes_done += n
+            now = time.perf_counter()
+            if now - self._last_report < self.PROGRESS_EVERY: return
+            self._last_report = now
+        if self.on_progress: self.on_progress(self.stats())
+
+    def _finish(self):
+        self.manifest.save()
+        s = self.stats()
+        mb = s["bytes_done"] / 1e6
+        if s["cancelled"]:
+            self.log(f"[!] Transfer cancelled: {s['sent']}/{s['files']} file(s) sent")
+        else:
+            self.log(f"[+] Beam done: {s['sent']} sent, {s['skipped']} unchanged, {s['failed']} failed - "
+                     f"{mb:.1f} MB in {s['elapsed_s']:.1f}s ({s['rate_bps'] / 1e6:.1f} MB/s)")
+        if self.on_progress: self.on_progress(s)
+        self.done.set()
@@ -0,0 +1,76 @@
+import collections
+import threading
+
+class ProcessWatcher:
+    """
+    Waits on adb child processes instead of polling them. Every watched
+    process gets a thread that drains its stderr (so adb can never stall
+    on a full pipe) and blocks until the process exits, so a dropped
+    link is reported within milliseconds - with what adb said about it.
+
+    Subscribers run on the watcher thread as callback(serial, reason, final):
+      serial - device whose process went away
+      reason - adb's last stderr lines ("" if it said nothing)
+      final  - the session is over (False: its engine is reconnecting)
+    Tk code should hop back to the main thread with root.after.
+    """
+    REASON_LINES = 3
+
+    def __init__(self):
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    # --- SUBSCRIPTIONS ---
+    def subscribe(self, callback):
+        with self.lock:
+            if callback not in self.subscribers: self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers: self.subscribers.remove(callback)
+
+    def notify(self, serial, reason, final):
+        """ Tells every subscriber. Also used for exits noticed elsewhere (asyncio shells, a reconnect that gave up). """
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for callback in subscribers:
+            try: callback(serial, reason, final)
+            except Exception: pass
+
+    # --- WATCHING ---
+    def watch(self, process, serial, on_exit):
+        """
+        Watches a subprocess.Popen started with stderr=PIPE (text mode).
+        When it exits, on_exit(process, reason) runs first and returns
+        whether the session is over - or None if nobody needs to hear
+        about it (a spare shell, a process stopped on purpose).
+        """
+        threading.Thread(target=self._watch, args=(process, serial, on_exit),
+                         name=f"watch-{serial}", daemon=True).start()
+
+    def _watch(self, process, serial, on_exit):
+        last = collections.deque(maxlen=self.REASON_LINES)
+        try:
+            for line in process.stderr:
+                if line.strip(): last.append(line.strip())
+        except (OSError, ValueError): pass # Pipe closed under us
+        process.wait()
+        reason = " | ".join(last)
+        final = on_exit(process, reason)
+        if final is not None: self.notify(serial, reason, final)
+
+    async def watch_async(self, process, serial, on_exit):
+        """ watch() for an asyncio subprocess: run it as a task on the process's loop. """
+        last = collections.deque(maxlen=self.REASON_LINES)
+        try:
+            async for line in process.stderr:
+                line = line.decode(errors="replace").strip()
+                if line: last.append(line)
+        except (OSError, ValueError): pass
+        await process.wait()
+        reason = " | ".join(last)
+        final = on_exit(process, reason)
+        if final is not None: self.notify(serial, reason, final)
+
+# Shared instance
+watcher = ProcessWatcher()
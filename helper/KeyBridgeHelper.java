@@ -0,0 +1,181 @@
+/*
+ * KeyBridge on-device input helper.
+ *
+ * Runs as one long-lived app_process on the phone and injects key/text events
+ * straight into InputManager, so typing no longer starts a new `input` JVM per
+ * command. The PC side (core/input_helper.py) talks to it over stdin with one
+ * event per line:
+ *
+ *     T<text>            type text (no newlines)
+ *     K<code> [<code>..] press + release each Android keycode
+ *     V<base64 utf-8>    bulk paste: put the text on the clipboard, press PASTE
+ *     U<base64 utf-8>    text the key map may not cover (accents, CJK, emoji):
+ *                        typed through the key map if it can be, else pasted
+ *     P<token>           ping: echoed back as P<token> (round-trip measurement)
+ *     Q                  quit
+ *
+ * It prints READY once it can inject, and ERR <reason> for bad lines.
+ *
+ * Pastes put the user's clip back: PASTE is injected waiting until the app
+ * has handled it, then the previous primary clip is restored (or the
+ * clipboard cleared if it was empty). What remains: clipboard managers and
+ * keyboards with a clipboard history still see the pasted text go by, and
+ * if the clipboard can't be read from the shell, the pasted text stays.
+ *
+ * Build (needs the Android SDK):
+ *     javac -source 8 -target 8 -cp $ANDROID_HOME/platforms/android-33/android.jar \
+ *           -d out helper/KeyBridgeHelper.java
+ *     d8 --output out out/com/keybridge/*.class
+ *     (cd out && zip ../assets/kbhelper.jar classes.dex)
+ */
+package com.keybridge;
+
+import android.content.ClipData;
+import android.os.IBinder;
+import android.os.SystemClock;
+import android.util.Base64;
+import android.view.InputDevice;
+import android.view.InputEvent;
+import android.view.KeyCharacterMap;
+import android.view.KeyEvent;
+
+import java.io.BufferedReader;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.Method;
+
+public final class KeyBridgeHelper {
+    private static final int INJECT_MODE_ASYNC = 0;
+    private static final int INJECT_MODE_WAIT_FOR_FINISH = 2;
+
+    private final Object inputManager;
+    private final Method injectMethod;
+    private final KeyCharacterMap charMap = KeyCharacterMap.load(KeyCharacterMap.VIRTUAL_KEYBOARD);
+    private Object clipboard;        // IClipboard, looked up on first paste
+    private Method setPrimaryClip;
+    private Method getPrimaryClip;
+    private Method clearPrimaryClip; // Android 9+
+
+    private KeyBridgeHelper() throws Exception {
+        Class<?> cls;
+        try {
+            // Android 14+
+            cls = Class.forName("android.hardware.input.InputManagerGlobal");
+        } catch (ClassNotFoundException e) {
+            cls = Class.forName("android.hardware.input.InputManager");
+        }
+        inputManager = cls.getDeclaredMethod("getInstance").invoke(null);
+        injectMethod = cls.getMethod("injectInputEvent", InputEvent.class, int.class);
+    }
+
+    private void inject(KeyEvent event) throws Exception {
+        inject(event, INJECT_MODE_ASYNC);
+    }
+
+    private void inject(KeyEvent event, int mode) throws Exception {
+        injectMethod.invoke(inputManager, event, mode);
+    }
+
+    private void key(int code) throws Exception {
+        key(code, INJECT_MODE_ASYNC);
+    }
+
+    private void key(int code, int mode) throws Exception {
+        long now = SystemClock.uptimeMillis();
+        inject(new KeyEvent(now, now, KeyEvent.ACTION_DOWN, code, 0, 0,
+                KeyCharacterMap.VIRTUAL_KEYBOARD, 0, 0, InputDevice.SOURCE_KEYBOARD), mode);
+        inject(new KeyEvent(now, now, KeyEvent.ACTION_UP, code, 0, 0,
+                KeyCharacterMap.VIRTUAL_KEYBOARD, 0, 0, InputDevice.SOURCE_KEYBOARD), mode);
+    }
+
+    private boolean text(String text) throws Exception {
+        KeyEvent[] events = charMap.getEvents(text.toCharArray());
+        if (events == null) return false;
+        for (KeyEvent event : events) {
+            inject(KeyEvent.changeTimeRepeat(event, SystemClock.uptimeMillis(), 0));
+        }
+        return true;
+    }
+
+    private void lookUpClipboard() throws Exception {
+        if (clipboard != null) return;
+        IBinder binder = (IBinder) Class.forName("android.os.ServiceManager")
+                .getMethod("getService", String.class).invoke(null, "clipboard");
+        clipboard = Class.forName("android.content.IClipboard$Stub")
+                .getMethod("asInterface", IBinder.class).invoke(null, binder);
+        for (Method m : clipboard.getClass().getMethods()) {
+            if (m.getName().equals("setPrimaryClip")) setPrimaryClip = m;
+            else if (m.getName().equals("getPrimaryClip")) getPrimaryClip = m;
+            else if (m.getName().equals("clearPrimaryClip")) clearPrimaryClip = m;
+        }
+    }
+
+    private Object clipboardCall(Method method, ClipData clip) throws Exception {
+        // ([clip,] callingPackage[, attributionTag][, userId][, deviceId]) depending on the Android version
+        Class<?>[] params = method.getParameterTypes();
+        Object[] args = new Object[params.length];
+        int i = 0;
+        if (clip != null) args[i++] = clip;
+        boolean pkg = true;
+        for (; i < params.length; i++) {
+            if (params[i] == String.class) { args[i] = pkg ? "com.android.shell" : null; pkg = false; }
+            else if (params[i] == int.class) args[i] = 0;
+        }
+        return method.invoke(clipboard, args);
+    }
+
+    private void paste(String text) throws Exception {
+        lookUpClipboard();
+        ClipData previous = null;
+        boolean saved = false;
+        try {
+            previous = (ClipData) clipboardCall(getPrimaryClip, null);
+            saved = true;
+        } catch (Exception e) {
+            // Not readable from here: the pasted text stays on the clipboard
+        }
+        clipboardCall(setPrimaryClip, ClipData.newPlainText("KeyBridge", text));
+        // The app reads the clip while handling PASTE: only then put the old one back
+        key(KeyEvent.KEYCODE_PASTE, INJECT_MODE_WAIT_FOR_FINISH);
+        if (!saved) return;
+        if (previous != null) clipboardCall(setPrimaryClip, previous);
+        else if (clearPrimaryClip != null) clipboardCall(clearPrimaryClip, null);
+    }
+
+    private void unicode(String text) throws Exception {
+        if (!text(text)) paste(text);
+    }
+
+    public static void main(String[] args) throws Exception {
+        PrintStream out = new PrintStream(System.out, true, "UTF-8");
+        KeyBridgeHelper helper = new KeyBridgeHelper();
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, "UTF-8"));
+        out.println("READY");
+
+        String line;
+        while ((line = in.readLine()) != null) {
+            if (line.isEmpty()) continue;
+            char op = line.charAt(0);
+            String arg = line.substring(1);
+            try {
+                if (op == 'T') {
+                    if (!helper.text(arg)) out.println("ERR unmappable text");
+                } else if (op == 'K') {
+                    for (String code : arg.trim().split("\\s+")) helper.key(Integer.parseInt(code));
+                } else if (op == 'V') {
+                    helper.paste(new String(Base64.decode(arg, Base64.DEFAULT), "UTF-8"));
+                } else if (op == 'U') {
+                    helper.unicode(new String(Base64.decode(arg, Base64.DEFAULT), "UTF-8"));
+                } else if (op == 'P') {
+                    out.println("P" + arg);
+                } else if (op == 'Q') {
+                    return;
+                } else {
+                    out.println("ERR unknown op " + op);
+                }
+            } catch (Exception e) {
+                out.println("ERR " + e);
+            }
+        }
+    }
+}
@@ -1,14 +1,12 @@
+from core.startup import startup # First: starts the startup clock
 import tkinter as tk
 from tkinter import ttk, messagebox
-from pystray import Icon as TrayIcon, MenuItem as Item
 from PIL import Image, ImageDraw, ImageTk
-from ui.app_window import KeyBridgeWindow
 import threading
 import sys
 import os
 import ctypes
 import socket
-import time
 import traceback
 
 # --- CONFIGURATION ---
@@ -79,7 +77,6 @@ class SplashScreen(tk.Toplevel):
         self.lbl_status.config(text=text)
         self.progress['value'] = percent
         self.update()
-        time.sleep(0.3) # Fake delay to make it feel "techy"
 
 # --- MAIN APPLICATION ---
 class MainApp:
@@ -102,29 +99,47 @@ class MainApp:
         self.tk_icon = ImageTk.PhotoImage(self.icon_img)
         self.root.iconphoto(True, self.tk_icon)
 
-        # 3. Show Splash Sequence
+        startup.mark("tk")
+
+        # 3. Show Splash Sequence (every step is real work, no fake delays)
         splash = SplashScreen(self.root)
-        
-        splash.update_status("Loading Core Engine...", 20)
-        # (Importing heavy libraries happens here usually)
-        
-        splash.update_status("Checking ADB Connection...", 50)
-        # (We could check adb here, but UI handles it gracefully)
-        
+        startup.mark("splash")
+
+        splash.update_status("Starting ADB...", 20)
+        # adb start-server + first device scan run in the background while
+        # the rest loads (the window subscribes to the same tracker)
+        from core.device_tracker import tracker
+        tracker.start()
+        threading.Thread(target=self._wait_for_adb, args=(tracker,), daemon=True).start()
+        startup.mark("adb")
+
+        splash.update_status("Loading Core Engine...", 50)
+        from ui.app_window import KeyBridgeWindow
+        startup.mark("imports")
+
         splash.update_status("Initializing UI...", 80)
         self.window = KeyBridgeWindow(self.root) # Heavy lifting
-        
+        startup.mark("ui")
+
         splash.update_status("Ready!", 100)
         splash.destroy()
 
         # 4. Launch Main Window
         self.root.deiconify()
         center_window(self.root, 700, 750)
+        startup.mark("show")
+        self.window.log(startup.summary())
         
         # 5. Setup Tray
         self.tray_icon = None
         self.root.protocol("WM_DELETE_WINDOW", self._minimize_to_tray)
 
+    def _wait_for_adb(self, tracker):
+        if tracker.ready.wait(30):
+            startup.note("adb ready")
+            if hasattr(self, "window"):
+                self.window.log(f"[*] ADB ready after {startup.events[-1][1]:.2f}s")
+
     def _minimize_to_tray(self):
         self.root.withdraw()
         if not self.tray_icon:
@@ -134,6 +149,7 @@ class MainApp:
             pass 
 
     def _start_tray(self):
+        from pystray import Icon as TrayIcon, MenuItem as Item # Only needed once minimized
         menu = (Item('Open KeyBridge', self._show_window, default=True), Item('Quit', self._quit_app))
         self.tray_icon = TrayIcon(APP_NAME, self.icon_img, f"{APP_NAME} (Running)", menu)
         # This enables Left-Click to open!
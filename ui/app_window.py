@@ -1,18 +1,23 @@
+import os
+import threading
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-import subprocess
+from tkinter import ttk, filedialog, messagebox, simpledialog
 from pynput import keyboard
-import threading
-import queue
-import time
 
 # --- INTERNAL IMPORTS ---
 from core.engine import ADBEngine
-from core.config import cfg, ADB_PATH, SPECIAL_KEYS
+from core.async_engine import AsyncADBEngine
+from core.engine_pool import EnginePool
+from core.device_tracker import tracker
+from core.watcher import watcher
+from core.mirror import FolderMirror
+from core.config import ADB_PATH, ENGINE_ASYNC, ENGINE_LAG_WARN
+from core.settings import cfg
+from core.batching import InputBatcher
 from core.notifications import NotificationSync
 from ui.components import SafeButton
 from ui.settings_tab import SettingsTab
-from ui.support_dialog import SupportDialog
+from ui.log_console import LogConsole
 
 class OverlayHUD:
     def __init__(self, root):
@@ -48,8 +53,16 @@ class KeyBridgeWindow:
         self.root.geometry("700x750") 
         self.root.configure(bg="#f3f3f3")
         
-        self.engine = ADBEngine(self.log, self.set_status)
+        engine_class = AsyncADBEngine if ENGINE_ASYNC else ADBEngine
+        # Every engine gets the user's saved tuning (see ConfigManager.apply_engine)
+        make_engine = lambda log, status: cfg.apply_engine(engine_class(log, status))
+        # Engines report from their own threads (the async one from its
+        # event loop): status goes through root.after, log() is thread safe
+        self.engine = make_engine(self.log, lambda *a: self.root.after(0, self.set_status, *a))
+        self.pool = EnginePool(self.log, lambda *a: None, make_engine) # Broadcast mode
+        self.broadcast = tk.BooleanVar(value=False)
         self.notifier = NotificationSync(ADB_PATH)
+        self.mirror = None # Running FolderMirror, if any
         
         self.hud = None 
         self.capture_active = False
@@ -57,18 +70,20 @@ class KeyBridgeWindow:
         self.input_listener = None 
         self.keyboard_controller = keyboard.Controller() 
         
-        # [OPTIMIZED] Input Queue with Batching
-        self.input_queue = queue.Queue()
-        self.processing_thread = threading.Thread(target=self._input_processor_loop, daemon=True)
-        self.processing_thread.start()
+        # [OPTIMIZED] Input Queue with Batching (see core/batching.py)
+        self.batcher = InputBatcher(self.engine)
 
         self._setup_styles()
         self._build_layout()
         
         self.root.after(500, self._init_hud) 
         self._start_pc_mode_listener()
-        self._refresh_devices()
-        self.root.after(2000, self._heartbeat)
+        # Device list follows adb's track-devices stream (core/device_tracker.py)
+        tracker.subscribe(lambda devices, changes: self.root.after(0, self._on_devices, devices, changes))
+        tracker.start()
+        # Shell exits are pushed by core/watcher.py (no health polling)
+        watcher.subscribe(lambda serial, reason, final: self.root.after(0, self._on_link_event, serial, reason, final))
+        self.root.after(1000, self._update_latency)
 
     def _init_hud(self):
         self.hud = OverlayHUD(self.root)
@@ -92,7 +107,7 @@ class KeyBridgeWindow:
         header.pack(fill="x", side="top")
         tk.Label(header, text="KEYBRIDGE", bg="white", fg="#333", font=("Segoe UI Black", 16)).pack(side="left")
         tk.Label(header, text="ULTIMATE", bg="white", fg="#007acc", font=("Segoe UI", 10, "bold")).pack(side="left", padx=(5,0), pady=(8,0))
-        tk.Button(header, text="☕ Support Dev", bg="#FFDD00", fg="black", font=("Segoe UI", 9, "bold"), relief="flat", padx=15, pady=4, command=lambda: SupportDialog(self.root)).pack(side="right")
+        tk.Button(header, text="☕ Support Dev", bg="#FFDD00", fg="black", font=("Segoe UI", 9, "bold"), relief="flat", padx=15, pady=4, command=self._open_support).pack(side="right")
 
         status_bar = tk.Frame(self.root, bg="#007acc", height=25, padx=10)
         status_bar.pack(side="bottom", fill="x")
@@ -100,11 +115,15 @@ class KeyBridgeWindow:
         self.lbl_status.pack(side="left")
         self.lbl_device = tk.Label(status_bar, text="No Device", bg="#007acc", fg="#e0e0e0", font=("Consolas", 9))
         self.lbl_device.pack(side="right")
+        self.lbl_latency = tk.Label(status_bar, text="", bg="#007acc", fg="#e0e0e0", font=("Consolas", 9))
+        self.lbl_latency.pack(side="right", padx=10)
 
         term_frame = tk.Frame(self.root, bg="#1e1e1e", height=120)
         term_frame.pack(side="bottom", fill="x")
         self.log_text = tk.Text(term_frame, height=7, bg="#1e1e1e", fg="#00ff00", font=("Consolas", 9), relief="flat", state="disabled")
         self.log_text.pack(fill="both", padx=5, pady=5)
+        # Ring buffer, redrawn in batches (see ui/log_console.py)
+        self.console = LogConsole(self.root, self.log_text)
 
         self.tabs = ttk.Notebook(self.root)
         self.tabs.pack(fill="both", expand=True, padx=15, pady=15)
@@ -124,15 +143,16 @@ class KeyBridgeWindow:
         self.device_combo = ttk.Combobox(f_conn, state="readonly", width=25)
         self.device_combo.pack(side="left", padx=10)
         SafeButton(f_conn, text="↻", width=3, command=self._refresh_devices).pack(side="left")
+        ttk.Checkbutton(f_conn, text="Broadcast to all", variable=self.broadcast).pack(side="left", padx=10)
         self.btn_connect = SafeButton(f_conn, text="Connect USB", style="Accent.TButton", command=self._toggle_connect)
         self.btn_connect.pack(side="right")
 
         f_nav = ttk.LabelFrame(tab, text="Soft Keys", style="Card.TLabelframe", padding=15)
         f_nav.pack(fill="x", pady=(0, 15))
         f_nav.columnconfigure((0,1,2), weight=1)
-        SafeButton(f_nav, text="🔙 BACK", command=lambda: self.engine.send_cmd("input keyevent 4")).grid(row=0, column=0, sticky="ew", padx=2)
-        SafeButton(f_nav, text="🏠 HOME", command=lambda: self.engine.send_cmd("input keyevent 3")).grid(row=0, column=1, sticky="ew", padx=2)
-        SafeButton(f_nav, text="▢ APPS", command=lambda: self.engine.send_cmd("input keyevent 187")).grid(row=0, column=2, sticky="ew", padx=2)
+        SafeButton(f_nav, text="🔙 BACK", command=lambda: self.target.send_cmd("input keyevent 4")).grid(row=0, column=0, sticky="ew", padx=2)
+        SafeButton(f_nav, text="🏠 HOME", command=lambda: self.target.send_cmd("input keyevent 3")).grid(row=0, column=1, sticky="ew", padx=2)
+        SafeButton(f_nav, text="▢ APPS", command=lambda: self.target.send_cmd("input keyevent 187")).grid(row=0, column=2, sticky="ew", padx=2)
 
         f_cap = ttk.LabelFrame(tab, text="Keyboard Input", style="Card.TLabelframe", padding=20)
         f_cap.pack(fill="both", expand=True)
@@ -177,7 +197,20 @@ class KeyBridgeWindow:
         self.tabs.add(tab, text="  🧰 Tools  ")
         f1 = ttk.LabelFrame(tab, text="File Beam", style="Card.TLabelframe", padding=15)
         f1.pack(fill="x", pady=(0, 15))
-        SafeButton(f1, text="📂 Push File to Downloads", command=self._beam_file).pack(fill="x")
+        row_beam = ttk.Frame(f1, style="Card.TLabelframe")
+        row_beam.pack(fill="x")
+        SafeButton(row_beam, text="📂 Push Files to Downloads", command=self._beam_file).pack(side="left", fill="x", expand=True)
+        SafeButton(row_beam, text="✖", width=3, command=self._cancel_beam).pack(side="left", padx=(5,0))
+        row_mirror = ttk.Frame(f1, style="Card.TLabelframe")
+        row_mirror.pack(fill="x", pady=(5,0))
+        SafeButton(row_mirror, text="🔁 Mirror Folder to Phone...", command=self._mirror_folder).pack(side="left", fill="x", expand=True)
+        self.mirror_delete = tk.BooleanVar(value=False)
+        ttk.Checkbutton(row_mirror, text="Delete extras", variable=self.mirror_delete).pack(side="left", padx=(5,0))
+        self.lbl_beam = ttk.Label(f1, text="", background="white", foreground="#666")
+        self.lbl_beam.pack(fill="x", pady=(5,0))
+        f_perf = ttk.LabelFrame(tab, text="Typing Latency", style="Card.TLabelframe", padding=15)
+        f_perf.pack(fill="x", pady=(0, 15))
+        SafeButton(f_perf, text="💾 Export Latency Stats (JSON)", command=self._export_latency).pack(fill="x")
         f2 = ttk.LabelFrame(tab, text="Macro Snippets", style="Card.TLabelframe", padding=15)
         f2.pack(fill="both", expand=True)
         SafeButton(f2, text="↻ Reload Macros", command=lambda: self._load_macros(self.macro_container)).pack(anchor="e")
@@ -191,7 +224,7 @@ class KeyBridgeWindow:
             ttk.Label(parent, text="No macros. Add in Settings!", background="white").pack(pady=10)
             return
         for lbl, txt in cfg.macros.items():
-            SafeButton(parent, text=lbl, command=lambda t=txt: self.engine.send_text(t)).pack(fill="x", pady=2)
+            SafeButton(parent, text=lbl, command=lambda t=txt: self.target.send_text(t)).pack(fill="x", pady=2)
 
     def _init_clipboard_tab(self):
         tab = ttk.Frame(self.tabs, padding=20)
@@ -205,34 +238,105 @@ class KeyBridgeWindow:
         SafeButton(row, text="Paste from PC", command=self._get_pc_clipboard).pack(side="left", fill="x", expand=True, padx=(0,5))
         SafeButton(row, text="Type on Phone", style="Accent.TButton", command=self._send_clipboard_text).pack(side="left", fill="x", expand=True, padx=(5,0))
 
+    def _open_support(self):
+        # qrcode + PIL load on first use, not at startup
+        from ui.support_dialog import SupportDialog
+        SupportDialog(self.root)
+
     def _refresh_devices(self):
-        try:
-            res = subprocess.run([ADB_PATH, "devices"], capture_output=True, text=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            lines = res.stdout.strip().split("\n")[1:]
-            devices = [l.split()[0] for l in lines if "device" in l]
-            self.device_combo['values'] = devices
-            if devices: self.device_combo.current(0)
-            self.log(f"Scan complete. Found {len(devices)} device(s).")
-        except Exception as e:
-            self.log(f"Error scanning devices: {e}")
+        """ Manual rescan (↻), off the Tk thread. The tracker normally keeps the list current. """
+        def _scan():
+            try:
+                devices = self.engine.list_devices()
+                self.root.after(0, self._show_devices, devices)
+                self.log(f"Scan complete. Found {len(devices)} device(s).")
+            except Exception as e:
+                self.log(f"Error scanning devices: {e}")
+        threading.Thread(target=_scan, daemon=True).start()
+
+    def _on_devices(self, devices, changes):
+        for serial, old, new in changes:
+            if new is None: self.log(f"[-] Device removed: {serial}")
+            elif old is None: self.log(f"[+] Device found: {serial} ({new})")
+            else: self.log(f"[*] {serial}: {old} -> {new}")
+        self._show_devices([s for s, state in devices.items() if state == "device"])
+
+    def _show_devices(self, devices):
+        current = self.device_combo.get()
+        self.device_combo['values'] = devices
+        # Keep the user's pick while it's still attached
+        if current in devices: return
+        if devices: self.device_combo.current(0)
+        else: self.device_combo.set("")
+
+    @property
+    def target(self):
+        """ Where typing goes: the broadcast pool while it's connected, else the engine. """
+        return self.pool if self.pool.engines else self.engine
 
     def _toggle_connect(self):
-        if self.engine.running:
+        if self.target.running:
             if self.capture_active: self._deactivate_phone_mode()
-            self.engine.stop()
+            self.target.stop()
+            self.batcher.engine = self.engine
             self.notifier.stop()
             self.set_status(False)
+        elif self.broadcast.get():
+            devices = list(self.device_combo['values'])
+            if not devices:
+                messagebox.showwarning("No Devices", "No devices found to broadcast to.")
+                return
+            self._connecting()
+            # Off the Tk thread; the result comes back through root.after
+            threading.Thread(target=lambda: self._on_pool_connected(self.pool.connect(devices)),
+                             daemon=True).start()
         else:
             dev = self.device_combo.get()
             if dev:
-                if self.engine.connect(dev):
-                    self.notifier.start(dev)
-                    self.set_status(True, dev)
+                self._connecting()
+                if hasattr(self.engine, "connect_async"):
+                    future = self.engine.connect_async(dev)
+                    future.add_done_callback(lambda f: self._on_connect_future(dev, f))
                 else:
-                    self.log("Connection Failed.")
+                    self._on_engine_connected(dev, self.engine.connect(dev))
             else:
                 messagebox.showwarning("Select Device", "Please select a device.")
 
+    def _connecting(self):
+        self.btn_connect.configure(text="Connecting...", state="disabled")
+
+    def _on_connect_future(self, dev, future):
+        # Runs on the engine's loop thread
+        if future.cancelled():
+            self._on_engine_connected(dev, False)
+        elif future.exception() is not None:
+            self.log(f"[!] Engine Error: {future.exception()!r}")
+            self._on_engine_connected(dev, False)
+        else:
+            self._on_engine_connected(dev, future.result())
+
+    def _on_engine_connected(self, dev, ok):
+        def _done():
+            self.btn_connect.configure(state="normal")
+            if ok:
+                self.notifier.start(dev)
+                self.set_status(True, dev)
+            else:
+                self.set_status(False)
+                self.log("Connection Failed.")
+        self.root.after(0, _done)
+
+    def _on_pool_connected(self, connected):
+        def _done():
+            self.btn_connect.configure(state="normal")
+            if connected:
+                self.batcher.engine = self.pool
+                self.set_status(True, f"{len(connected)} devices")
+            else:
+                self.set_status(False)
+                self.log("Connection Failed.")
+        self.root.after(0, _done)
+
     def _do_pairing(self):
         ip_port = self.pair_ip.get().strip()
         code = self.pair_code.get().strip()
@@ -249,7 +353,6 @@ class KeyBridgeWindow:
         if not ip: return
         if self.engine.connect_wireless_ip(ip):
             self.log("Wireless Connected!")
-            self._refresh_devices()
             self.device_combo.set(ip if ":" in ip else f"{ip}:5555")
         else:
             self.log("Wireless Connection Failed.")
@@ -263,7 +366,7 @@ class KeyBridgeWindow:
         self.log("Ready. Press Ctrl+F12 to toggle Phone Mode.")
 
     def _activate_phone_mode(self):
-        if not self.engine.running:
+        if not self.target.running:
             messagebox.showerror("Not Connected", "Please connect to a device first.")
             return
 
@@ -303,42 +406,6 @@ class KeyBridgeWindow:
         self.log("Keyboard Capture: OFF")
         self._start_pc_mode_listener()
 
-    # --- [NEW] SMART BATCHING PROCESSOR ---
-    def _input_processor_loop(self):
-        """ 
-        Smart Batcher:
-        Waits 50ms to see if you type more keys.
-        If yes -> Combines them (Batching).
-        If no -> Sends what it has.
-        """
-        buffer = []
-        
-        while True:
-            try:
-                # Wait for a key for 50ms
-                key = self.input_queue.get(timeout=0.05) 
-                
-                # If character, add to buffer
-                if hasattr(key, 'char') and key.char:
-                    buffer.append(key.char)
-                else:
-                    # Special key! Flush buffer first
-                    if buffer:
-                        self.engine.send_text("".join(buffer))
-                        buffer = []
-                    
-                    # Process special key immediately
-                    if key in SPECIAL_KEYS: self.engine.send_cmd(f"input keyevent {SPECIAL_KEYS[key]}")
-                    elif key == keyboard.Key.space: self.engine.send_text(" ")
-                    elif key == keyboard.Key.enter: self.engine.send_cmd("input keyevent 66")
-                    elif key == keyboard.Key.backspace: self.engine.send_cmd("input keyevent 67")
-                    
-            except queue.Empty:
-                # 50ms passed with no new key. Flush buffer.
-                if buffer:
-                    self.engine.send_text("".join(buffer))
-                    buffer = []
-
     def _handle_input_press(self, key):
         if not self.capture_active: return
 
@@ -347,14 +414,59 @@ class KeyBridgeWindow:
             return
 
         # Dump to Queue immediately (No Lag)
-        self.input_queue.put(key)
+        self.batcher.put(key)
 
     def _handle_input_release(self, key):
         pass 
 
     def _beam_file(self):
-        path = filedialog.askopenfilename()
-        if path: self.engine.push_file(path)
+        paths = filedialog.askopenfilenames()
+        if paths: self.engine.push_files(paths, lambda st: self.root.after(0, self._show_beam, st))
+
+    def _cancel_beam(self):
+        if self.engine.beam: self.engine.beam.cancel()
+        if self.mirror: self.mirror.cancel()
+
+    def _mirror_folder(self):
+        local = filedialog.askdirectory()
+        if not local: return
+        remote = simpledialog.askstring("Mirror Folder", "Phone folder:",
+                                        initialvalue=f"/sdcard/KeyBridge/{os.path.basename(local)}")
+        if not remote: return
+        self.mirror = FolderMirror(self.log, self.engine.device_id or self.device_combo.get() or None,
+                                   self.mirror_delete.get(),
+                                   on_progress=lambda st: self.root.after(0, self._show_beam, st))
+        def _run():
+            res = self.mirror.run(local, remote)
+            self.log(f"[+] Mirror done: {res['sent']} sent, {res['deleted']} deleted, "
+                     f"{res['unchanged']} unchanged in {res['seconds']:.1f}s")
+        threading.Thread(target=_run, daemon=True).start()
+
+    def _show_beam(self, st):
+        done = st["sent"] + st["skipped"] + st["failed"]
+        text = f"{done}/{st['files']} files | {st['bytes_done'] / 1e6:.1f}/{st['bytes_total'] / 1e6:.1f} MB | {st['rate_bps'] / 1e6:.1f} MB/s"
+        if st["eta_s"] and done < st["files"]: text += f" | ETA {st['eta_s']:.0f}s"
+        if st["skipped"]: text += f" | {st['skipped']} unchanged"
+        if st["cancelled"]: text += " | cancelled"
+        self.lbl_beam.configure(text=text)
+
+    def _export_latency(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if path:
+            self.target.tracer.dump(path)
+            self.log(f"Latency stats saved: {path}")
+
+    def _update_latency(self):
+        text = self.target.tracer.status_text()
+        # Device still busy with input from over a second ago (see core/engine.py flow control)
+        lag = self.target.device_lag() if self.target.running else 0.0
+        lagging = lag > ENGINE_LAG_WARN
+        if lagging: text = f"⚠ device lagging {lag:.1f}s | {text}"
+        # Shell dropped and is being replaced; input is held and replayed
+        if self.target.running and self.target.recovering:
+            text, lagging = f"⟳ reconnecting… | {text}", True
+        self.lbl_latency.configure(text=text, fg="#ffd54f" if lagging else "#e0e0e0")
+        self.root.after(1000, self._update_latency)
 
     def _get_pc_clipboard(self):
         try:
@@ -365,25 +477,20 @@ class KeyBridgeWindow:
 
     def _send_clipboard_text(self):
         content = self.txt_clipboard.get("1.0", "end-1c")
-        if content.strip(): self.engine.send_text(content)
-
-    def _heartbeat(self):
-        if self.engine.running and not self.engine.check_health():
-            self.log("Heartbeat: Connection Lost.")
-            if self.capture_active: self._deactivate_phone_mode()
-            self.engine.stop()
-            self.notifier.stop()
-            self.set_status(False)
-        self.root.after(2000, self._heartbeat)
-
-    def log(self, msg):
-        self.root.after(0, lambda: self._write_log(msg))
-
-    def _write_log(self, msg):
-        self.log_text.config(state="normal")
-        self.log_text.insert("end", f"> {msg}\n")
-        self.log_text.see("end")
-        self.log_text.config(state="disabled")
+        if content.strip(): self.target.send_text(content)
+
+    def _on_link_event(self, serial, reason, final):
+        # Not final: the engine is already swapping in a new shell
+        if not final or not self.target.running or self.target.check_health(): return
+        self.log(f"Connection Lost ({serial}): {reason}" if reason else f"Connection Lost ({serial}).")
+        if self.capture_active: self._deactivate_phone_mode()
+        self.target.stop()
+        self.batcher.engine = self.engine
+        self.notifier.stop()
+        self.set_status(False)
+
+    def log(self, msg, level=None):
+        self.console.log(msg, level)
 
     def set_status(self, connected, device_name="No Device"):
         self.btn_connect.configure(text="Disconnect" if connected else "Connect USB", 
@@ -0,0 +1,73 @@
+import collections
+import logging
+import threading
+import time
+from core.config import LOG_MAX_LINES, LOG_FLUSH_HZ, LOG_LEVEL
+
+class LogConsole:
+    """
+    Log sink for the window's terminal (a Tk Text widget). log() can be
+    called from any thread: lines go into a ring buffer, and the widget is
+    updated in one batch (one insert, one trim, one scroll) at most `rate`
+    times a second. The widget keeps only the last max_lines lines; lines
+    that overflow the buffer before a redraw are counted, not shown.
+
+    Levels are the logging module's. Lines below `level` return before
+    anything else happens, so hot paths can log at DEBUG for free - guard
+    messages that are costly to build with enabled(). Without a level,
+    "[!]" lines are WARNING and the rest INFO.
+    """
+    COLORS = {logging.DEBUG: "#9e9e9e", logging.WARNING: "#ffd54f", logging.ERROR: "#ff5252"}
+
+    def __init__(self, root, widget, max_lines=LOG_MAX_LINES, rate=LOG_FLUSH_HZ, level=LOG_LEVEL):
+        self.root = root
+        self.widget = widget
+        self.max_lines = max_lines
+        self.interval = 1.0 / rate
+        self.level = level if isinstance(level, int) else logging.getLevelName(level)
+        self.pending = collections.deque(maxlen=max_lines)
+        self.lock = threading.Lock()
+        self.scheduled = False
+        self.skipped = 0 # Lines pushed out of the buffer since the last redraw
+        self.last_flush = 0.0
+        for lvl, color in self.COLORS.items():
+            widget.tag_configure(logging.getLevelName(lvl), foreground=color)
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def log(self, msg, level=None):
+        # "[!]" may follow a broadcast pool's "[serial] " prefix
+        if level is None: level = logging.WARNING if "[!]" in msg[:32] else logging.INFO
+        if level < self.level: return
+        with self.lock:
+            if len(self.pending) == self.max_lines: self.skipped += 1
+            self.pending.append((level, msg))
+            if self.scheduled: return
+            self.scheduled = True
+        # After a quiet spell the line shows at once; a burst waits for the next frame
+        wait = self.last_flush + self.interval - time.perf_counter()
+        self.root.after(max(0, int(wait * 1000)), self.flush)
+
+    def flush(self):
+        """ Writes everything pending to the widget. Runs on the Tk thread. """
+        with self.lock:
+            lines = list(self.pending)
+            self.pending.clear()
+            skipped, self.skipped = self.skipped, 0
+            self.scheduled = False
+        self.last_flush = time.perf_counter()
+        if not lines: return
+
+        chunks = []
+        if skipped: chunks += [f"> ... {skipped} line(s) skipped\n", "WARNING"]
+        for level, msg in lines:
+            chunks += [f"> {msg}\n", logging.getLevelName(level)]
+        w = self.widget
+        w.config(state="normal")
+        w.insert("end", *chunks)
+        # "end-1c" sits on the empty line after the last newline
+        excess = int(w.index("end-1c").split(".")[0]) - 1 - self.max_lines
+        if excess > 0: w.delete("1.0", f"{excess + 1}.0")
+        w.see("end")
+        w.config(state="disabled")
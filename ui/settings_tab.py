@@ -1,6 +1,6 @@
 import tkinter as tk
-from tkinter import ttk, simpledialog, messagebox
-from core.config import cfg
+from tkinter import ttk, simpledialog, messagebox, filedialog
+from core.settings import cfg
 from .components import SafeButton
 
 class SettingsTab:
@@ -25,6 +25,7 @@ class SettingsTab:
         
         SafeButton(btn_frame, text="+ Add New", command=self._add_macro).pack(side="left", padx=5)
         SafeButton(btn_frame, text="- Delete Selected", command=self._del_macro).pack(side="left", padx=5)
+        SafeButton(btn_frame, text="Import...", command=self._import_macros).pack(side="left", padx=5)
 
     def _refresh_list(self):
         self.lst_macros.delete(0, "end")
@@ -40,6 +41,17 @@ class SettingsTab:
         cfg.add_macro(name, text)
         self._refresh_list()
 
+    def _import_macros(self):
+        path = filedialog.askopenfilename(title="Import Macros", filetypes=[("JSON", "*.json"), ("All files", "*.*")])
+        if not path: return
+        try:
+            count = cfg.import_macros_file(path) # One write, however many
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Import Macros", f"Couldn't import {path}:\n{e}")
+            return
+        self._refresh_list()
+        messagebox.showinfo("Import Macros", f"Imported {count} macro(s).")
+
     def _del_macro(self):
         sel = self.lst_macros.curselection()
         if not sel: return